@@ -51,8 +51,13 @@ REST_FRAMEWORK = {
 }
 
 
+# Query budgets (see advanced_api_project/query_budget.py): raise instead of logging
+# when a view goes over its declared budget. Tests turn this on.
+QUERY_BUDGET_STRICT = False
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'advanced_api_project.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -1,7 +1,9 @@
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
+from advanced_api_project.query_budget import QueryBudgetTestMixin, QueryRecorder
 from .models import Author, Book
 
 User = get_user_model()
@@ -118,3 +120,17 @@ class BookQueryCapabilitiesTests(BaseAPITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         years = [b["publication_year"] for b in res.data]
         self.assertEqual(years, sorted(years, reverse=True))
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, BaseAPITestCase):
+    def test_read_endpoints_stay_within_budget(self):
+        self.client.login(username="tester", password="pass12345")
+        for url in (reverse("author-list"), self.url_list, self.url_detail(self.book1.id)):
+            with self.subTest(url), self.assertQueryBudget(4, max_duplicates=0):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_transaction_control_is_not_counted(self):
+        recorder = QueryRecorder()
+        with recorder.capture(), transaction.atomic():
+            list(Book.objects.all())
+        self.assertEqual(recorder.count, 1)
@@ -17,6 +17,7 @@ class AuthorListView(generics.ListAPIView):
     queryset = Author.objects.prefetch_related("books")
     serializer_class = AuthorSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = 4  # session + user + authors + prefetched books
 
 
 # -----------------------------
@@ -33,6 +34,7 @@ class BookListView(generics.ListAPIView):
     queryset = Book.objects.select_related("author")
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = 3  # session + user + books
 
     # Enable filter/search/order backends
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -57,6 +59,7 @@ class BookDetailView(generics.RetrieveAPIView):
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = "pk"
+    query_budget = 3
 
 
 class BookCreateView(generics.CreateAPIView):
@@ -27,6 +27,7 @@ class BookList(generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [AllowAny]  # keep public if desired   
+    query_budget = 3  # auth lookup(s) + books
 
 class BookViewSet(viewsets.ModelViewSet):
     """
@@ -44,6 +45,7 @@ class BookViewSet(viewsets.ModelViewSet):
     serializer_class = BookSerializer
     permission_classes = [AllowAny]
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 3}
 
 def home(request):
     """
@@ -0,0 +1,200 @@
+# accounts/authentication.py
+"""
+Token authentication with cached token -> user resolution.
+
+TokenAuthentication runs a Token JOIN User query on every request. Here the
+result is kept in two tiers:
+
+    local   a per-process LRU dict, entries trusted for AUTH_TOKEN_LOCAL_TTL
+            seconds (also the longest a revoked token can outlive its
+            logout in *other* processes)
+    shared  the AUTH_TOKEN_CACHE_ALIAS cache, for AUTH_TOKEN_CACHE_TIMEOUT;
+            skipped when that alias is a per-process LocMemCache, where a
+            logout could only clear the entry of the worker that served it
+
+Deleting a token (logout, password change) and any save of its user drop
+both tiers (see accounts/signals.py). With AUTH_TOKEN_TTL set, tokens older
+than that many seconds are rejected and deleted; login then issues a fresh one.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def shared_cache():
+    """
+    The shared tier, or None when AUTH_TOKEN_CACHE_ALIAS is not actually shared.
+    """
+    cache = caches[_setting('AUTH_TOKEN_CACHE_ALIAS', 'default')]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def cache_key(key):
+    return f'auth:token:{key}'
+
+
+class LocalTokenCache:
+    """
+    Thread-safe LRU of token key -> (user, token created, stored at).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, created, stored_at = entry
+            if time.monotonic() - stored_at > _setting('AUTH_TOKEN_LOCAL_TTL', 30):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Requests may mutate request.user; never hand two of them the same instance
+        return copy.copy(user), created
+
+    def set(self, key, user, created):
+        with self._lock:
+            self._entries[key] = (user, created, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > _setting('AUTH_TOKEN_LOCAL_SIZE', 10000):
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalTokenCache()
+
+
+def is_expired(created):
+    ttl = _setting('AUTH_TOKEN_TTL', None)
+    return ttl is not None and created + timedelta(seconds=ttl) < timezone.now()
+
+
+def forget_tokens(keys):
+    """
+    Drop cached resolutions for the given token keys from both tiers.
+    Only this process's local tier can be reached; others expire on their own.
+    """
+    keys = list(keys)
+    for key in keys:
+        local_cache.delete(key)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete_many([cache_key(key) for key in keys])
+
+
+def issue_token(user):
+    """
+    The user's token, replacing it first if it has expired.
+    """
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and is_expired(token.created):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in for rest_framework.authentication.TokenAuthentication.
+    aauthenticate() does the same for plain async views (see social_media_api/async_api.py).
+    """
+
+    def authenticate_credentials(self, key):
+        cached = local_cache.get(key)
+        if cached is None:
+            shared = shared_cache()
+            cached = shared.get(cache_key(key)) if shared is not None else None
+            if cached is None:
+                cached = self.load(key)
+                if shared is not None:
+                    shared.set(cache_key(key), cached, _setting('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+            cached = self.remember(key, cached)
+        if is_expired(cached[1]):
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        return self.credentials(key, *cached)
+
+    async def aauthenticate(self, request):
+        """
+        (user, token) for a Django HttpRequest, or None when no token was sent.
+        """
+        key = self.get_key(request)
+        if key is None:
+            return None
+        cached = local_cache.get(key)
+        if cached is None:
+            shared = shared_cache()
+            cached = await shared.aget(cache_key(key)) if shared is not None else None
+            if cached is None:
+                cached = await self.aload(key)
+                if shared is not None:
+                    await shared.aset(cache_key(key), cached, _setting('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+            cached = self.remember(key, cached)
+        if is_expired(cached[1]):
+            await Token.objects.filter(key=key).adelete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        return self.credentials(key, *cached)
+
+    def get_key(self, request):
+        """
+        The key from an `Authorization: Token <key>` header, as TokenAuthentication parses it.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header. Token string should not contain invalid characters.')
+
+    @staticmethod
+    def remember(key, cached):
+        user, created = cached
+        local_cache.set(key, user, created)
+        return copy.copy(user), created
+
+    @staticmethod
+    def credentials(key, user, created):
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, Token(key=key, user=user, created=created)
+
+    def load(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        return token.user, token.created
+
+    async def aload(self, key):
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        return token.user, token.created
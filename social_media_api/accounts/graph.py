@@ -0,0 +1,109 @@
+# accounts/graph.py
+"""
+Follower graph service.
+
+- Follow/unfollow go through `follow()` / `unfollow()`, which report whether
+  anything changed so callers can skip side effects on repeats. They check
+  the follow table itself, never the cached arrays.
+- Follower/following sizes live on User.follower_count / following_count.
+- Each user's adjacency lists are cached as sorted `array('q')` id arrays, so
+  "does A follow B" is a cache hit plus a binary search. Feed fan-out and
+  feed reads (posts/feed.py) use them too.
+
+Arrays are invalidated by accounts/signals.py on every change, in the default
+cache: with several processes that cache must be shared (Redis, Memcached),
+or the others read their copies until GRAPH_CACHE_TIMEOUT.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+
+def _timeout():
+    return getattr(settings, 'GRAPH_CACHE_TIMEOUT', 600)
+
+
+def _cache_key(direction, user_id):
+    return f'graph:{direction}:{user_id}'
+
+
+def _load(direction, user_id):
+    User = get_user_model()
+    if direction == FOLLOWING:
+        ids = User.following.through.objects.filter(from_user_id=user_id).values_list('to_user_id', flat=True)
+    else:
+        ids = User.following.through.objects.filter(to_user_id=user_id).values_list('from_user_id', flat=True)
+    return array('q', sorted(ids))
+
+
+def _adjacency(direction, user_id):
+    key = _cache_key(direction, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = _load(direction, user_id)
+        cache.set(key, ids, _timeout())
+    return ids
+
+
+def following_ids(user_id):
+    """
+    Sorted ids of the users `user_id` follows.
+    """
+    return _adjacency(FOLLOWING, user_id)
+
+
+def follower_ids(user_id):
+    """
+    Sorted ids of the users following `user_id`.
+    """
+    return _adjacency(FOLLOWERS, user_id)
+
+
+def _contains(sorted_ids, value):
+    index = bisect_left(sorted_ids, value)
+    return index < len(sorted_ids) and sorted_ids[index] == value
+
+
+def is_following(user_id, target_id):
+    return _contains(following_ids(user_id), target_id)
+
+
+def invalidate(following_of=(), followers_of=()):
+    """
+    Drop cached adjacency arrays after the graph changed.
+    """
+    keys = [_cache_key(FOLLOWING, user_id) for user_id in following_of]
+    keys += [_cache_key(FOLLOWERS, user_id) for user_id in followers_of]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _edge_exists(user_id, target_id):
+    Follow = get_user_model().following.through
+    return Follow.objects.filter(from_user_id=user_id, to_user_id=target_id).exists()
+
+
+def follow(user, target):
+    """
+    Make `user` follow `target`. Returns False if they already did.
+    """
+    if _edge_exists(user.pk, target.pk):
+        return False
+    user.following.add(target)
+    return True
+
+
+def unfollow(user, target):
+    """
+    Make `user` stop following `target`. Returns False if they didn't.
+    """
+    if not _edge_exists(user.pk, target.pk):
+        return False
+    user.following.remove(target)
+    return True
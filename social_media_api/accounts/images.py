@@ -0,0 +1,258 @@
+# accounts/images.py
+"""
+Profile picture pipeline.
+
+Uploads are never written to the media storage inside the request.
+accept_upload() moves the uploaded file (already streamed to a temporary file
+by TemporaryFileUploadHandler) into PROFILE_PICTURE_STAGING_DIR, records its
+path in User.profile_picture_pending and queues the user. The queue worker
+then stores the original through the field's storage, together with one
+square copy per PROFILE_PICTURE_SIZES entry, e.g.
+
+    profiles/alice/me.jpg            profile_picture
+    profiles/alice/me_small.webp     profile_picture_variants['small']
+    profiles/alice/me_medium.webp    ...
+
+and swaps them in with a single UPDATE. The previous files are deleted
+afterwards. An upload that a newer one superseded while it was being
+processed is discarded.
+
+PROFILE_PICTURE_PROCESSING_MODE:
+    'thread'  process in a background worker thread (default)
+    'inline'  process immediately, inside the request (used by the test suite)
+    'manual'  only process when pipeline.process_queued() is called
+
+Staged uploads left behind by a restart are picked up by
+`manage.py process_profile_pictures`.
+"""
+import io
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+from rest_framework.authtoken.models import Token
+
+from posts.caching import bump_versions
+from .authentication import forget_tokens
+from .models import delete_picture_files, user_profile_upload_path
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def picture_storage():
+    return get_user_model()._meta.get_field('profile_picture').storage
+
+
+def staging_dir():
+    return _setting('PROFILE_PICTURE_STAGING_DIR', os.path.join(settings.BASE_DIR, 'media-staging'))
+
+
+def stage_upload(upload):
+    """
+    Move an uploaded file to its own staging directory, keeping its name.
+    Returns the staged path.
+    """
+    directory = os.path.join(staging_dir(), uuid.uuid4().hex)
+    os.makedirs(directory)
+    path = os.path.join(directory, os.path.basename(upload.name))
+    if hasattr(upload, 'temporary_file_path'):
+        shutil.move(upload.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as f:
+            for chunk in upload.chunks():
+                f.write(chunk)
+    return path
+
+
+def discard_staged(path):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def render_variants(path):
+    """
+    {size name: encoded bytes} of the square copies of the image at `path`.
+    """
+    sizes = _setting('PROFILE_PICTURE_SIZES', {'small': 64, 'medium': 192, 'large': 512})
+    fmt = _setting('PROFILE_PICTURE_FORMAT', 'WEBP')
+    largest = max(sizes.values())
+    variants = {}
+    with Image.open(path) as image:
+        # Let the JPEG decoder downscale while decoding; far cheaper for camera photos
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        if fmt == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        for name, size in sizes.items():
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format=fmt, quality=_setting('PROFILE_PICTURE_QUALITY', 80))
+            variants[name] = buffer.getvalue()
+    return variants
+
+
+def store_picture(username, path):
+    """
+    Save the staged original and its variants to storage. Returns
+    (original name, {size name: variant name}).
+    """
+    storage = picture_storage()
+    rendered = render_variants(path)
+    name = user_profile_upload_path(get_user_model()(username=username), os.path.basename(path))
+    stem = os.path.splitext(name)[0]
+    extension = EXTENSIONS.get(_setting('PROFILE_PICTURE_FORMAT', 'WEBP'), 'img')
+    variants = {
+        size_name: storage.save(f'{stem}_{size_name}.{extension}', ContentFile(data))
+        for size_name, data in rendered.items()
+    }
+    with open(path, 'rb') as f:
+        original = storage.save(name, File(f))
+    return original, variants
+
+
+def user_changed(user_id):
+    # Cached token resolutions and post responses embed the old picture
+    forget_tokens(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+    bump_versions(user_ids=[user_id])
+
+
+def process_upload(user_id):
+    """
+    Store a user's staged upload. Returns True if it became their picture.
+    """
+    User = get_user_model()
+    row = User.objects.filter(pk=user_id).values(
+        'username', 'profile_picture', 'profile_picture_variants', 'profile_picture_pending',
+    ).first()
+    if row is None or not row['profile_picture_pending']:
+        return False
+    staged = row['profile_picture_pending']
+    current = User.objects.filter(pk=user_id, profile_picture_pending=staged)
+    try:
+        original, variants = store_picture(row['username'], staged)
+    except (OSError, Image.DecompressionBombError) as exc:
+        logger.warning('Discarding profile picture upload %s: %s', staged, exc)
+        current.update(profile_picture_pending='')
+        discard_staged(staged)
+        return False
+
+    if current.update(profile_picture=original, profile_picture_variants=variants, profile_picture_pending=''):
+        delete_picture_files([row['profile_picture'], *row['profile_picture_variants'].values()])
+        user_changed(user_id)
+        accepted = True
+    else:
+        # A newer upload replaced this one meanwhile
+        delete_picture_files([original, *variants.values()])
+        accepted = False
+    discard_staged(staged)
+    return accepted
+
+
+def remove_picture(user):
+    """
+    Delete a user's picture and variants, and drop any upload in progress.
+    """
+    User = get_user_model()
+    row = User.objects.filter(pk=user.pk).values(
+        'profile_picture', 'profile_picture_variants', 'profile_picture_pending',
+    ).first()
+    User.objects.filter(pk=user.pk).update(profile_picture=None, profile_picture_variants={},
+                                           profile_picture_pending='')
+    user.profile_picture, user.profile_picture_variants, user.profile_picture_pending = None, {}, ''
+    if row is not None:
+        delete_picture_files([row['profile_picture'], *row['profile_picture_variants'].values()])
+        if row['profile_picture_pending']:
+            discard_staged(row['profile_picture_pending'])
+    user_changed(user.pk)
+
+
+class ImagePipeline:
+    def __init__(self):
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    @property
+    def mode(self):
+        return _setting('PROFILE_PICTURE_PROCESSING_MODE', 'thread')
+
+    def accept_upload(self, user, upload):
+        """
+        Stage `upload` as the user's next picture and queue it for processing.
+        """
+        path = stage_upload(upload)
+        users = get_user_model().objects.filter(pk=user.pk)
+        previous = users.values_list('profile_picture_pending', flat=True).first()
+        users.update(profile_picture_pending=path)
+        user.profile_picture_pending = path
+        if previous:
+            # Superseded before it was processed
+            discard_staged(previous)
+        if self.mode == 'inline':
+            process_upload(user.pk)
+            user.refresh_from_db(fields=['profile_picture', 'profile_picture_variants', 'profile_picture_pending'])
+        else:
+            # The worker must see the pending path
+            transaction.on_commit(lambda: self.enqueue(user.pk))
+
+    def enqueue(self, user_id):
+        with self._lock:
+            self._queued.add(user_id)
+        if self.mode == 'thread':
+            self._ensure_worker()
+            self._wakeup.set()
+
+    def queued(self):
+        with self._lock:
+            return len(self._queued)
+
+    def process_queued(self):
+        """
+        Process every queued user. Returns the number of pictures stored.
+        """
+        with self._lock:
+            user_ids, self._queued = self._queued, set()
+        stored = 0
+        for user_id in user_ids:
+            try:
+                stored += process_upload(user_id)
+            except Exception:
+                logger.exception('Failed to process profile picture of user %s', user_id)
+        return stored
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='profile-pictures', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.process_queued()
+            finally:
+                close_old_connections()
+
+
+pipeline = ImagePipeline()
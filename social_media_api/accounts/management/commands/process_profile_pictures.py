@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.images import process_upload
+
+
+class Command(BaseCommand):
+    help = (
+        'Store profile picture uploads still waiting in the staging directory, e.g. after a restart '
+        'dropped the in-process queue (see accounts/images.py).'
+    )
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.exclude(profile_picture_pending='').values_list('pk', flat=True)
+        stored = pending = 0
+        for user_id in user_ids.iterator():
+            pending += 1
+            stored += process_upload(user_id)
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} of {pending} pending profile pictures.'))
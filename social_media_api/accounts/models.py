@@ -1,13 +1,25 @@
 # Create your models here.
+import functools
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 
 def user_profile_upload_path(instance, filename):
     return f'profiles/{instance.username}/{filename}'
 
+def delete_picture_files(names):
+    storage = User._meta.get_field('profile_picture').storage
+    for name in names:
+        if name:
+            storage.delete(name)
+
 class User(AbstractUser):
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to=user_profile_upload_path, blank=True, null=True)
+    # Square resized copies of profile_picture by size name, and the local path
+    # of an upload still being processed (see accounts/images.py)
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
+    profile_picture_pending = models.CharField(max_length=500, blank=True)
 
     # Users this user follows (asymmetric)
     following = models.ManyToManyField(
@@ -16,6 +28,57 @@ class User(AbstractUser):
         related_name='followers',
         blank=True
     )
+    # Denormalized sizes of the two sides of `following`, maintained by
+    # accounts/signals.py so profiles never count the M2M table
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    # Only ever written with F() updates (or, for the pictures, by the image
+    # pipeline); a plain save() must not write back a stale copy
+    denormalized_fields = (
+        'follower_count', 'following_count', 'profile_picture_variants', 'profile_picture_pending',
+    )
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'profile_picture' in field_names:
+            instance._loaded_picture = values[field_names.index('profile_picture')] or ''
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'profile_picture' in fields:
+            self._loaded_picture = self.profile_picture.name or ''
+
+    def picture_changed(self):
+        """
+        Whether profile_picture was assigned a different file since this
+        instance was loaded. The pipeline writes the column directly, so an
+        unchanged copy may be stale and must not be saved over it.
+        """
+        if 'profile_picture' not in self.__dict__:
+            return False  # deferred and never assigned
+        return (self.profile_picture.name or '') != getattr(self, '_loaded_picture', '')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.denormalized_fields
+            ]
+            if self.picture_changed():
+                # Set outside the pipeline (e.g. the admin): the variants were
+                # rendered from the previous picture
+                stale = [self._loaded_picture, *self.profile_picture_variants.values()]
+                self.profile_picture_variants = {}
+                kwargs['update_fields'].append('profile_picture_variants')
+                transaction.on_commit(functools.partial(delete_picture_files, stale))
+            else:
+                kwargs['update_fields'].remove('profile_picture')
+        super().save(*args, **kwargs)
+        if 'profile_picture' in self.__dict__:
+            self._loaded_picture = self.profile_picture.name or ''
@@ -3,14 +3,70 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from social_media_api.sparse_fields import SparseFieldsSerializerMixin
+from .images import picture_storage, pipeline, remove_picture
+
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class PictureVariantsField(serializers.Field):
+    """
+    {size name: URL} of a user's resized profile pictures (accounts/images.py).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'profile_picture_variants')
+        super().__init__(read_only=True, **kwargs)
+
+    def to_representation(self, variants):
+        storage = picture_storage()
+        request = self.context.get('request')
+        urls = {}
+        for name, path in variants.items():
+            url = storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
+class UserSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """
+    A new profile_picture is processed in the background: the response still
+    shows the old one, with profile_picture_processing set.
+    """
+    profile_picture_urls = PictureVariantsField()
+    profile_picture_processing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_urls',
+                  'profile_picture_processing', 'follower_count', 'following_count']
+        read_only_fields = ['id', 'follower_count', 'following_count']
+        field_sources = {'profile_picture_processing': ['profile_picture_pending']}
+
+    def get_profile_picture_processing(self, user):
+        return bool(user.profile_picture_pending)
+
+    def update(self, instance, validated_data):
+        changes_picture = 'profile_picture' in validated_data
+        upload = validated_data.pop('profile_picture', None)
+        user = super().update(instance, validated_data)
+        if upload is not None:
+            pipeline.accept_upload(user, upload)
+        elif changes_picture:
+            remove_picture(user)
+        return user
+
+
+class UserSummarySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """
+    Compact user representation for follower/following lists.
+    """
+    profile_picture_urls = PictureVariantsField()
+
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers']
-        read_only_fields = ['id', 'followers']
+        fields = ['id', 'username', 'profile_picture', 'profile_picture_urls', 'follower_count']
+        read_only_fields = fields
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -30,10 +86,13 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password2')
         password = validated_data.pop('password')
+        upload = validated_data.pop('profile_picture', None)
         # Use get_user_model().objects.create_user
         user = User.objects.create_user(password=password, **validated_data)
         # Create a token for the new user
         Token.objects.create(user=user)
+        if upload is not None:
+            pipeline.accept_upload(user, upload)
         return user
 
 
@@ -0,0 +1,78 @@
+# accounts/signals.py
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import graph
+from .authentication import forget_tokens
+from .models import User
+
+Follow = User.following.through
+
+
+def _existing_edges(instance, reverse, pk_set):
+    """
+    (follower_id, followee_id) pairs about to be removed, pk_set=None meaning all.
+    """
+    edges = Follow.objects.filter(**{'to_user' if reverse else 'from_user': instance})
+    if pk_set is not None:
+        edges = edges.filter(**{'from_user__in' if reverse else 'to_user__in': pk_set})
+    return list(edges.values_list('from_user_id', 'to_user_id'))
+
+
+@receiver(m2m_changed, sender=Follow)
+def sync_follow_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep follower/following counts and cached adjacency arrays in step with
+    User.following, whichever side the change was made from. Counts are
+    adjusted before removals (while the rows still exist) and after additions
+    (pk_set then only holds the ids that were actually inserted).
+    """
+    if action in ('post_remove', 'post_clear'):
+        # Drop cached arrays again now the rows are gone, in case a reader
+        # re-cached them between the pre_* signal and the DELETE
+        edges = getattr(instance, '_removed_follow_edges', [])
+        graph.invalidate(following_of=[f for f, _ in edges], followers_of=[t for _, t in edges])
+        return
+    if action == 'post_add' and pk_set:
+        edges = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+    elif action in ('pre_remove', 'pre_clear'):
+        edges = _existing_edges(instance, reverse, pk_set if action == 'pre_remove' else None)
+        instance._removed_follow_edges = edges
+    else:
+        return
+    if not edges:
+        return
+
+    delta = 1 if action == 'post_add' else -1
+    followers = [follower for follower, _ in edges]
+    followees = [followee for _, followee in edges]
+    if reverse:
+        # One followee, many followers: shift every follower's following_count
+        User.objects.filter(pk__in=followers).update(following_count=F('following_count') + delta)
+        User.objects.filter(pk=instance.pk).update(follower_count=F('follower_count') + delta * len(edges))
+    else:
+        User.objects.filter(pk=instance.pk).update(following_count=F('following_count') + delta * len(edges))
+        User.objects.filter(pk__in=followees).update(follower_count=F('follower_count') + delta)
+    graph.invalidate(following_of=followers, followers_of=followees)
+
+
+@receiver(post_save, sender=User)
+def refresh_cached_auth(sender, instance, created, **kwargs):
+    """
+    Cached token resolutions hold a copy of the user: drop them on save, and
+    revoke the user's tokens outright when the password changed.
+    """
+    if created:
+        return
+    tokens = Token.objects.filter(user=instance)
+    if instance._password is not None:
+        tokens.delete()
+    else:
+        forget_tokens(tokens.values_list('key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens([instance.key])
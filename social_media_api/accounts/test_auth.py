@@ -0,0 +1,91 @@
+# accounts/tests/test_auth.py
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from accounts.authentication import cache_key, local_cache
+from accounts.models import User
+
+
+class CachedTokenAuthTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='Pass123!')
+        res = self.client.post(reverse('login'), {'username': 'alice', 'password': 'Pass123!'})
+        self.token = res.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.url = reverse('notifications-unread-count')
+
+    def test_token_lookup_is_cached(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):  # unread count is cached too
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def shared_file_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        overrides = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'tokens': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+            },
+            AUTH_TOKEN_CACHE_ALIAS='tokens',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.shared_file_cache()
+        self.client.get(self.url)
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_revoked_token_is_rejected_by_other_processes(self):
+        self.shared_file_cache()
+        self.client.get(self.url)
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+        local_cache.clear()  # another worker, once its local entry has expired
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_process_local_cache_is_not_used_as_shared_tier(self):
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(cache_key(self.token)))
+        Token.objects.filter(key=self.token).delete()
+        # What another worker's LocMemCache would still hold after this logout
+        cache.set(cache_key(self.token), (self.user, timezone.now()))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_logout_revokes_token(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+        self.assertFalse(Token.objects.filter(key=self.token).exists())
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_change_revokes_token(self):
+        self.client.get(self.url)
+        self.user.set_password('NewPass456!')
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_profile_edits_are_not_served_stale(self):
+        self.client.get(reverse('profile'))
+        self.client.patch(reverse('profile'), {'bio': 'Hello'})
+        self.assertEqual(self.client.get(reverse('profile')).data['bio'], 'Hello')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(AUTH_TOKEN_TTL=3600)
+    def test_expired_tokens_are_rejected_and_reissued(self):
+        Token.objects.filter(key=self.token).update(created=timezone.now() - timedelta(hours=2))
+        res = self.client.get(self.url)
+        self.assertEqual((res.status_code, res.data['detail']), (401, 'Token has expired.'))
+        self.assertFalse(Token.objects.filter(key=self.token).exists())
+        res = self.client.post(reverse('login'), {'username': 'alice', 'password': 'Pass123!'})
+        self.assertNotEqual(res.data['token'], self.token)
@@ -1,8 +1,10 @@
 # posts/tests/test_feed.py
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from accounts.models import User
-from posts.models import Post
+from posts.feed import fanout_queue
+from posts.models import Post, FeedEntry
 
 class FeedTests(APITestCase):
     def setUp(self):
@@ -16,5 +18,56 @@ class FeedTests(APITestCase):
         url = reverse('feed')
         res = self.client.get(url)
         self.assertEqual(res.status_code, 200)
-        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(len(res.data['results']), 1)
         self.assertEqual(res.data['results'][0]['title'], 'T1')
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        post = Post.objects.create(author=self.bob, title='T2', content='C2')
+        self.assertTrue(FeedEntry.objects.filter(user=self.alice, post=post).exists())
+        self.assertFalse(FeedEntry.objects.filter(user=self.bob, post=post).exists())
+
+    @override_settings(FEED_FANOUT_MODE='manual')
+    def test_fan_out_waits_for_commit_and_the_queue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.bob, title='T2', content='C2')
+            self.assertEqual(fanout_queue.queued(), 0)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(fanout_queue.process_queued(), 1)
+        self.assertTrue(FeedEntry.objects.filter(user=self.alice, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_clears_feed(self):
+        carol = User.objects.create_user(username='carol', password='Pass123!')
+        Post.objects.create(author=carol, title='Old', content='C')
+        self.alice.following.add(carol)
+        titles = [p['title'] for p in self.client.get(reverse('feed')).data['results']]
+        self.assertIn('Old', titles)
+        self.alice.following.remove(carol)
+        self.assertFalse(FeedEntry.objects.filter(user=self.alice, post__author=carol).exists())
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_large_authors_are_read_on_demand(self):
+        post = Post.objects.create(author=self.bob, title='T2', content='C2')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        res = self.client.get(reverse('feed'))
+        self.assertEqual([p['title'] for p in res.data['results']], ['T2', 'T1'])
+
+    def titles(self):
+        return [p['title'] for p in self.client.get(reverse('feed')).data['results']]
+
+    def test_posts_keep_their_mode_when_the_author_crosses_the_limit(self):
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            pulled = Post.objects.create(author=self.bob, title='Pulled', content='C')
+        self.assertFalse(pulled.fanned_out)
+        Post.objects.create(author=self.bob, title='Pushed', content='C')
+        # Back under the limit: the pulled post is still read on demand
+        self.assertEqual(self.titles(), ['Pushed', 'Pulled', 'T1'])
+
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            Post.objects.create(author=self.bob, title='Pulled again', content='C')
+            self.assertEqual(self.titles(), ['Pulled again', 'Pushed', 'Pulled', 'T1'])
+            carol = User.objects.create_user(username='carol', password='Pass123!')
+            carol.following.add(self.bob)
+        # A new follower is backfilled with the pushed posts and reads the rest
+        self.client.force_authenticate(carol)
+        self.assertEqual(self.titles(), ['Pulled again', 'Pushed', 'Pulled', 'T1'])
+        self.assertEqual(FeedEntry.objects.filter(user=carol).count(), 2)
@@ -1,10 +1,16 @@
 # accounts/tests/test_follows.py
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from django.urls import reverse
+from accounts import graph
 from accounts.models import User
+from posts.models import FeedEntry, Post
 
 class FollowsTests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.alice = User.objects.create_user(username='alice', password='Pass123!')
         self.bob = User.objects.create_user(username='bob', password='Pass123!')
         self.client.force_authenticate(self.alice)
@@ -16,3 +22,61 @@ class FollowsTests(APITestCase):
         self.assertTrue(self.bob in self.alice.following.all())
         self.client.post(unfollow_url)
         self.assertFalse(self.bob in self.alice.following.all())
+
+    def test_counts_follow_every_change(self):
+        carol = User.objects.create_user(username='carol', password='Pass123!')
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        carol.following.add(self.bob)
+        self.bob.refresh_from_db()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.bob.follower_count, self.alice.following_count), (2, 1))
+        self.bob.followers.remove(self.alice, carol)
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.follower_count, 0)
+
+    def test_profile_exposes_counts_not_follower_ids(self):
+        self.bob.followers.add(self.alice)
+        self.bob.refresh_from_db()
+        self.client.force_authenticate(self.bob)
+        res = self.client.get(reverse('profile'))
+        self.assertNotIn('followers', res.data)
+        self.assertEqual(res.data['follower_count'], 1)
+
+    def test_is_following_uses_cached_adjacency(self):
+        self.assertFalse(graph.is_following(self.alice.id, self.bob.id))
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        with self.assertNumQueries(1):
+            self.assertTrue(graph.is_following(self.alice.id, self.bob.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(self.alice.id, self.bob.id))
+            self.assertFalse(graph.is_following(self.alice.id, self.alice.id))
+
+    def test_writes_check_the_follow_table_not_the_cache(self):
+        self.assertFalse(graph.is_following(self.alice.id, self.bob.id))  # cached
+        # A follow made elsewhere, e.g. by another process with its own cache
+        User.following.through.objects.create(from_user=self.alice, to_user=self.bob)
+        User.objects.filter(pk=self.alice.pk).update(following_count=1)
+        User.objects.filter(pk=self.bob.pk).update(follower_count=1)
+        self.client.post(reverse('unfollow-user', args=[self.bob.id]))
+        self.assertFalse(self.alice.following.filter(pk=self.bob.pk).exists())
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.assertTrue(self.alice.following.filter(pk=self.bob.pk).exists())
+
+    def test_fan_out_uses_cached_followers(self):
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        graph.follower_ids(self.bob.id)
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(author=self.bob, title='T', content='C')
+        self.assertFalse([q for q in queries if 'accounts_user_following' in q['sql']])
+        self.assertTrue(FeedEntry.objects.filter(user=self.alice).exists())
+
+    def test_follower_list_is_paginated(self):
+        fans = [User.objects.create_user(username=f'fan{i}', password='Pass123!') for i in range(12)]
+        self.bob.followers.add(*fans)
+        res = self.client.get(reverse('user-followers', args=[self.bob.id]))
+        self.assertEqual(len(res.data['results']), 10)
+        res = self.client.get(res.data['next'])
+        self.assertEqual([u['username'] for u in res.data['results']], ['fan1', 'fan0'])
+        res = self.client.get(reverse('user-following', args=[fans[0].id]))
+        self.assertEqual(res.data['results'][0]['username'], 'bob')
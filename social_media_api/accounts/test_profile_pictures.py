@@ -0,0 +1,128 @@
+# accounts/tests/test_profile_pictures.py
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APITestCase
+from accounts.images import pipeline
+from accounts.models import User
+
+
+def png(name='me.png', size=(300, 200), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+class ProfilePictureTests(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        self.addCleanup(shutil.rmtree, self.staging, True)
+        overrides = override_settings(MEDIA_ROOT=media, PROFILE_PICTURE_STAGING_DIR=self.staging,
+                                      PROFILE_PICTURE_SIZES={'small': 32, 'large': 128})
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.media = media
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.client.force_authenticate(self.alice)
+
+    def upload(self, **kwargs):
+        return self.client.patch(reverse('profile'), {'profile_picture': png(**kwargs)}, format='multipart')
+
+    def test_upload_stores_original_and_variants(self):
+        res = self.upload()
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(res.data['profile_picture_processing'])
+        self.assertEqual(set(res.data['profile_picture_urls']), {'small', 'large'})
+        self.assertTrue(res.data['profile_picture_urls']['small'].startswith('http://testserver/'))
+
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.profile_picture.name, 'profiles/alice/me.png')
+        for name, size in (('small', 32), ('large', 128)):
+            with Image.open(os.path.join(self.media, self.alice.profile_picture_variants[name])) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (size, size)))
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_replacing_and_removing_delete_old_files(self):
+        self.upload(name='first.png')
+        self.alice.refresh_from_db()
+        old = [self.alice.profile_picture.name, *self.alice.profile_picture_variants.values()]
+
+        self.upload(name='second.png', color='blue')
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.profile_picture.name, 'profiles/alice/second.png')
+        self.assertFalse(any(os.path.exists(os.path.join(self.media, name)) for name in old))
+
+        res = self.client.patch(reverse('profile'), {'profile_picture': ''}, format='multipart')
+        self.assertEqual((res.data['profile_picture'], res.data['profile_picture_urls']), (None, {}))
+        self.assertEqual(os.listdir(os.path.join(self.media, 'profiles', 'alice')), [])
+
+    def test_profile_edits_keep_the_picture(self):
+        self.upload()
+        self.client.patch(reverse('profile'), {'bio': 'hello'})
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.bio, self.alice.profile_picture.name), ('hello', 'profiles/alice/me.png'))
+
+    def test_stale_copies_do_not_revert_the_picture(self):
+        stale = User.objects.get(pk=self.alice.pk)
+        self.upload()
+        stale.bio = 'hello'
+        stale.save()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.bio, self.alice.profile_picture.name), ('hello', 'profiles/alice/me.png'))
+        self.assertEqual(set(self.alice.profile_picture_variants), {'small', 'large'})
+
+    def test_plain_save_of_a_new_picture_persists(self):
+        # e.g. the admin change form, which doesn't go through the pipeline
+        self.upload(name='first.png')
+        self.alice.refresh_from_db()
+        old = [self.alice.profile_picture.name, *self.alice.profile_picture_variants.values()]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.profile_picture = SimpleUploadedFile('admin.png', png().read())
+            self.alice.save()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.profile_picture.name, self.alice.profile_picture_variants),
+                         ('profiles/alice/admin.png', {}))
+        self.assertEqual(os.listdir(os.path.join(self.media, 'profiles', 'alice')), ['admin.png'])
+        self.assertFalse(any(os.path.exists(os.path.join(self.media, name)) for name in old))
+
+    def test_invalid_image_is_rejected(self):
+        bogus = io.BytesIO(b'not an image')
+        bogus.name = 'me.png'
+        res = self.client.patch(reverse('profile'), {'profile_picture': bogus}, format='multipart')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(os.listdir(self.staging), [])
+
+    @override_settings(PROFILE_PICTURE_PROCESSING_MODE='manual')
+    def test_background_processing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.upload()
+        self.assertTrue(res.data['profile_picture_processing'])
+        self.assertIsNone(res.data['profile_picture'])
+        self.assertEqual(pipeline.queued(), 1)
+
+        self.assertEqual(pipeline.process_queued(), 1)
+        res = self.client.get(reverse('profile'))
+        self.assertFalse(res.data['profile_picture_processing'])
+        self.assertEqual(set(res.data['profile_picture_urls']), {'small', 'large'})
+
+    @override_settings(PROFILE_PICTURE_PROCESSING_MODE='manual')
+    def test_newer_upload_supersedes_queued_one_and_command_catches_up(self):
+        self.upload(name='first.png')
+        self.upload(name='second.png')
+        call_command('process_profile_pictures', stdout=io.StringIO())
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.profile_picture.name, 'profiles/alice/second.png')
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media, 'profiles', 'alice'))),
+                         ['second.png', 'second_large.webp', 'second_small.webp'])
+        self.assertEqual(os.listdir(self.staging), [])
@@ -1,12 +1,15 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
-from .views import FollowUserView, UnfollowUserView
+from .views import RegisterView, LoginView, LogoutView, ProfileView
+from .views import FollowUserView, UnfollowUserView, FollowerListView, FollowingListView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', ProfileView.as_view(), name='profile'),
       path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('users/<int:user_id>/followers/', FollowerListView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
     # existing: register, login, profile
 ]
@@ -5,10 +5,14 @@ from rest_framework import status, permissions, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveUpdateAPIView
-from rest_framework.authtoken.models import Token
 
+from notifications.dispatch import notify
+from social_media_api.db_router import pin_token
+from social_media_api.sparse_fields import SparseFieldsMixin
+from . import graph
+from .authentication import issue_token
 from .models import User as CustomUser   # alias to satisfy checker
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
+from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, UserSummarySerializer
 
 
 class RegisterView(generics.GenericAPIView):
@@ -18,13 +22,17 @@ class RegisterView(generics.GenericAPIView):
     """
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    # A stale Authorization header must not block getting a new token
+    authentication_classes = []
     queryset = CustomUser.objects.all()  # explicit queryset for checker
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
+        # The client's next request may be routed to a replica without this user yet
+        pin_token(token.key)
         return Response(
             {
                 'token': token.key,
@@ -40,12 +48,15 @@ class LoginView(APIView):
     Validates credentials, returns existing or new auth token, and user data.
     """
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
+        # The client's next request may be routed to a replica without this user yet
+        pin_token(token.key)
         return Response(
             {
                 'token': token.key,
@@ -55,16 +66,32 @@ class LoginView(APIView):
         )
 
 
-class ProfileView(RetrieveUpdateAPIView):
+class LogoutView(APIView):
+    """
+    Revoke the token used for this request.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.auth is not None:
+            request.auth.delete()
+        return Response({'detail': 'Logged out.'}, status=status.HTTP_200_OK)
+
+
+class ProfileView(SparseFieldsMixin, RetrieveUpdateAPIView):
     """
     Retrieve or update the authenticated user's profile.
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = CustomUser.objects.all()  # satisfy checker
+    query_budget = {'get': 2}
+    # Read right after register/login and after profile edits
+    use_replica = False
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the token cache; read the current row
+        return get_object_or_404(self.sparse_queryset(CustomUser.objects.all()), pk=self.request.user.pk)
 
 
 class FollowUserView(APIView):
@@ -72,6 +99,7 @@ class FollowUserView(APIView):
     Allow an authenticated user to follow another user.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follow'
 
     def post(self, request, user_id):
         target = get_object_or_404(CustomUser, id=user_id)
@@ -80,7 +108,8 @@ class FollowUserView(APIView):
                 {'detail': 'You cannot follow yourself.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        request.user.following.add(target)
+        if graph.follow(request.user, target):
+            notify(target.pk, request.user.pk, 'followed')
         return Response(
             {'detail': f'Now following {target.username}.'},
             status=status.HTTP_200_OK
@@ -92,6 +121,7 @@ class UnfollowUserView(APIView):
     Allow an authenticated user to unfollow another user.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follow'
 
     def post(self, request, user_id):
         target = get_object_or_404(CustomUser, id=user_id)
@@ -100,8 +130,32 @@ class UnfollowUserView(APIView):
                 {'detail': 'You cannot unfollow yourself.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        request.user.following.remove(target)
+        graph.unfollow(request.user, target)
         return Response(
             {'detail': f'Unfollowed {target.username}.'},
             status=status.HTTP_200_OK
         )
+
+
+class FollowerListView(SparseFieldsMixin, generics.ListAPIView):
+    """
+    Paginated list of the users following `user_id`.
+    """
+    serializer_class = UserSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(following__id=self.kwargs['user_id']).order_by('-id')
+
+
+class FollowingListView(SparseFieldsMixin, generics.ListAPIView):
+    """
+    Paginated list of the users `user_id` follows.
+    """
+    serializer_class = UserSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(followers__id=self.kwargs['user_id']).order_by('-id')
@@ -6,6 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    # The test suite has settings of its own (social_media_api/test_settings.py)
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.test_settings')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
     try:
         from django.core.management import execute_from_command_line
@@ -0,0 +1,103 @@
+# notifications/async_views.py
+"""
+Async notification list and server-sent-events stream for ASGI mode
+(see social_media_api/async_api.py).
+"""
+import asyncio
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from social_media_api.async_api import async_api_view, json_response, release_connections
+from social_media_api.pagination import KeysetPagination
+from social_media_api.sparse_fields import selected_fields, shape_queryset
+from .broker import get_broker
+from .serializers import NotificationSerializer
+from .views import inbox_queryset
+
+# Most missed notifications replayed on reconnect; past this the client resyncs
+REPLAY_LIMIT = 100
+RESYNC_EVENT = 'event: resync\ndata: {}\n\n'
+
+
+@async_api_view
+async def notification_list(request):
+    fields = selected_fields(NotificationSerializer, request.GET)
+    queryset = inbox_queryset(request.user, request.GET, targets=fields is None or 'target' in fields)
+    paginator = KeysetPagination()
+    page = paginator.page_queryset(shape_queryset(queryset, NotificationSerializer, fields), request)
+    rows = paginator.take_page([notification async for notification in page])
+    context = {'request': request, 'sparse_fields': fields}
+    data = NotificationSerializer(rows, many=True, context=context).data
+    return json_response(paginator.get_paginated_data(data), headers=paginator.get_paginated_headers())
+
+
+def sse_event(payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'id: {payload["timestamp"]}\nevent: notification\ndata: {data}\n\n'
+
+
+def parse_event_id(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@async_api_view
+async def notification_stream(request):
+    """
+    text/event-stream of the user's notifications as they are written, one
+    `notification` event each, serialized as in the list endpoint. Clients
+    reconnecting with Last-Event-ID first get what they missed, up to
+    REPLAY_LIMIT of them; a `resync` event means events were dropped (or more
+    were missed than that) and the list should be refetched. A
+    comment line is sent every NOTIFICATION_STREAM_HEARTBEAT seconds when idle.
+
+    The stream reads no rows after connecting: events come from the broker.
+    """
+    subscription = get_broker().subscribe(request.user.pk)
+    since = parse_event_id(request.headers.get('Last-Event-ID'))
+    try:
+        missed, gap = [], False
+        if since is not None:
+            missed = [notification async for notification in
+                      inbox_queryset(request.user, {}).filter(timestamp__gt=since).order_by('timestamp')[:REPLAY_LIMIT + 1]]
+            # Replaying only the oldest would leave a hole before the live events
+            gap = len(missed) > REPLAY_LIMIT
+            missed = [] if gap else NotificationSerializer(missed, many=True).data
+        # Don't hold a database connection for the life of the stream
+        await release_connections()
+    except BaseException:
+        subscription.close()
+        raise
+
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+
+    async def events():
+        try:
+            yield 'retry: 3000\n\n'
+            if gap:
+                yield RESYNC_EVENT
+            for payload in missed:
+                yield sse_event(payload)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield RESYNC_EVENT
+                yield sse_event(payload)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # tell nginx not to buffer the stream
+    return response
@@ -0,0 +1,127 @@
+# notifications/broker.py
+"""
+Pub/sub for pushing new notifications to connected clients.
+
+The dispatcher publishes each written notification to its recipient's
+channel (see notifications/dispatch.py); the SSE stream view
+(notifications/async_views.py) subscribes to the requesting user's channel.
+
+NOTIFICATION_BROKER names the Broker class. LocalBroker keeps subscribers in
+process, which is enough for a single ASGI worker and for tests; deployments
+with several workers need a Broker backed by a shared server.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class Broker:
+    """
+    Interface for notification brokers.
+    """
+
+    def subscribers(self, recipient_ids):
+        """
+        The subset of `recipient_ids` that may have listeners, so publishers
+        can skip serializing for nobody. Brokers that can't tell return them all.
+        """
+        return set(recipient_ids)
+
+    def publish(self, recipient_id, payload):
+        """
+        Deliver a JSON-serializable payload to the recipient's subscribers.
+        Called from any thread, never blocks.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, recipient_id):
+        """
+        A Subscription for the recipient, to be used from the event loop.
+        """
+        raise NotImplementedError
+
+
+class Subscription:
+    """
+    Queue of payloads for one connected client. `lagged` is set when the
+    client fell behind and payloads were dropped.
+    """
+
+    def __init__(self, broker, recipient_id, maxsize):
+        self.broker = broker
+        self.recipient_id = recipient_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def put(self, payload):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(Broker):
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribers(self, recipient_ids):
+        with self._lock:
+            return {recipient_id for recipient_id in recipient_ids if self._channels.get(recipient_id)}
+
+    def publish(self, recipient_id, payload):
+        with self._lock:
+            subscriptions = list(self._channels.get(recipient_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, payload)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+    def subscribe(self, recipient_id):
+        subscription = Subscription(self, recipient_id, getattr(settings, 'NOTIFICATION_STREAM_QUEUE_SIZE', 100))
+        with self._lock:
+            self._channels[recipient_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            channel = self._channels.get(subscription.recipient_id)
+            if channel is not None:
+                channel.discard(subscription)
+                if not channel:
+                    del self._channels[subscription.recipient_id]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', 'notifications.broker.LocalBroker'))()
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'NOTIFICATION_BROKER':
+        _broker = None
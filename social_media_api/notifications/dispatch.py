@@ -0,0 +1,215 @@
+# notifications/dispatch.py
+"""
+Buffered notification delivery.
+
+Views call `notify(...)`, which only appends an event to an in-memory buffer.
+A background worker flushes the buffer every NOTIFICATION_FLUSH_INTERVAL
+seconds (or once NOTIFICATION_BATCH_SIZE events are waiting) and writes it
+with one bulk_create. Events for the same recipient, verb and target are
+coalesced: fifty likes on a post become one unread "liked" row with
+actor_count=50 rather than fifty rows. The row keeps the ids of the actors it
+counts, so one user liking, unliking and liking again is counted once. Written rows are then published to
+recipients with an open stream (notifications/broker.py).
+
+NOTIFICATION_DISPATCH_MODE:
+    'thread'  flush from a background worker thread (default)
+    'inline'  flush immediately, inside the caller (used by the test suite)
+    'manual'  only flush when dispatcher.flush() is called
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .broker import get_broker
+from .models import Notification, resolve_targets
+from .serializers import NotificationSerializer
+from .utils import invalidate_unread_counts
+
+logger = logging.getLogger(__name__)
+
+NotificationEvent = namedtuple('NotificationEvent', 'recipient_id actor_id verb target_model target_id')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def coalesce(events):
+    """
+    Group events by (recipient, verb, target) for verbs listed in
+    NOTIFICATION_COALESCE_VERBS. Returns {key: [actor ids, oldest first]};
+    events for other verbs each get a key of their own.
+    """
+    coalesced = set(_setting('NOTIFICATION_COALESCE_VERBS', ()))
+    groups = OrderedDict()
+    for index, event in enumerate(events):
+        content_type_id = None
+        if event.target_model is not None:
+            content_type_id = ContentType.objects.get_for_model(event.target_model).pk
+        key = (event.recipient_id, event.verb, content_type_id, event.target_id)
+        if event.verb not in coalesced:
+            key += (index,)
+        actors = groups.setdefault(key, [])
+        if event.actor_id not in actors:
+            actors.append(event.actor_id)
+    return groups
+
+
+def write_events(events):
+    """
+    Persist a batch of events: merge into matching unread rows, bulk-insert
+    the rest. Returns the notifications created or updated.
+    """
+    groups = coalesce(events)
+    now = timezone.now()
+
+    # Unread rows that coalescable groups can be folded into, in one query
+    lookup = Q()
+    for key in groups:
+        if len(key) == 4:
+            recipient_id, verb, content_type_id, target_id = key
+            lookup |= Q(recipient_id=recipient_id, verb=verb,
+                        target_content_type_id=content_type_id, target_object_id=target_id)
+    existing = {}
+    if lookup:
+        for notification in Notification.objects.filter(lookup, unread=True).order_by('timestamp'):
+            existing[(notification.recipient_id, notification.verb,
+                      notification.target_content_type_id, notification.target_object_id)] = notification
+
+    to_create, to_update = [], []
+    for key, actor_ids in groups.items():
+        recipient_id, verb, content_type_id, target_id = key[:4]
+        notification = existing.get(key)
+        if notification is not None:
+            # Rows written before actor_ids existed only know their last actor
+            counted = notification.actor_ids or [notification.actor_id]
+            new_actor_ids = [actor_id for actor_id in actor_ids if actor_id not in counted]
+            notification.actor_ids = counted + new_actor_ids
+            notification.actor_count += len(new_actor_ids)
+            notification.actor_id = actor_ids[-1]
+            notification.timestamp = now
+            to_update.append(notification)
+        else:
+            to_create.append(Notification(
+                recipient_id=recipient_id,
+                actor_id=actor_ids[-1],
+                actor_count=len(actor_ids),
+                actor_ids=actor_ids,
+                verb=verb,
+                target_content_type_id=content_type_id,
+                target_object_id=target_id,
+            ))
+    if to_update:
+        Notification.objects.bulk_update(to_update, ['actor', 'actor_count', 'actor_ids', 'timestamp'])
+    if to_create:
+        Notification.objects.bulk_create(to_create, batch_size=_setting('NOTIFICATION_BATCH_SIZE', 500))
+    invalidate_unread_counts(key[0] for key in groups)
+    notifications = to_update + to_create
+    try:
+        publish(notifications)
+    except Exception:
+        # Streaming is best effort; the rows are written either way
+        logger.exception('Failed to publish notifications')
+    return notifications
+
+
+def publish(notifications):
+    """
+    Push written notifications to recipients with an open stream, serialized
+    as the list endpoint would. Costs nothing when nobody is listening.
+    """
+    broker = get_broker()
+    listening = broker.subscribers({notification.recipient_id for notification in notifications})
+    notifications = [notification for notification in notifications if notification.recipient_id in listening]
+    if not notifications:
+        return
+    actors = get_user_model().objects.in_bulk({notification.actor_id for notification in notifications})
+    for notification in notifications:
+        notification.actor = actors.get(notification.actor_id)
+    resolve_targets(notifications)
+    for notification in notifications:
+        broker.publish(notification.recipient_id, dict(NotificationSerializer(notification).data))
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    @property
+    def mode(self):
+        return _setting('NOTIFICATION_DISPATCH_MODE', 'thread')
+
+    def notify(self, recipient_id, actor_id, verb, target=None):
+        """
+        Queue a notification. Nothing is written until the next flush.
+        """
+        if recipient_id == actor_id:
+            return
+        event = NotificationEvent(
+            recipient_id=recipient_id,
+            actor_id=actor_id,
+            verb=verb,
+            target_model=target.__class__ if target is not None else None,
+            target_id=target.pk if target is not None else None,
+        )
+        with self._lock:
+            self._buffer.append(event)
+            pending = len(self._buffer)
+
+        mode = self.mode
+        if mode == 'inline':
+            self.flush()
+        elif mode == 'thread':
+            self._ensure_worker()
+            if pending >= _setting('NOTIFICATION_BATCH_SIZE', 500):
+                self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """
+        Write everything buffered so far. Returns the number of events written.
+        """
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if events:
+            write_events(events)
+        return len(events)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='notification-dispatch', daemon=True)
+            self._worker.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_setting('NOTIFICATION_FLUSH_INTERVAL', 0.5))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to write notification batch')
+            finally:
+                close_old_connections()
+
+
+dispatcher = NotificationDispatcher()
+notify = dispatcher.notify
@@ -1,10 +1,54 @@
 # Create your models here.
 # notifications/models.py
+from collections import defaultdict
+
 from django.db import models
+from django.db.models.query import ModelIterable
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+
+def resolve_targets(notifications):
+    """
+    Load the generic `target` of many notifications at once: rows are grouped
+    by content type and each group is fetched with a single in_bulk() call,
+    so a page costs one query per target type instead of one per row.
+    Targets that no longer exist resolve to None without a further query.
+    """
+    wanted = defaultdict(set)
+    for notification in notifications:
+        if notification.target_content_type_id and notification.target_object_id is not None:
+            wanted[notification.target_content_type_id].add(notification.target_object_id)
+
+    found = {}
+    for content_type_id, object_ids in wanted.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        found[content_type_id] = model._default_manager.in_bulk(object_ids) if model else {}
+
+    target_field = Notification._meta.get_field('target')
+    for notification in notifications:
+        if notification.target_content_type_id in found:
+            objects = found[notification.target_content_type_id]
+            target_field.set_cached_value(notification, objects.get(notification.target_object_id))
+    return notifications
+
+
+class TargetResolvingIterable(ModelIterable):
+    def __iter__(self):
+        yield from resolve_targets(list(super().__iter__()))
+
+
+class NotificationQuerySet(models.QuerySet):
+    def with_targets(self):
+        """
+        Resolve `target` for every fetched row in one query per content type.
+        """
+        clone = self._chain()
+        clone._iterable_class = TargetResolvingIterable
+        return clone
+
+
 class Notification(models.Model):
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -18,6 +62,10 @@ class Notification(models.Model):
         related_name='actions'
     )
     verb = models.CharField(max_length=64)  # e.g., 'followed', 'liked', 'commented'
+    # Coalesced rows: "actor and N-1 others liked your post" (see notifications/dispatch.py)
+    actor_count = models.PositiveIntegerField(default=1)
+    # The distinct actors counted in actor_count, so repeats don't count twice
+    actor_ids = models.JSONField(default=list, blank=True)
     # Generic target: can be a Post, Comment, or User, etc.
     target_content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True)
     target_object_id = models.PositiveIntegerField(null=True)
@@ -26,8 +74,22 @@ class Notification(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     unread = models.BooleanField(default=True)
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Inbox listing: WHERE recipient_id = ? ORDER BY timestamp DESC
+            models.Index(fields=['recipient', '-timestamp'], name='notif_recipient_ts_idx'),
+            # Unread listing, badge count and mark-read only touch unread rows
+            models.Index(
+                fields=['recipient', '-timestamp'],
+                condition=models.Q(unread=True),
+                name='notif_unread_recipient_ts_idx',
+            ),
+        ]
 
     def __str__(self):
+        if self.actor_count > 1:
+            return f'{self.actor} and {self.actor_count - 1} others {self.verb} {self.target} → {self.recipient}'
         return f'{self.actor} {self.verb} {self.target} → {self.recipient}'
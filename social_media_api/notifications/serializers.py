@@ -1,13 +1,38 @@
 # notifications/serializers.py
 from rest_framework import serializers
+from social_media_api.sparse_fields import SparseFieldsSerializerMixin
 from .models import Notification
 
-class NotificationSerializer(serializers.ModelSerializer):
+# Embedded target summaries by model name. Each reads only the target row
+# itself, so resolved targets (Notification.objects.with_targets()) cost no
+# extra queries.
+TARGET_SUMMARIES = {
+    'post': lambda post: {'title': post.title},
+    'comment': lambda comment: {'post': comment.post_id, 'excerpt': comment.content[:80]},
+    'user': lambda user: {'username': user.username},
+}
+
+
+class NotificationSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     actor_username = serializers.ReadOnlyField(source='actor.username')
+    target = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'actor', 'actor_username', 'verb',
-                  'target_content_type', 'target_object_id', 'timestamp', 'unread']
-        read_only_fields = ['id', 'recipient', 'actor', 'verb', 'target_content_type',
+        fields = ['id', 'recipient', 'actor', 'actor_username', 'actor_count', 'verb',
+                  'target_content_type', 'target_object_id', 'target', 'timestamp', 'unread']
+        read_only_fields = ['id', 'recipient', 'actor', 'actor_count', 'verb', 'target_content_type',
                             'target_object_id', 'timestamp', 'unread']
+        # What get_target() reads (social_media_api/sparse_fields.py)
+        field_sources = {'target': ['target_content_type', 'target_object_id']}
+
+    def get_target(self, obj):
+        target = obj.target
+        if target is None:
+            return None
+        model_name = target._meta.model_name
+        summary = {'type': model_name, 'id': target.pk}
+        summarize = TARGET_SUMMARIES.get(model_name)
+        if summarize is not None:
+            summary.update(summarize(target))
+        return summary
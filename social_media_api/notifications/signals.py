@@ -0,0 +1,15 @@
+# notifications/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .utils import invalidate_unread_counts
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def invalidate_unread_count(sender, instance, **kwargs):
+    """
+    Keep cached badge counts in step with rows saved or deleted one at a time
+    (admin, cascaded deletes, the shell).
+    """
+    invalidate_unread_counts([instance.recipient_id])
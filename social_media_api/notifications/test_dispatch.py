@@ -0,0 +1,64 @@
+# notifications/tests/test_dispatch.py
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from accounts.models import User
+from posts.models import Post
+from notifications.dispatch import NotificationDispatcher
+from notifications.models import Notification
+
+
+@override_settings(NOTIFICATION_DISPATCH_MODE='manual')
+class NotificationDispatchTests(TestCase):
+    def setUp(self):
+        self.dispatcher = NotificationDispatcher()
+        self.author = User.objects.create_user(username='author', password='Pass123!')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='Pass123!') for i in range(5)]
+        self.post = Post.objects.create(author=self.author, title='T', content='C')
+        ContentType.objects.get_for_model(Post)  # warm the content type cache
+
+    def test_nothing_is_written_until_flush(self):
+        self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'liked', target=self.post)
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(self.dispatcher.flush(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_burst_of_likes_is_coalesced_into_one_row(self):
+        for fan in self.fans:
+            self.dispatcher.notify(self.author.pk, fan.pk, 'liked', target=self.post)
+        with self.assertNumQueries(2):  # one lookup of unread rows, one insert
+            self.dispatcher.flush()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertEqual(notification.target, self.post)
+
+    def test_later_events_fold_into_unread_row(self):
+        self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'liked', target=self.post)
+        self.dispatcher.flush()
+        self.dispatcher.notify(self.author.pk, self.fans[1].pk, 'liked', target=self.post)
+        self.dispatcher.flush()
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+
+        Notification.objects.update(unread=False)
+        self.dispatcher.notify(self.author.pk, self.fans[2].pk, 'liked', target=self.post)
+        self.dispatcher.flush()
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_repeat_actors_are_counted_once(self):
+        for _ in range(3):  # like, unlike, like again, in separate batches
+            self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'liked', target=self.post)
+            self.dispatcher.flush()
+        self.dispatcher.notify(self.author.pk, self.fans[1].pk, 'liked', target=self.post)
+        self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'liked', target=self.post)
+        self.dispatcher.flush()
+        notification = Notification.objects.get()
+        self.assertEqual((notification.actor_count, notification.actor), (2, self.fans[0]))
+        self.assertEqual(notification.actor_ids, [self.fans[0].pk, self.fans[1].pk])
+
+    def test_comments_are_not_coalesced_and_self_actions_are_dropped(self):
+        self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'commented', target=self.post)
+        self.dispatcher.notify(self.author.pk, self.fans[0].pk, 'commented', target=self.post)
+        self.dispatcher.notify(self.author.pk, self.author.pk, 'liked', target=self.post)
+        self.dispatcher.flush()
+        self.assertEqual(Notification.objects.filter(verb='commented').count(), 2)
+        self.assertFalse(Notification.objects.filter(verb='liked').exists())
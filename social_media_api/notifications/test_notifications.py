@@ -1,11 +1,14 @@
 # notifications/tests/test_notifications.py
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from accounts.models import User
 from notifications.models import Notification
+from posts.models import Post, Comment
 
 class NotificationsTests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.alice = User.objects.create_user(username='alice', password='Pass123!')
         self.client.force_authenticate(self.alice)
         Notification.objects.create(recipient=self.alice, actor=None, verb='followed')
@@ -14,4 +17,51 @@ class NotificationsTests(APITestCase):
         url = reverse('notifications')
         res = self.client.get(url)
         self.assertEqual(res.status_code, 200)
-        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_unread_count_is_cached_and_reset_by_mark_read(self):
+        url = reverse('notifications-unread-count')
+        self.assertEqual(self.client.get(url).data, {'unread': 1})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['unread'], 1)
+        self.client.put(reverse('notifications-mark-read'))
+        # Recounted rather than assumed 0, so concurrent inserts are not lost
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data['unread'], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['unread'], 0)
+
+    def test_new_notifications_invalidate_unread_count(self):
+        url = reverse('notifications-unread-count')
+        self.client.get(url)
+        post = Post.objects.create(author=self.alice, title='T', content='C')
+        bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.client.force_authenticate(bob)
+        self.client.post(reverse('post-like', args=[post.id]))
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(url).data['unread'], 2)
+
+    def test_direct_writes_invalidate_unread_count(self):
+        url = reverse('notifications-unread-count')
+        self.client.get(url)
+        notification = Notification.objects.create(recipient=self.alice, verb='followed')
+        self.assertEqual(self.client.get(url).data['unread'], 2)
+        notification.delete()
+        self.assertEqual(self.client.get(url).data['unread'], 1)
+
+    def test_targets_are_resolved_in_bulk(self):
+        posts = [Post.objects.create(author=self.alice, title=f'T{i}', content='C') for i in range(4)]
+        comment = Comment.objects.create(post=posts[0], author=self.alice, content='Nice post')
+        for post in posts:
+            Notification.objects.create(recipient=self.alice, verb='liked', target=post)
+        Notification.objects.create(recipient=self.alice, verb='commented', target=comment)
+        posts[3].delete()
+        # page + one in_bulk per target type (content types are cached)
+        self.client.get(reverse('notifications'))
+        with self.assertNumQueries(3):
+            res = self.client.get(reverse('notifications'))
+        targets = [n['target'] for n in res.data['results']]
+        self.assertEqual(targets[0], {'type': 'comment', 'id': comment.id, 'post': posts[0].id, 'excerpt': 'Nice post'})
+        self.assertIsNone(targets[1])
+        self.assertEqual(targets[2], {'type': 'post', 'id': posts[2].id, 'title': 'T2'})
+        self.assertIsNone(targets[-1])
@@ -0,0 +1,111 @@
+# notifications/tests/test_stream.py
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from accounts.authentication import local_cache
+from accounts.models import User
+from notifications.broker import Broker
+from notifications.dispatch import notify
+from notifications.models import Notification
+from posts.models import Post
+
+
+class RecordingBroker(Broker):
+    """
+    Stand-in broker: everybody listens, payloads are kept in a list.
+    """
+    published = []
+
+    def publish(self, recipient_id, payload):
+        self.published.append((recipient_id, payload))
+
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines())
+    return fields['event'], json.loads(fields['data'])
+
+
+@override_settings(ROOT_URLCONF='social_media_api.asgi_urls', NOTIFICATION_STREAM_HEARTBEAT=0.05)
+class NotificationStreamTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.post = Post.objects.create(author=self.alice, title='Hello', content='C')
+        self.auth = {'Authorization': f'Token {Token.objects.create(user=self.alice).key}'}
+
+    async def open_stream(self, **headers):
+        res = await self.async_client.get('/api/notifications/stream/', headers={**self.auth, **headers})
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        stream = aiter(res.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        return stream
+
+    async def next_event(self, stream):
+        while True:
+            chunk = await asyncio.wait_for(anext(stream), 2)
+            if not chunk.startswith(b':'):
+                return parse_event(chunk)
+
+    async def test_pushes_new_notifications(self):
+        stream = await self.open_stream()
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'liked', target=self.post)
+        event, payload = await self.next_event(stream)
+        self.assertEqual(event, 'notification')
+        self.assertEqual((payload['verb'], payload['actor_username']), ('liked', 'bob'))
+        self.assertEqual(payload['target'], {'type': 'post', 'id': self.post.pk, 'title': 'Hello'})
+        await stream.aclose()
+
+    async def test_sends_keep_alives_when_idle(self):
+        stream = await self.open_stream()
+        self.assertEqual(await asyncio.wait_for(anext(stream), 2), b': keep-alive\n\n')
+        await stream.aclose()
+
+    async def test_replays_missed_events(self):
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'followed')
+        first = await Notification.objects.aget()
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'commented', target=self.post)
+        since = first.timestamp.isoformat()
+        stream = await self.open_stream(**{'Last-Event-ID': since})
+        event, payload = await self.next_event(stream)
+        self.assertEqual(payload['verb'], 'commented')
+        await stream.aclose()
+
+    async def test_resyncs_when_too_many_events_were_missed(self):
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'followed')
+        first = await Notification.objects.aget()
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'commented', target=self.post)
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'liked', target=self.post)
+        with mock.patch('notifications.async_views.REPLAY_LIMIT', 1):
+            stream = await self.open_stream(**{'Last-Event-ID': first.timestamp.isoformat()})
+        self.assertEqual(await self.next_event(stream), ('resync', {}))
+        self.assertEqual(await asyncio.wait_for(anext(stream), 2), b': keep-alive\n\n')
+        await stream.aclose()
+
+    async def test_requires_token(self):
+        res = await self.async_client.get('/api/notifications/stream/')
+        self.assertEqual(res.status_code, 401)
+
+
+class PublishTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        RecordingBroker.published = []
+
+    @override_settings(NOTIFICATION_BROKER='notifications.test_stream.RecordingBroker')
+    def test_dispatcher_publishes_through_configured_broker(self):
+        notify(self.alice.pk, self.bob.pk, 'followed')
+        self.assertEqual([(r, p['verb']) for r, p in RecordingBroker.published], [(self.alice.pk, 'followed')])
+
+    def test_no_listeners_costs_no_queries(self):
+        notify(self.alice.pk, self.bob.pk, 'followed')  # warm the ContentType cache
+        with self.assertNumQueries(2):  # unread lookup + insert; nothing for publishing
+            notify(self.bob.pk, self.alice.pk, 'followed')
@@ -1,8 +1,9 @@
 # notifications/urls.py
 from django.urls import path
-from .views import NotificationListView, NotificationMarkReadView
+from .views import NotificationListView, NotificationMarkReadView, UnreadCountView
 
 urlpatterns = [
     path('notifications/', NotificationListView.as_view(), name='notifications'),
     path('notifications/mark-read/', NotificationMarkReadView.as_view(), name='notifications-mark-read'),
+    path('notifications/unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
 ]
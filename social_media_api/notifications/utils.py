@@ -1,8 +1,41 @@
 # notifications/utils.py
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from .models import Notification
 
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """
+    Number of unread notifications for a user, served from cache.
+    A miss is a COUNT over the partial unread index.
+
+    Saves and deletes of single rows invalidate it (notifications/signals.py);
+    bulk writes (dispatch, mark-read) invalidate it themselves. The default
+    cache must be shared between processes, or the others keep serving
+    their copy until NOTIFICATION_UNREAD_CACHE_TIMEOUT.
+    """
+    key = unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, unread=True).count()
+        cache.set(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300))
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([unread_cache_key(user_id) for user_id in set(user_ids)])
+
+
 def create_notification(recipient, actor, verb, target=None):
+    """
+    Write a single notification immediately. Request handlers should use
+    notifications.dispatch.notify, which batches and coalesces writes.
+    """
     notification = Notification(
         recipient=recipient,
         actor=actor,
@@ -1,18 +1,35 @@
 # Create your views here.
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Notification
 from .serializers import NotificationSerializer
+from .utils import invalidate_unread_counts, unread_count
+from social_media_api.sparse_fields import SparseFieldsMixin
 
-class NotificationListView(generics.ListAPIView):
+def inbox_queryset(user, params, targets=True):
+    """
+    A user's notifications with actors and (unless targets=False) targets resolved;
+    ?unread=1 keeps unread ones only.
+    """
+    # actor_ids is only read when coalescing new events
+    qs = Notification.objects.select_related('actor').defer('actor_ids').filter(recipient=user)
+    if targets:
+        qs = qs.with_targets()
+    show_unread = params.get('unread', None)
+    if show_unread in ('1', 'true', 'True'):
+        qs = qs.filter(unread=True)
+    return qs
+
+
+class NotificationListView(SparseFieldsMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # token + page + one in_bulk per target type (posts, comments, users)
+    query_budget = 5
 
     def get_queryset(self):
-        qs = Notification.objects.select_related('actor').filter(recipient=self.request.user)
-        show_unread = self.request.query_params.get('unread', None)
-        if show_unread in ('1', 'true', 'True'):
-            qs = qs.filter(unread=True)
-        return qs
+        return inbox_queryset(self.request.user, self.request.query_params, targets=self.wants_field('target'))
 
 class NotificationMarkReadView(generics.UpdateAPIView):
     serializer_class = NotificationSerializer
@@ -23,3 +40,20 @@ class NotificationMarkReadView(generics.UpdateAPIView):
         Notification.objects.filter(recipient=self.request.user, unread=True).update(unread=False)
         # Return latest notification just for response context (optional pattern)
         return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp').first()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # After the save, whose signal drops the cached count. Dropped rather
+        # than set to 0: a notification stored since the bulk update is unread
+        invalidate_unread_counts([self.request.user.pk])
+
+
+class UnreadCountView(APIView):
+    """
+    Badge count of unread notifications, cheap enough to poll.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+
+    def get(self, request):
+        return Response({'unread': unread_count(request.user.pk)})
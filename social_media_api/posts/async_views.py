@@ -0,0 +1,87 @@
+# posts/async_views.py
+"""
+Async feed and post detail for ASGI mode (see social_media_api/async_api.py).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified
+from rest_framework.exceptions import NotFound
+
+from social_media_api.async_api import async_api_view, gather_queries, json_response
+from social_media_api.db_router import primary_only
+from social_media_api.pagination import KeysetPagination, estimate_count
+from social_media_api.sparse_fields import selected_fields, shape_queryset
+from .caching import cache_variant, caching_enabled, is_not_modified, response_cache, response_etag, response_key, store_response
+from .feed import feed_queryset
+from .models import Like, Post
+from .previews import comment_previews
+from .serializers import ExpandedPostSerializer, PostSerializer
+from .views import PostViewSet, wants_expanded, wants_included
+
+post_detail_writes = PostViewSet.as_view({'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+
+
+@async_api_view
+async def feed(request):
+    """
+    The home feed. The page of posts and the viewer's likes among them are
+    independent queries and run concurrently, as do the comment previews
+    with ?include=comments_preview; like/comment counts are columns of the
+    post rows.
+    """
+    fields = selected_fields(ExpandedPostSerializer, request.GET)
+    queryset = await sync_to_async(feed_queryset)(request.user)
+    queryset = shape_queryset(queryset, ExpandedPostSerializer, fields)
+    paginator = KeysetPagination()
+    if paginator.wants_approximate_count(request):
+        paginator.approximate_count = await sync_to_async(estimate_count)(queryset)
+    page = paginator.page_queryset(queryset, request)
+    liked = Like.objects.filter(user=request.user, post__in=page.values('pk')).values_list('post_id', flat=True)
+    queries = [lambda: list(page), lambda: set(liked)]
+    if wants_included(request.GET, 'comments_preview'):
+        queries.append(lambda: comment_previews(page.values('pk')))
+
+    rows, liked_ids, *previews = await gather_queries(*queries)
+    rows = paginator.take_page(rows)
+    context = {'request': request, 'liked_post_ids': liked_ids, 'sparse_fields': fields}
+    if previews:
+        context['comment_previews'] = previews[0]
+    data = ExpandedPostSerializer(rows, many=True, context=context).data
+    return json_response(paginator.get_paginated_data(data), headers=paginator.get_paginated_headers())
+
+
+@primary_only
+@async_api_view(authenticated=False, fallback=post_detail_writes)
+async def post_detail(request, pk):
+    """
+    Shares PostViewSet.retrieve's response cache entries and ETags (posts/caching.py),
+    so it reads from the primary like that view does.
+    """
+    if not caching_enabled():
+        return json_response(await post_data(request, pk))
+    key = await sync_to_async(response_key)(request, cache_variant(request.user if request.auth else None), pk)
+    etag = response_etag(key)
+    if is_not_modified(request, etag):
+        return HttpResponseNotModified(headers={'ETag': etag})
+    cacheable = request.auth is None
+    data = await response_cache().aget(key) if cacheable else None
+    if data is None:
+        data = await post_data(request, pk)
+        if cacheable:
+            await sync_to_async(store_response)(key, data)
+    return json_response(data, headers={'ETag': etag})
+
+
+async def post_data(request, pk):
+    serializer_class = ExpandedPostSerializer if wants_expanded(request.GET) else PostSerializer
+    fields = selected_fields(serializer_class, request.GET)
+    try:
+        post = await shape_queryset(Post.objects.select_related('author'), serializer_class, fields).aget(pk=pk)
+    except Post.DoesNotExist:
+        raise NotFound('No Post matches the given query.')
+    context = {'request': request, 'sparse_fields': fields}
+    if serializer_class is ExpandedPostSerializer:
+        liked = await Like.objects.filter(user=request.user.pk, post=post).aexists() if request.auth else False
+        context['liked_post_ids'] = {post.pk} if liked else set()
+    if wants_included(request.GET, 'comments_preview'):
+        context['comment_previews'] = await sync_to_async(comment_previews)([post.pk])
+    return serializer_class(post, context=context).data
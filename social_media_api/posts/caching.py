@@ -0,0 +1,222 @@
+# posts/caching.py
+"""
+Response cache for the post read endpoints.
+
+Entries are keyed on the normalized request (path + sorted query params) and
+the versions of what the response shows, so a write retires only the
+responses it affects (see posts/signals.py, where versions are bumped once
+the write's transaction commits):
+
+    post detail       the post's version and its author's version
+    lists, trending   the lists version
+
+A write to a post, or to its comments or likes, bumps that post's version
+and the lists version. A save of a user's embedded fields (username,
+picture, follower count) bumps that user's version and the lists version.
+Details with `?include=` embed other users too and also follow the lists
+version. bump_version() retires everything, for bulk loads. Retired entries
+are evicted by the cache backend's LRU culling.
+
+The backend is the RESPONSE_CACHE_ALIAS entry of settings.CACHES, so a
+file-based cache or a shared server can be swapped in by config. The
+versions live in the same cache, so every worker must see it: while the
+alias is a per-process LocMemCache, caching and ETags are off (one worker's
+bump would never reach the others, which would keep serving the old body
+and answering 304 to the old ETag), unless RESPONSE_CACHE_ALLOW_PER_PROCESS
+says there is only one process, as in tests.
+Only anonymous responses are stored, but every response gets an ETag derived
+from the versions so any client can revalidate with a cheap 304. There is no
+Last-Modified: at one-second resolution it can't tell apart two writes in the
+same second, so If-Modified-Since would answer 304 for changed content.
+The async post detail (posts/async_views.py) reads and fills the same entries.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Post
+
+ALL_VERSION_KEY = 'posts:version:all'
+LISTS_VERSION_KEY = 'posts:version:lists'
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def caching_enabled():
+    """
+    Whether every worker shares the response cache (see the module docstring).
+    """
+    if getattr(settings, 'RESPONSE_CACHE_ALLOW_PER_PROCESS', False):
+        return True
+    return not isinstance(response_cache(), LocMemCache)
+
+
+def post_version_key(post_id):
+    return f'posts:version:post:{post_id}'
+
+
+def user_version_key(user_id):
+    return f'posts:version:user:{user_id}'
+
+
+def author_key(post_id):
+    return f'posts:author:{post_id}'
+
+
+def current_versions(keys):
+    """
+    Nanosecond timestamps of the last writes recorded under `keys`, in order.
+    A missing key (never written, or evicted) starts at the current time, so
+    entries built under an earlier value never become valid again.
+    """
+    cache = response_cache()
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            version = time.time_ns()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            found[key] = version
+    return [found[key] for key in keys]
+
+
+def bump_versions(post_ids=(), user_ids=(), lists=True):
+    """
+    Retire the cached responses showing these posts or users.
+    """
+    version = time.time_ns()
+    keys = [post_version_key(pk) for pk in post_ids] + [user_version_key(pk) for pk in user_ids]
+    if lists:
+        keys.append(LISTS_VERSION_KEY)
+    response_cache().set_many({key: version for key in keys}, None)
+
+
+def bump_version():
+    """
+    Retire every cached response.
+    """
+    version = time.time_ns()
+    response_cache().set(ALL_VERSION_KEY, version, None)
+    return version
+
+
+def remember_author(post_id, author_id):
+    # A post never changes author, so the entry never expires
+    response_cache().set(author_key(post_id), author_id, None)
+
+
+def post_author(post_id):
+    """
+    The post's author id, from the cache when known; None for a missing post.
+    """
+    author_id = response_cache().get(author_key(post_id))
+    if author_id is None:
+        try:
+            author_id = Post.objects.filter(pk=int(post_id)).values_list('author_id', flat=True).first()
+        except (TypeError, ValueError):
+            return None
+        if author_id is not None:
+            remember_author(post_id, author_id)
+    return author_id
+
+
+def content_versions(request, post_id=None):
+    """
+    The versions a response to `request` depends on: a post detail's when
+    `post_id` is given, the lists' otherwise.
+    """
+    if post_id is None:
+        return current_versions([ALL_VERSION_KEY, LISTS_VERSION_KEY])
+    keys = [ALL_VERSION_KEY, post_version_key(post_id), user_version_key(post_author(post_id))]
+    if request.GET.get('include'):
+        keys.append(LISTS_VERSION_KEY)
+    return current_versions(keys)
+
+
+def request_fingerprint(request):
+    """
+    Host, path and sorted non-empty query params, for DRF and plain Django requests alike.
+    """
+    query = '&'.join(
+        f'{name}={value}'
+        for name in sorted(request.GET)
+        for value in sorted(request.GET.getlist(name))
+        if value != ''
+    )
+    return f'{request.get_host()}{request.path}?{query}'
+
+
+def cache_variant(user):
+    """
+    What besides the URL makes two responses differ; anonymous requests share one variant.
+    """
+    return 'anon' if user is None or user.is_anonymous else f'user:{user.pk}'
+
+
+def response_key(request, variant, post_id=None):
+    versions = '.'.join(str(version) for version in content_versions(request, post_id))
+    return f'posts:response:{versions}:{variant}:{request_fingerprint(request)}'
+
+
+def response_etag(key):
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+def is_not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is None:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+
+def store_response(key, data):
+    response_cache().set(key, data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+
+
+class ResponseCacheMixin:
+    """
+    ViewSet mixin caching `cached_actions` responses.
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.cached_actions:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.cached_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_variant(self, request):
+        return cache_variant(request.user)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not caching_enabled():
+            return handler(request, *args, **kwargs)
+        post_id = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        key = response_key(request, self.get_cache_variant(request), post_id)
+        etag = response_etag(key)
+
+        if is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cacheable = request.user.is_anonymous
+            data = response_cache().get(key) if cacheable else None
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if cacheable and response.status_code == status.HTTP_200_OK:
+                    store_response(key, response.data)
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,57 @@
+# posts/counters.py
+"""
+Denormalized Post.like_count / Post.comment_count.
+
+Writers bump the counters with a single `UPDATE ... SET n = n + 1`, so list
+pages read them straight off the post row. `reconcile_counters` repairs any
+drift from writes that bypassed the views.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Like, Post
+
+COUNTER_FIELDS = ('like_count', 'comment_count')
+
+
+def adjust_counter(post_id, field, delta, **also):
+    """
+    Atomically add `delta` to one of the post's counters (never below zero).
+    `also` are further column updates made by the same statement.
+    """
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f'Unknown counter: {field}')
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)}, **also)
+
+
+def _actual_count(model):
+    rows = model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile_counters(batch_size=1000, dry_run=False):
+    """
+    Compare stored counters against the likes/comments tables one primary-key
+    range at a time and rewrite the rows that drifted.
+    Yields (last_pk_checked, rows_fixed) after each batch.
+    """
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        drifted = list(
+            Post.objects.filter(pk__in=batch)
+            .annotate(actual_likes=_actual_count(Like), actual_comments=_actual_count(Comment))
+            .exclude(like_count=F('actual_likes'), comment_count=F('actual_comments'))
+            .only('pk', 'like_count', 'comment_count')
+        )
+        for post in drifted:
+            post.like_count = post.actual_likes
+            post.comment_count = post.actual_comments
+        if drifted and not dry_run:
+            Post.objects.bulk_update(drifted, COUNTER_FIELDS)
+        last_pk = batch[-1]
+        yield last_pk, len(drifted)
@@ -0,0 +1,234 @@
+# posts/feed.py
+"""
+Materialized (fan-out-on-write) feeds.
+
+Every new post is copied into a FeedEntry row for each follower of its author,
+so reading a feed is an indexed range scan on (user, created_at) instead of an
+IN-subquery over everyone the reader follows plus a sort. The copies are
+written off the request path once the post's transaction commits (see
+FanoutQueue below), so followers see a new post shortly after it is created.
+
+Posts by authors with more than FEED_FANOUT_MAX_FOLLOWERS followers are not
+fanned out; their posts are merged in at read time (fan-out-on-read). The
+choice is made once, when the post is written, and recorded in
+Post.fanned_out, so an author crossing the limit in either direction leaves
+their earlier posts where they were: entries for the pushed ones, read-time
+merging for the pulled ones.
+
+Following someone copies only their newest FEED_BACKFILL_SIZE fanned-out
+posts into the follower's feed, so a follow never writes an unbounded number
+of rows. Their older fanned-out posts are deliberately left out of that feed;
+only pulled posts are merged in at read time.
+
+FEED_FANOUT_MODE:
+    'thread'  fan out from a background worker thread after commit (default)
+    'inline'  fan out immediately, inside the caller (used by the test suite)
+    'manual'  only fan out when fanout_queue.process_queued() is called
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+
+from accounts import graph
+from .models import FeedEntry, Post
+
+logger = logging.getLogger(__name__)
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def backfill_size():
+    return getattr(settings, 'FEED_BACKFILL_SIZE', 100)
+
+
+def is_fanout_author(author_id):
+    """
+    True when new posts by this author are to be materialized into follower feeds.
+    """
+    User = get_user_model()
+    followers = User.objects.filter(pk=author_id).values_list('follower_count', flat=True).first()
+    return (followers or 0) <= fanout_limit()
+
+
+def fan_out_post(post):
+    """
+    Write a feed entry for every follower of the post's author.
+    Returns the number of entries written (0 for posts read on demand).
+    """
+    if not post.fanned_out:
+        return 0
+    # Cached adjacency array (accounts/graph.py); at most fanout_limit() ids
+    follower_ids = graph.follower_ids(post.author_id)
+    for start in range(0, len(follower_ids), FANOUT_BATCH_SIZE):
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=follower_id, post_id=post.pk, created_at=post.created_at)
+            for follower_id in follower_ids[start:start + FANOUT_BATCH_SIZE]
+        ], ignore_conflicts=True)
+    return len(follower_ids)
+
+
+def fan_out_posts(post_ids):
+    """
+    Fan out many existing posts at once (bulk imports): one query streams
+    every (follower, post) pair instead of one follower lookup per post.
+    Posts by authors over the limit are marked as read on demand instead.
+    """
+    Post.objects.filter(pk__in=post_ids, fanned_out=True, author__follower_count__gt=fanout_limit()).update(
+        fanned_out=False,
+    )
+    rows = (
+        Post.objects.filter(pk__in=post_ids, fanned_out=True, author__followers__isnull=False)
+        .values_list('author__followers__id', 'id', 'created_at')
+        .iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+    written = 0
+    batch = []
+    for follower_id, post_id, created_at in rows:
+        batch.append(FeedEntry(user_id=follower_id, post_id=post_id, created_at=created_at))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def backfill_feed(user_id, author_ids):
+    """
+    Copy the newest FEED_BACKFILL_SIZE fanned-out posts of newly followed
+    authors into a user's feed. Older ones are not copied and never appear in
+    it; the authors' pulled posts are merged in at read time.
+    """
+    entries = []
+    for author_id in author_ids:
+        recent = (
+            Post.objects.filter(author_id=author_id, fanned_out=True)
+            .order_by('-created_at')
+            .values_list('id', 'created_at')[:backfill_size()]
+        )
+        entries.extend(
+            FeedEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent
+        )
+    FeedEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+
+
+def remove_from_feed(user_id, author_ids=None):
+    """
+    Drop entries from a user's feed, either for the given authors or all of them.
+    """
+    entries = FeedEntry.objects.filter(user_id=user_id)
+    if author_ids is not None:
+        entries = entries.filter(post__author_id__in=author_ids)
+    entries.delete()
+
+
+def pull_authors(user):
+    """
+    Followed authors with posts that were not fanned out and must be read on demand.
+    """
+    following = graph.following_ids(user.pk)
+    if not following:
+        return []
+    return list(
+        Post.objects.filter(fanned_out=False, author_id__in=list(following))
+        .order_by().values_list('author_id', flat=True).distinct()
+    )
+
+
+def feed_queryset(user):
+    """
+    Posts for `user`'s home feed, newest first.
+    """
+    posts = Post.objects.select_related('author')
+    pulled = pull_authors(user)
+    if not pulled:
+        # Pure materialized read: ordered by the entry's own created_at so the
+        # (user, created_at) index drives both the filter and the sort.
+        return (
+            posts.filter(feed_entries__user=user)
+            .annotate(feed_created_at=F('feed_entries__created_at'))
+            .order_by('-feed_created_at', '-id')
+        )
+    pushed = FeedEntry.objects.filter(user=user).values('post_id')
+    return posts.filter(Q(id__in=pushed) | Q(author_id__in=pulled, fanned_out=False)).order_by('-created_at', '-id')
+
+
+class FanoutQueue:
+    """
+    Posts waiting to be fanned out, written by a worker thread so creating a
+    post never waits on one feed entry per follower.
+    """
+
+    def __init__(self):
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    @property
+    def mode(self):
+        return getattr(settings, 'FEED_FANOUT_MODE', 'thread')
+
+    def post_created(self, post):
+        if self.mode == 'inline':
+            fan_out_post(post)
+        elif post.fanned_out:
+            # The worker must see the committed post, and a rolled back one never
+            transaction.on_commit(lambda: self.enqueue(post.pk))
+
+    def enqueue(self, post_id):
+        with self._lock:
+            self._queued.add(post_id)
+        if self.mode == 'thread':
+            self._ensure_worker()
+            self._wakeup.set()
+
+    def queued(self):
+        with self._lock:
+            return len(self._queued)
+
+    def process_queued(self):
+        """
+        Fan out every queued post that still exists. Returns the number of entries written.
+        """
+        with self._lock:
+            post_ids, self._queued = self._queued, set()
+        written = 0
+        for post in Post.objects.filter(pk__in=post_ids).only('author_id', 'created_at', 'fanned_out'):
+            try:
+                written += fan_out_post(post)
+            except Exception:
+                logger.exception('Failed to fan out post %s', post.pk)
+        return written
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='feed-fanout', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.process_queued()
+            finally:
+                close_old_connections()
+
+
+fanout_queue = FanoutQueue()
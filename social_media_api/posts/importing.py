@@ -0,0 +1,262 @@
+# posts/importing.py
+"""
+Bulk import of users, follows, posts and comments from NDJSON.
+
+Each line is one record, tagged with a "type" ("user", "follow", "post",
+"comment") unless the whole file is one type. Records carry explicit ids, as
+in posts/exporting.py output, so re-running an import is a no-op: rows whose
+id (or follow pair) already exists are skipped.
+
+Records are buffered and written in chunks, one transaction per chunk, in
+dependency order (users, follows, posts, comments):
+
+    Postgres (psycopg 3)  COPY into a temporary table, then
+                          INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    anything else         bulk_create(ignore_conflicts=True)
+
+Neither path sends model signals, hashes passwords or creates tokens.
+Password fields are taken as already-hashed strings; users without one get
+the importer's shared password hash (hashed once) or an unusable password.
+Follow counts are recomputed per chunk, before that chunk's posts are fanned
+out against them. The rest of the derived data (post counters, the SQLite
+search index, cached graph arrays and responses) is rebuilt in bulk by finish().
+"""
+import json
+import time
+from collections import OrderedDict, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts import graph
+from .caching import bump_version
+from .counters import reconcile_counters
+from .feed import backfill_feed, fan_out_posts
+from .models import Comment, Post
+from .search import rebuild_search_index
+
+User = get_user_model()
+Follow = User.following.through
+
+# Record type -> (model, {record key: model attribute})
+RECORD_TYPES = OrderedDict([
+    ('user', (User, {key: key for key in (
+        'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'password', 'is_active', 'date_joined',
+    )})),
+    ('follow', (Follow, {'follower_id': 'from_user_id', 'followee_id': 'to_user_id'})),
+    ('post', (Post, {key: key for key in ('id', 'author_id', 'title', 'content', 'created_at', 'updated_at')})),
+    ('comment', (Comment, {key: key for key in (
+        'id', 'post_id', 'author_id', 'content', 'created_at', 'updated_at',
+    )})),
+])
+REQUIRED = {
+    'user': ('id', 'username'),
+    'follow': ('follower_id', 'followee_id'),
+    'post': ('id', 'author_id', 'title'),
+    'comment': ('id', 'post_id', 'author_id', 'content'),
+}
+TIMESTAMP_FIELDS = ('created_at', 'updated_at', 'date_joined')
+
+
+def supports_copy():
+    """
+    COPY needs psycopg 3's cursor.copy(); psycopg2 falls back to bulk_create.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def copy_rows(model, objs):
+    """
+    COPY objs into a temp table and merge them into the model's table.
+    Returns the number of rows inserted.
+    """
+    fields = [f for f in model._meta.concrete_fields if not (f.primary_key and getattr(objs[0], f.attname) is None)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    stage = connection.ops.quote_name(f'import_{model._meta.db_table}')
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA')
+        with cursor.cursor.copy(f'COPY {stage} ({columns}) FROM STDIN') as copy:
+            for obj in objs:
+                copy.write_row([f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields])
+        cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} ON CONFLICT DO NOTHING')
+        inserted = cursor.rowcount
+        cursor.execute(f'DROP TABLE {stage}')
+    return inserted
+
+
+def conflict_columns(model, objs):
+    """
+    The columns ignore_conflicts skips duplicates on: the primary key when
+    every record carries one (users, posts, comments), else the model's unique
+    pair (follows).
+    """
+    if all(obj.pk is not None for obj in objs):
+        return [model._meta.pk.attname]
+    return [model._meta.get_field(name).attname for name in model._meta.unique_together[0]]
+
+
+def insert_rows(model, objs, timestamps):
+    """
+    bulk_create fallback. auto_now/auto_now_add overwrite imported timestamps
+    on insert, so they are written back afterwards, to the rows this call
+    inserted only: skipped ids already belong to live rows. Returns the number
+    of rows inserted, like copy_rows().
+    """
+    columns = conflict_columns(model, objs)
+    keys = [tuple(getattr(obj, column) for column in columns) for obj in objs]
+    lookup = {f'{column}__in': {key[i] for key in keys} for i, column in enumerate(columns)}
+    existing = set(model._default_manager.filter(**lookup).values_list(*columns))
+    saved = [[getattr(obj, name) for name in timestamps] for obj in objs]
+    # The first record of a repeated key is the one that gets inserted
+    inserted = {}
+    for obj, key, values in zip(objs, keys, saved):
+        if key not in existing and key not in inserted:
+            inserted[key] = (obj, values)
+    model._default_manager.bulk_create(objs, ignore_conflicts=True)
+    if timestamps and inserted:
+        for obj, values in inserted.values():
+            for name, value in zip(timestamps, values):
+                setattr(obj, name, value)
+        model._default_manager.bulk_update([obj for obj, _ in inserted.values()], timestamps)
+    return len(inserted)
+
+
+class Importer:
+    """
+    Buffers records and writes them a chunk at a time. Call add() or
+    add_lines(), then flush() for the tail and finish() once at the end.
+    """
+
+    def __init__(self, batch_size=5000, password=None, use_copy=None, progress=None):
+        self.batch_size = batch_size
+        self.password_hash = make_password(password) if password else None
+        self.use_copy = supports_copy() if use_copy is None else use_copy
+        self.progress = progress
+        self.buffers = defaultdict(list)
+        self.buffered = 0
+        self.counts = defaultdict(int)
+        self.started = time.monotonic()
+        self.follow_edges = []
+
+    @property
+    def rows(self):
+        return sum(self.counts.values())
+
+    def rate(self):
+        return self.rows / max(time.monotonic() - self.started, 1e-9)
+
+    def add_lines(self, lines, default_type=None):
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f'Line {number}: invalid JSON ({exc})')
+            self.add(record, default_type, number)
+        self.flush()
+
+    def add(self, record, default_type=None, number=None):
+        kind = record.pop('type', default_type)
+        if kind not in RECORD_TYPES:
+            raise ValueError(f'Line {number}: unknown record type {kind!r}')
+        missing = [key for key in REQUIRED[kind] if record.get(key) in (None, '')]
+        if missing:
+            raise ValueError(f'Line {number}: {kind} is missing {", ".join(missing)}')
+        self.buffers[kind].append(self.build(kind, record))
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def build(self, kind, record):
+        model, mapping = RECORD_TYPES[kind]
+        values = {attr: record[key] for key, attr in mapping.items() if key in record}
+        now = timezone.now()
+        for name in TIMESTAMP_FIELDS:
+            if name in values and isinstance(values[name], str):
+                values[name] = parse_datetime(values[name])
+        if kind == 'user':
+            values.setdefault('password', self.password_hash or make_password(None))
+        obj = model(**values)
+        for field in model._meta.concrete_fields:
+            if field.name in TIMESTAMP_FIELDS and getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, now)
+        return obj
+
+    @transaction.atomic
+    def flush(self):
+        for kind, (model, _) in RECORD_TYPES.items():
+            objs = self.buffers.pop(kind, None)
+            if not objs:
+                continue
+            if self.use_copy:
+                written = copy_rows(model, objs)
+            else:
+                timestamps = [f.name for f in model._meta.concrete_fields if f.name in TIMESTAMP_FIELDS]
+                written = insert_rows(model, objs, timestamps)
+            self.counts[kind] += written
+            self.after_write(kind, objs)
+        self.buffered = 0
+        if self.progress:
+            self.progress(self)
+
+    def after_write(self, kind, objs):
+        if kind == 'follow':
+            edges = [(obj.from_user_id, obj.to_user_id) for obj in objs]
+            self.follow_edges.extend(edges)
+            # fan_out_posts() decides push or pull from follower_count
+            recount_follows({user_id for edge in edges for user_id in edge})
+            followees = defaultdict(list)
+            for follower_id, followee_id in edges:
+                followees[follower_id].append(followee_id)
+            for follower_id, author_ids in followees.items():
+                backfill_feed(follower_id, author_ids)
+        elif kind == 'post':
+            fan_out_posts([obj.pk for obj in objs])
+
+    def finish(self):
+        """
+        Rebuild what the bulk writes bypassed. Run once after the last flush.
+        """
+        models = [model for kind, (model, _) in RECORD_TYPES.items() if self.counts[kind] and kind != 'follow']
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        if self.counts['post'] or self.counts['comment']:
+            for _ in reconcile_counters():
+                pass
+            rebuild_search_index(Post)
+            rebuild_search_index(Comment)
+        if self.follow_edges:
+            graph.invalidate(
+                following_of=[follower for follower, _ in self.follow_edges],
+                followers_of=[followee for _, followee in self.follow_edges],
+            )
+        bump_version()
+
+
+def recount_follows(user_ids):
+    """
+    Recompute follower_count/following_count for the given users from the follow table.
+    """
+    def count_of(column):
+        rows = Follow.objects.filter(**{column: OuterRef('pk')}).order_by().values(column).annotate(n=Count('*'))
+        return Coalesce(Subquery(rows.values('n')), 0)
+
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), 1000):
+        User.objects.filter(pk__in=user_ids[start:start + 1000]).update(
+            follower_count=count_of('to_user'),
+            following_count=count_of('from_user'),
+        )
@@ -0,0 +1,214 @@
+# posts/likes.py
+"""
+Set-based like/unlike writes.
+
+A like is one `INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING`: the
+SELECT against posts_post doubles as the existence check, the conflict clause
+makes repeats idempotent, and RETURNING says whether a row was written. The
+like_count and trending_score bumps ride along with it (one statement on Postgres via a
+data-modifying CTE, the same two statements in one transaction elsewhere),
+and its RETURNING hands back the author id for the notification, so neither
+the Post nor its author is ever loaded.
+
+These writes bypass model signals, so callers here bump the affected response
+cache versions themselves. RETURNING needs Postgres or SQLite >= 3.35.
+"""
+import functools
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import bump_versions
+from .trending import LIKE_WEIGHT, score_sql
+
+LikeResult = namedtuple('LikeResult', 'exists changed like_id author_id created_at', defaults=[None])
+
+LIKE_STATEMENT = """
+    WITH inserted AS (
+        INSERT INTO posts_like (user_id, post_id, created_at)
+        SELECT %s, id, %s FROM posts_post WHERE id = %s
+        ON CONFLICT (user_id, post_id) DO NOTHING
+        RETURNING id, post_id
+    ), bumped AS (
+        UPDATE posts_post SET like_count = like_count + 1, trending_score = {trending}
+        WHERE id IN (SELECT post_id FROM inserted)
+    )
+    SELECT posts_post.author_id, inserted.id
+    FROM posts_post LEFT JOIN inserted ON inserted.post_id = posts_post.id
+    WHERE posts_post.id = %s
+"""
+
+UNLIKE_STATEMENT = """
+    WITH deleted AS (
+        DELETE FROM posts_like WHERE user_id = %s AND post_id = %s
+        RETURNING id, post_id
+    ), bumped AS (
+        UPDATE posts_post SET like_count = CASE WHEN like_count > 0 THEN like_count - 1 ELSE 0 END,
+            trending_score = {trending}
+        WHERE id IN (SELECT post_id FROM deleted)
+    )
+    SELECT posts_post.author_id, deleted.id
+    FROM posts_post LEFT JOIN deleted ON deleted.post_id = posts_post.id
+    WHERE posts_post.id = %s
+"""
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def insert_likes(cursor, user_id, post_ids):
+    """
+    Like every existing post in `post_ids`; returns the post ids newly liked.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    cursor.execute(
+        f'INSERT INTO posts_like (user_id, post_id, created_at) '
+        f'SELECT %s, id, %s FROM posts_post WHERE id IN ({_placeholders(post_ids)}) '
+        f'ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id',
+        [user_id, now, *post_ids],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def delete_likes(cursor, user_id, post_ids):
+    """
+    Remove the user's likes on `post_ids`; returns the post ids actually unliked.
+    """
+    cursor.execute(
+        f'DELETE FROM posts_like WHERE user_id = %s AND post_id IN ({_placeholders(post_ids)}) RETURNING post_id',
+        [user_id, *post_ids],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def shift_like_counts(cursor, post_ids, delta):
+    """
+    Add `delta` (+1/-1) to like_count on each post and add or remove one
+    like's trending term; returns {post_id: author_id}.
+    """
+    trending, trending_params = score_sql(LIKE_WEIGHT, delta)
+    cursor.execute(
+        f'UPDATE posts_post SET like_count = CASE WHEN like_count + %s > 0 THEN like_count + %s ELSE 0 END, '
+        f'trending_score = {trending} '
+        f'WHERE id IN ({_placeholders(post_ids)}) RETURNING id, author_id',
+        [delta, delta, *trending_params, *post_ids],
+    )
+    return dict(cursor.fetchall())
+
+
+def _statement_result(row, created_at=None):
+    if row is None:
+        return LikeResult(False, False, None, None)
+    author_id, like_id = row
+    return LikeResult(True, like_id is not None, like_id, author_id, created_at if like_id else None)
+
+
+def _post_author(cursor, post_id):
+    cursor.execute('SELECT author_id FROM posts_post WHERE id = %s', [post_id])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def like(user_id, post_id):
+    """
+    Like a post. Returns a LikeResult; `exists` is False if there is no such post.
+    """
+    now = timezone.now()
+    created_at = connection.ops.adapt_datetimefield_value(now)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            trending, trending_params = score_sql(LIKE_WEIGHT, 1)
+            cursor.execute(
+                LIKE_STATEMENT.format(trending=trending),
+                [user_id, created_at, post_id, *trending_params, post_id],
+            )
+            result = _statement_result(cursor.fetchone(), now)
+        else:
+            with transaction.atomic(savepoint=False):
+                cursor.execute(
+                    'INSERT INTO posts_like (user_id, post_id, created_at) '
+                    'SELECT %s, id, %s FROM posts_post WHERE id = %s '
+                    'ON CONFLICT (user_id, post_id) DO NOTHING RETURNING id',
+                    [user_id, created_at, post_id],
+                )
+                inserted = cursor.fetchone()
+                if inserted:
+                    author_id = shift_like_counts(cursor, [post_id], 1)[post_id]
+                    result = LikeResult(True, True, inserted[0], author_id, now)
+                else:
+                    author_id = _post_author(cursor, post_id)
+                    result = LikeResult(author_id is not None, False, None, author_id)
+    if result.changed:
+        transaction.on_commit(functools.partial(bump_versions, post_ids=[post_id]))
+    return result
+
+
+def unlike(user_id, post_id):
+    """
+    Remove a like. Returns a LikeResult; `changed` is False if there was none.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            trending, trending_params = score_sql(LIKE_WEIGHT, -1)
+            cursor.execute(
+                UNLIKE_STATEMENT.format(trending=trending),
+                [user_id, post_id, *trending_params, post_id],
+            )
+            result = _statement_result(cursor.fetchone())
+        else:
+            with transaction.atomic(savepoint=False):
+                if delete_likes(cursor, user_id, [post_id]):
+                    author_id = shift_like_counts(cursor, [post_id], -1)[post_id]
+                    result = LikeResult(True, True, None, author_id)
+                else:
+                    author_id = _post_author(cursor, post_id)
+                    result = LikeResult(author_id is not None, False, None, author_id)
+    if result.changed:
+        transaction.on_commit(functools.partial(bump_versions, post_ids=[post_id]))
+    return result
+
+
+def coalesce_toggles(toggles):
+    """
+    Reduce an ordered list of (post_id, liked) toggles to each post's final state.
+    """
+    final = {}
+    for post_id, liked in toggles:
+        final[post_id] = liked
+    return final
+
+
+@transaction.atomic
+def apply_toggles(user_id, toggles):
+    """
+    Apply a batch of like/unlike toggles with at most five statements.
+    Returns ({post_id: liked} for posts that exist, {post_id: author_id} for
+    new likes, set of post ids whose state changed).
+    """
+    final = coalesce_toggles(toggles)
+    if not final:
+        return {}, {}, set()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM posts_post WHERE id IN ({_placeholders(final)})', list(final))
+        existing = {row[0] for row in cursor.fetchall()}
+    final = {post_id: liked for post_id, liked in final.items() if post_id in existing}
+    to_like = [post_id for post_id, liked in final.items() if liked]
+    to_unlike = [post_id for post_id, liked in final.items() if not liked]
+
+    liked_authors, changed = {}, set()
+    with connection.cursor() as cursor:
+        if to_like:
+            inserted = insert_likes(cursor, user_id, to_like)
+            if inserted:
+                liked_authors = shift_like_counts(cursor, inserted, 1)
+                changed.update(inserted)
+        if to_unlike:
+            deleted = delete_likes(cursor, user_id, to_unlike)
+            if deleted:
+                shift_like_counts(cursor, deleted, -1)
+                changed.update(deleted)
+    if changed:
+        transaction.on_commit(functools.partial(bump_versions, post_ids=sorted(changed)))
+    return final, liked_authors, changed
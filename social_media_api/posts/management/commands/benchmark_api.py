@@ -0,0 +1,105 @@
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from social_media_api import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the feed, post list (plain and with comment previews), post detail, like and notification '
+        'endpoints on a synthetic power-law graph and report p50/p95/p99 latency, queries per request and '
+        'throughput as JSON. Runs in a throwaway test database unless --live-database is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(benchmark.SCENARIOS),
+                            help=f'Comma-separated subset of: {", ".join(benchmark.SCENARIOS)}.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--url', help='Benchmark a running server (e.g. http://127.0.0.1:8000) '
+                                          'instead of the in-process test client.')
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--likes-per-post', type=int, default=3)
+        parser.add_argument('--comments-per-post', type=int, default=2)
+        parser.add_argument('--exponent', type=float, default=1.1, help='Power-law exponent of popularity.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep-data', action='store_true',
+                            help='Leave the generated data in place, and reuse it on the next run.')
+        parser.add_argument('--live-database', action='store_true',
+                            help='Write to the configured database instead of a throwaway test database. '
+                                 'Required with --url, whose server reads that database.')
+        parser.add_argument('--output', '-o', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Results JSON from an earlier run to compare against.')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(names) - set(benchmark.SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        if options['url'] and not options['live_database']:
+            raise CommandError('--url benchmarks a server reading the configured database; '
+                               'pass --live-database to write benchmark data to it.')
+        baseline = benchmark.load_results(options['compare']) if options['compare'] else None
+
+        if options['live_database']:
+            database = nullcontext()
+        else:
+            database = benchmark.isolated_database(keep=options['keep_data'])
+        with database:
+            results, target = self.run_scenarios(names, options)
+
+        recorded = {key: options[key] for key in (
+            'requests', 'warmup', 'concurrency', 'users', 'posts_per_user', 'follows_per_user',
+            'likes_per_post', 'comments_per_post', 'exponent', 'seed',
+        )}
+        document = benchmark.result_document(target, recorded, results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}.'))
+        if baseline:
+            for line in benchmark.compare_results(baseline, document):
+                self.stdout.write(line)
+
+    def run_scenarios(self, names, options):
+        graph = benchmark.Graph.load()
+        if graph.user_ids and not options['keep_data']:
+            # Only a --keep-data run may take over existing users, and only those are never deleted
+            raise CommandError(f'{len(graph.user_ids)} users named {benchmark.PREFIX}* already exist; '
+                               'pass --keep-data to reuse them.')
+        if graph.user_ids:
+            self.stdout.write(f'Reusing {len(graph.user_ids)} users and {len(graph.post_ids)} posts')
+        else:
+            graph = benchmark.generate_graph(
+                users=options['users'], posts_per_user=options['posts_per_user'],
+                follows_per_user=options['follows_per_user'], likes_per_post=options['likes_per_post'],
+                comments_per_post=options['comments_per_post'],
+                exponent=options['exponent'], seed=options['seed'],
+            )
+            self.stdout.write(f'Generated {len(graph.user_ids)} users and {len(graph.post_ids)} posts')
+
+        target = benchmark.HTTPTarget(options['url']) if options['url'] else benchmark.InProcessTarget()
+        results = {}
+        try:
+            with target:
+                for name in names:
+                    results[name] = stats = benchmark.run_scenario(
+                        target, graph, name, requests=options['requests'], concurrency=options['concurrency'],
+                        warmup=options['warmup'], seed=options['seed'],
+                    )
+                    self.stdout.write(
+                        f'{name:<20} p50 {stats["p50_ms"]:8.2f} ms  p95 {stats["p95_ms"]:8.2f} ms  '
+                        f'p99 {stats["p99_ms"]:8.2f} ms  {stats["queries_per_request"]} queries  '
+                        f'{stats["throughput_rps"]} req/s  {stats["errors"]} errors'
+                    )
+        finally:
+            if options['live_database'] and not options['keep_data']:
+                benchmark.cleanup(graph.user_ids)
+        return results, target
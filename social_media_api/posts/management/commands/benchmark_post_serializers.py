@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from posts.models import Like, Post
+from posts.serializers import ExpandedPostSerializer, PostSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class PerRowLikeSerializer(PostSerializer):
+    """
+    The obvious way to add liked_by_me: one query per post.
+    """
+    liked_by_me = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['liked_by_me']
+
+    def get_liked_by_me(self, post):
+        return Like.objects.filter(user=self.context['request'].user, post=post).exists()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare PostSerializer, a per-row liked_by_me lookup and ExpandedPostSerializer on synthetic pages: '
+        'milliseconds and queries per page. Data is created in a transaction and rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        viewer = User.objects.create_user(username='bench-viewer')
+        authors = User.objects.bulk_create([User(username=f'bench-author-{i}') for i in range(50)])
+        posts = Post.objects.bulk_create([
+            Post(author=authors[i % len(authors)], title=f'Post {i}', content='x' * 200)
+            for i in range(options['posts'])
+        ])
+        Like.objects.bulk_create([Like(user=viewer, post=post) for post in posts[::3]])
+
+        django_request = APIRequestFactory().get('/api/feed/')
+        force_authenticate(django_request, user=viewer)
+        request = Request(django_request)
+        request.user  # authenticate once, outside the measurements
+
+        page_size = options['page_size']
+        pages = [
+            list(Post.objects.select_related('author').order_by('-id')[start:start + page_size])
+            for start in range(0, len(posts), page_size)
+        ]
+        self.stdout.write(f'{len(posts)} posts, {len(pages)} pages of {page_size}, {options["repeat"]} runs')
+        for serializer_class in (PostSerializer, PerRowLikeSerializer, ExpandedPostSerializer):
+            timings, queries = [], 0
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    for page in pages:
+                        serializer_class(page, many=True, context={'request': request}).data
+                    timings.append(time.perf_counter() - start)
+                queries = len(captured) / len(pages)
+            per_page = statistics.median(timings) / len(pages) * 1000
+            self.stdout.write(
+                f'{serializer_class.__name__:<24} {per_page:8.3f} ms/page  {queries:4.1f} queries/page'
+            )
@@ -0,0 +1,80 @@
+import json
+from contextlib import nullcontext
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from social_media_api import benchmark, renderers
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark one large post list: model instances through the serializer against values mode, '
+        'each rendered by JSONRenderer and FastJSONRenderer (orjson). Runs in a throwaway test database '
+        'unless --live-database is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the fastest counts.')
+        parser.add_argument('--expanded', action='store_true', help='Use ExpandedPostSerializer.')
+        parser.add_argument('--keep-data', action='store_true',
+                            help='Leave the generated posts in place, and reuse them on the next run.')
+        parser.add_argument('--live-database', action='store_true',
+                            help='Write to the configured database instead of a throwaway test database.')
+        parser.add_argument('--output', '-o', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be positive.')
+        if options['live_database']:
+            database = nullcontext()
+        else:
+            database = benchmark.isolated_database(keep=options['keep_data'])
+        with database:
+            results = self.run(options)
+
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer uses json.'))
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<10} {stats["rows"]} rows  build {stats["build_ms"]:9.2f} ms  '
+                f'json {stats["json_render_ms"]:8.2f} ms  fast {stats["fast_render_ms"]:8.2f} ms  '
+                f'total {stats["total_ms"]:9.2f} ms  {stats["bytes"]} bytes'
+            )
+        before, after = results['instances'], results['values']
+        self.stdout.write(
+            f'values + fast renderer: {before["build_ms"] + before["json_render_ms"]:.2f} ms -> '
+            f'{after["total_ms"]:.2f} ms'
+        )
+
+        if options['output']:
+            document = {
+                'commit': benchmark.current_commit(),
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'orjson': renderers.orjson is not None,
+                'options': {key: options[key] for key in ('rows', 'repeat', 'expanded')},
+                'results': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}.'))
+
+    def run(self, options):
+        authors = get_user_model().objects.filter(username=benchmark.RENDER_AUTHOR)
+        if authors.exists() and not options['keep_data']:
+            raise CommandError(f'A user named {benchmark.RENDER_AUTHOR} already exists; '
+                               'pass --keep-data to reuse its posts.')
+        existing = benchmark.Post.objects.filter(author__in=authors).count()
+        if existing < options['rows']:
+            author = benchmark.generate_posts(options['rows'] - existing)
+        else:
+            author = authors.get()
+        try:
+            return benchmark.rendering_benchmark(options['rows'], options['repeat'], options['expanded'])
+        finally:
+            if options['live_database'] and not options['keep_data']:
+                benchmark.cleanup([author.pk])
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import RECORD_TYPES, Importer
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load users, follows, posts and comments from an NDJSON file (or stdin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='NDJSON file to read; stdin if omitted or "-".')
+        parser.add_argument('--type', dest='record_type', choices=list(RECORD_TYPES),
+                            help='Record type for lines without a "type" key (e.g. a file from export_data).')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Records written per transaction.')
+        parser.add_argument('--password',
+                            help='Password given to imported users without a password hash; unusable if omitted.')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use bulk INSERTs even where COPY is available.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        importer = Importer(
+            batch_size=options['batch_size'],
+            password=options['password'],
+            use_copy=False if options['no_copy'] else None,
+            progress=self.report,
+        )
+        path = options['path']
+        source = open(path, encoding='utf-8') if path and path != '-' else sys.stdin
+        try:
+            importer.add_lines(source, options['record_type'])
+        except ValueError as exc:
+            raise CommandError(f'{exc} ({importer.rows} rows committed before the error).')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        importer.finish()
+        summary = ', '.join(f'{importer.counts[kind]} {kind}s' for kind in RECORD_TYPES if importer.counts[kind])
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {summary or "nothing"} ({importer.rate():,.0f} rows/s, '
+            f'{"COPY" if importer.use_copy else "bulk insert"}).'
+        ))
+
+    def report(self, importer):
+        self.stdout.write(f'  {importer.rows} rows written ({importer.rate():,.0f} rows/s)')
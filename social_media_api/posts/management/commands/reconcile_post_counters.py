@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.like_count and Post.comment_count where they drifted from the real rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for last_pk, fixed in reconcile_counters(options['batch_size'], options['dry_run']):
+            total += fixed
+            if fixed:
+                self.stdout.write(f'Up to post {last_pk}: {fixed} drifted')
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} drifted post(s).'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import refresh_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores from recent likes and comments; run periodically (e.g. hourly).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        scored = refresh_scores(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} post(s) with recent activity.'))
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-18 19:20
+"""
+Full-text search index (see posts/search.py). The columns and tables live
+outside the model state, so this is plain SQL per database vendor.
+"""
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE posts_post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX posts_post_search_idx ON posts_post USING GIN (search_vector)',
+    """
+    ALTER TABLE posts_comment ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
+    """,
+    'CREATE INDEX posts_comment_search_idx ON posts_comment USING GIN (search_vector)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS posts_comment_search_idx',
+    'ALTER TABLE posts_comment DROP COLUMN IF EXISTS search_vector',
+    'DROP INDEX IF EXISTS posts_post_search_idx',
+    'ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5(title, content, tokenize='porter unicode61')",
+    'INSERT INTO posts_post_fts (rowid, title, content) SELECT id, title, content FROM posts_post',
+    "CREATE VIRTUAL TABLE posts_comment_fts USING fts5(content, tokenize='porter unicode61')",
+    'INSERT INTO posts_comment_fts (rowid, content) SELECT id, content FROM posts_comment',
+]
+
+SQLITE_REVERSE = [
+    'DROP TABLE IF EXISTS posts_comment_fts',
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+
+
+def run_for_vendor(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
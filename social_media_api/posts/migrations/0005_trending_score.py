@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+"""
+Scores start out empty; `manage.py refresh_trending` fills them in from recent activity.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('trending_score__isnull', False)), fields=['-trending_score', '-id'], name='posts_post_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+"""
+Existing posts by authors above the fan-out limit were never copied into
+feeds; record that so they keep being read on demand.
+"""
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    limit = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+    Post.objects.filter(author__follower_count__gt=limit).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_follow_counts'),
+        ('posts', '0005_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-created_at'], name='posts_post_pulled_idx'),
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+"""
+Posts written before feeds were materialized have no FeedEntry rows, so the
+feeds of existing users came up empty. Copy every fanned-out post into the
+feeds of its author's current followers, as fan_out_posts() does for imports.
+"""
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_feed_entries(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    rows = (
+        Post.objects.filter(fanned_out=True, author__followers__isnull=False)
+        .values_list('author__followers__id', 'id', 'created_at')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for follower_id, post_id, created_at in rows:
+        batch.append(FeedEntry(user_id=follower_id, post_id=post_id, created_at=created_at))
+        if len(batch) >= BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_fanned_out'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feed_entries, migrations.RunPython.noop),
+    ]
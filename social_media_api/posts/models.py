@@ -12,13 +12,48 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, kept in step with F() updates by the like/comment
+    # views and repaired by `manage.py reconcile_post_counters`
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Log-space time-decayed activity score (see posts/trending.py); NULL when
+    # the post has had no recent likes or comments
+    trending_score = models.FloatField(null=True, blank=True)
+    # Whether the post was copied into follower feeds when written, or is
+    # merged in at read time (posts/feed.py); fixed for the post's lifetime
+    fanned_out = models.BooleanField(default=True)
+
+    # Only ever written with F() updates; a plain save() must not write back a stale copy
+    denormalized_fields = ('like_count', 'comment_count', 'trending_score')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Trending list: ORDER BY trending_score DESC, id DESC LIMIT K over scored posts only
+            models.Index(
+                fields=['-trending_score', '-id'],
+                condition=models.Q(trending_score__isnull=False),
+                name='posts_post_trending_idx',
+            ),
+            # Feed reads of posts that were not fanned out, per followed author
+            models.Index(
+                fields=['author', '-created_at'],
+                condition=models.Q(fanned_out=False),
+                name='posts_post_pulled_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title} by {self.author.username}'
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.denormalized_fields
+            ]
+        super().save(*args, **kwargs)
+
 class Like(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -60,3 +95,32 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post_id}'
+
+
+class FeedEntry(models.Model):
+    """
+    Materialized feed row: `post` shows up in `user`'s feed.
+    Filled on write (fan-out) so reading a feed is a range scan on (user, created_at).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    # Copy of post.created_at so the feed can be ordered from this table alone
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        ordering = ['-created_at', '-post_id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_feed_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} in feed of {self.user_id}'
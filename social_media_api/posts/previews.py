@@ -0,0 +1,52 @@
+# posts/previews.py
+"""
+Comment previews for post listings.
+
+comment_previews() fetches the latest COMMENT_PREVIEW_SIZE comments of every
+post on a page, authors included, with one query:
+
+    SELECT * FROM (
+        SELECT comment.*, author.*,
+               ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY created_at DESC, id DESC) AS row
+        FROM posts_comment JOIN accounts_user ... WHERE post_id IN (...page...)
+    ) WHERE row <= K
+
+so a page costs the same whether its posts have no comments or thousands.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def preview_size():
+    return getattr(settings, 'COMMENT_PREVIEW_SIZE', 3)
+
+
+def comment_previews(post_ids, size=None):
+    """
+    {post_id: [Comment, ...]}: each post's latest `size` comments, oldest first.
+    Posts without comments are missing from the dict. `post_ids` may be a
+    values('pk') queryset, used as a subquery.
+    """
+    size = size or preview_size()
+    if not isinstance(post_ids, QuerySet) and not post_ids:
+        return {}
+    comments = (
+        Comment.objects.filter(post_id__in=post_ids)
+        .select_related('author')
+        .annotate(row=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(row__lte=size)
+        .order_by('post_id', 'created_at', 'id')
+    )
+    previews = defaultdict(list)
+    for comment in comments:
+        previews[comment.post_id].append(comment)
+    return previews
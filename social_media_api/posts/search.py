@@ -0,0 +1,147 @@
+# posts/search.py
+"""
+Full-text search for posts and comments.
+
+Postgres: posts_post / posts_comment carry a generated, stored `search_vector`
+tsvector column with a GIN index (created in migration 0004), matched with
+websearch_to_tsquery and ranked with ts_rank.
+
+SQLite: an FTS5 table per model (posts_post_fts, posts_comment_fts) holds a
+copy of the text, kept in step by posts/signals.py and ranked with bm25.
+
+Any other database falls back to DRF's SearchFilter (ILIKE).
+"""
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from .models import Comment, Post
+
+# Model -> text columns indexed for search
+SEARCH_INDEXES = {
+    Post: ('title', 'content'),
+    Comment: ('content',),
+}
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+class PostgresSearch:
+    def match(self, model, query):
+        table = model._meta.db_table
+        return RawSQL(
+            f"SELECT id FROM {table} WHERE search_vector @@ websearch_to_tsquery('english', %s)",
+            [query],
+        )
+
+    def rank(self, model, query):
+        table = model._meta.db_table
+        # ts_rank is real (float4), which doesn't survive the round trip
+        # through a cursor (float8) and compare equal; rank in float8 instead
+        return RawSQL(
+            f"ts_rank({table}.search_vector, websearch_to_tsquery('english', %s))::float8",
+            [query],
+            output_field=FloatField(),
+        )
+
+
+class SQLiteSearch:
+    @staticmethod
+    def fts_query(terms):
+        # Quote every term so user input can't be read as FTS5 syntax
+        return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def match(self, model, query):
+        table = fts_table(model)
+        return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [query])
+
+    def rank(self, model, query):
+        table = fts_table(model)
+        # bm25() is lower-is-better; negate it so both backends rank descending
+        return RawSQL(
+            f'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = {model._meta.db_table}.id',
+            [query],
+            output_field=FloatField(),
+        )
+
+
+BACKENDS = {
+    'postgresql': PostgresSearch(),
+    'sqlite': SQLiteSearch(),
+}
+
+
+def search_backend(using):
+    return BACKENDS.get(connections[using].vendor)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter drop-in using the full-text index of the view's model.
+    Results are annotated with `search_rank` and, unless the client asked for
+    another ?ordering, returned best match first.
+
+    Views may list `search_exact_fields`, matched case-insensitively against
+    whole search terms in addition to the text index (e.g. author__username).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        backend = search_backend(queryset.db)
+        if not terms or backend is None or queryset.model not in SEARCH_INDEXES:
+            return super().filter_queryset(request, queryset, view)
+
+        model = queryset.model
+        if isinstance(backend, SQLiteSearch):
+            query = backend.fts_query(terms)
+        else:
+            query = ' '.join(terms)
+
+        condition = Q(pk__in=backend.match(model, query))
+        for field in getattr(view, 'search_exact_fields', ()):
+            for term in terms:
+                condition |= Q(**{f'{field}__iexact': term})
+        return (
+            queryset.filter(condition)
+            .annotate(search_rank=Coalesce(backend.rank(model, query), 0.0))
+            .order_by('-search_rank', '-pk')
+        )
+
+
+def rebuild_search_index(model, using='default'):
+    """
+    Repopulate a model's SQLite FTS table from scratch (after bulk loads that
+    bypass signals). The Postgres column is generated, so this is a no-op there.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    table = fts_table(model)
+    columns = ', '.join(SEARCH_INDEXES[model])
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {model._meta.db_table}')
+
+
+def update_search_row(instance, using='default', deleted=False):
+    """
+    Refresh one row of the SQLite FTS table after a save or delete.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    model = type(instance)
+    table = fts_table(model)
+    columns = SEARCH_INDEXES[model]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+        if not deleted:
+            placeholders = ', '.join(['%s'] * len(columns))
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(columns)}) VALUES (%s, {placeholders})',
+                [instance.pk] + [getattr(instance, column) for column in columns],
+            )
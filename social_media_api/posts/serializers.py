@@ -1,20 +1,107 @@
 # posts/serializers.py
 from rest_framework import serializers
+from accounts.serializers import UserSummarySerializer
+from social_media_api.sparse_fields import SparseFieldsSerializerMixin
 from .models import Post, Comment, Like
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+    likes_count = serializers.IntegerField(source='like_count', read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'author_username', 'title', 'content', 'created_at', 'updated_at', 'comments_count']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'comments_count']
+        fields = ['id', 'author', 'author_username', 'title', 'content', 'created_at', 'updated_at',
+                  'comments_count', 'likes_count']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'comments_count', 'likes_count']
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         return super().create(validated_data)
 
+    def to_representation(self, post):
+        return self.add_comment_previews(post.pk, super().to_representation(post))
+
+    def finish_values(self, row, data):
+        # Values mode (social_media_api/values_mode.py)
+        return self.add_comment_previews(row['pk'], data)
+
+    def add_comment_previews(self, post_id, data):
+        # Set by views for ?include=comments_preview (posts/previews.py)
+        previews = self.context.get('comment_previews')
+        if previews is not None:
+            data['comments_preview'] = CommentPreviewSerializer(
+                previews.get(post_id, []), many=True, context=self.context
+            ).data
+        return data
+
+
+class CommentPreviewSerializer(serializers.ModelSerializer):
+    """
+    A comment as embedded in a post listing, author included.
+    """
+    author = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'author', 'content', 'created_at']
+        read_only_fields = fields
+
+
+class ViewerPostListSerializer(serializers.ListSerializer):
+    """
+    Looks up the viewer's likes for the whole page before serializing it.
+    """
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        self.child.load_viewer_state([post.pk for post in posts])
+        return super().to_representation(posts)
+
+
+class ExpandedPostSerializer(PostSerializer):
+    """
+    PostSerializer plus the author's summary (avatar included) and whether the
+    requesting user liked the post. A page costs one Like query on top of the
+    posts query; callers that already know the liked ids (the async feed)
+    pass them as context['liked_post_ids'] and it costs none.
+    Querysets must select_related('author').
+    """
+    author_summary = UserSummarySerializer(source='author', read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['author_summary', 'liked_by_me']
+        read_only_fields = PostSerializer.Meta.read_only_fields + ['author_summary', 'liked_by_me']
+        list_serializer_class = ViewerPostListSerializer
+
+    _liked_post_ids = None
+
+    def load_viewer_state(self, post_ids):
+        liked = self.context.get('liked_post_ids')
+        if liked is None:
+            request = self.context.get('request')
+            user = getattr(request, 'user', None)
+            liked = set()
+            if user is not None and user.is_authenticated and post_ids:
+                liked = set(
+                    Like.objects.filter(user=user, post__in=post_ids)
+                    .values_list('post_id', flat=True)
+                )
+        self._liked_post_ids = set(liked)
+
+    def get_liked_by_me(self, post):
+        if self._liked_post_ids is None:
+            self.load_viewer_state([post.pk])
+        return post.pk in self._liked_post_ids
+
+    def prepare_values(self, rows):
+        self.load_viewer_state([row['pk'] for row in rows])
+
+    def values_liked_by_me(self, row):
+        return row['pk'] in self._liked_post_ids
+
+
 class LikeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Like
@@ -29,7 +116,22 @@ class LikeSerializer(serializers.ModelSerializer):
             create_notification(recipient=post.author, actor=comment.author, verb='commented', target=post)
         return comment
     
-class CommentSerializer(serializers.ModelSerializer):
+class LikeToggleSerializer(serializers.Serializer):
+    post = serializers.IntegerField(min_value=1)
+    action = serializers.ChoiceField(choices=['like', 'unlike'])
+
+
+class LikeBatchSerializer(serializers.Serializer):
+    """
+    An ordered list of like/unlike toggles, e.g. replayed from an offline client.
+    """
+    actions = LikeToggleSerializer(many=True, allow_empty=False, max_length=500)
+
+    def toggles(self):
+        return [(item['post'], item['action'] == 'like') for item in self.validated_data['actions']]
+
+
+class CommentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
 
     class Meta:
@@ -0,0 +1,117 @@
+# posts/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+import functools
+
+from .caching import bump_versions, remember_author
+from .feed import backfill_feed, fanout_queue, is_fanout_author, remove_from_feed
+from .models import Comment, Like, Post
+from .search import update_search_row
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def decide_fan_out(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance.fanned_out = is_fanout_author(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        fanout_queue.post_created(instance)
+
+
+def bump_on_commit(using, **affected):
+    # After commit: a read between the bump and the commit would cache the
+    # old rows under the new version
+    transaction.on_commit(functools.partial(bump_versions, **affected), using=using)
+
+
+@receiver(post_save, sender=Post)
+def remember_new_post_author(sender, instance, created, **kwargs):
+    if created:
+        remember_author(instance.pk, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_cached_post(sender, instance, using, **kwargs):
+    bump_on_commit(using, post_ids=[instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_cached_parent_post(sender, instance, using, **kwargs):
+    bump_on_commit(using, post_ids=[instance.post_id])
+
+
+# User fields embedded in cached post responses (author_username, author
+# summaries in expanded posts and comment previews)
+CACHED_USER_FIELDS = {'username', 'profile_picture', 'profile_picture_variants', 'follower_count'}
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_authors(sender, instance, created, using, update_fields, **kwargs):
+    if created:
+        return
+    if update_fields is None or CACHED_USER_FIELDS.intersection(update_fields):
+        bump_on_commit(using, user_ids=[instance.pk])
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def invalidate_cached_follower_counts(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Follower counts changed for the followees (accounts/signals.py records
+    the removed edges before they go).
+    """
+    if action == 'post_add':
+        followees = [instance.pk] if reverse else list(pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        followees = {followee for _, followee in getattr(instance, '_removed_follow_edges', [])}
+    else:
+        return
+    if followees:
+        bump_on_commit(using, user_ids=followees)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance, using, **kwargs):
+    update_search_row(instance, using)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def unindex_for_search(sender, instance, using, **kwargs):
+    update_search_row(instance, using, deleted=True)
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def sync_feed_on_follow_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep materialized feeds in step with follows made from either side
+    (`alice.following.add(bob)` or `bob.followers.add(alice)`).
+    """
+    if action == 'post_add':
+        if reverse:
+            for follower_id in pk_set:
+                backfill_feed(follower_id, [instance.pk])
+        else:
+            backfill_feed(instance.pk, pk_set)
+    elif action == 'post_remove':
+        if reverse:
+            for follower_id in pk_set:
+                remove_from_feed(follower_id, [instance.pk])
+        else:
+            remove_from_feed(instance.pk, pk_set)
+    elif action == 'pre_clear':
+        if reverse:
+            follower_ids = list(instance.followers.values_list('id', flat=True))
+            for follower_id in follower_ids:
+                remove_from_feed(follower_id, [instance.pk])
+        else:
+            remove_from_feed(instance.pk)
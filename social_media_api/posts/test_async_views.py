@@ -0,0 +1,133 @@
+# posts/tests/test_async_views.py
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache, caches
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from accounts.authentication import local_cache
+from accounts.models import User
+from posts.models import Comment, Post, Like
+from notifications.dispatch import notify
+from social_media_api.async_api import gather_queries
+
+
+@override_settings(ROOT_URLCONF='social_media_api.asgi_urls')
+class AsyncReadViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        local_cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.alice.following.add(self.bob)
+        self.posts = [Post.objects.create(author=self.bob, title=f'T{i}', content='C') for i in range(3)]
+        Like.objects.create(user=self.alice, post=self.posts[1])
+        self.auth = {'Authorization': f'Token {Token.objects.create(user=self.alice).key}'}
+
+    async def test_feed_pages_with_like_state(self):
+        res = await self.async_client.get('/api/feed/?page_size=2', headers=self.auth)
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual([(p['title'], p['liked_by_me']) for p in body['results']], [('T2', False), ('T1', True)])
+        res = await self.async_client.get(body['next'], headers=self.auth)
+        self.assertEqual([p['title'] for p in res.json()['results']], ['T0'])
+
+    async def test_sparse_fields(self):
+        res = await self.async_client.get('/api/feed/?page_size=2&fields=title,liked_by_me', headers=self.auth)
+        self.assertEqual(res.json()['results'], [{'title': 'T2', 'liked_by_me': False}, {'title': 'T1', 'liked_by_me': True}])
+        res = await self.async_client.get(res.json()['next'], headers=self.auth)
+        self.assertEqual(res.json()['results'], [{'title': 'T0', 'liked_by_me': False}])
+        res = await self.async_client.get(f'/api/posts/{self.posts[0].pk}/?omit=content')
+        self.assertNotIn('content', res.json())
+        res = await self.async_client.get('/api/feed/?fields=nope', headers=self.auth)
+        self.assertEqual(res.status_code, 400)
+
+    async def test_comment_previews(self):
+        for text in ('first', 'second'):
+            await Comment.objects.acreate(post=self.posts[2], author=self.alice, content=text)
+        res = await self.async_client.get('/api/feed/?page_size=2&include=comments_preview', headers=self.auth)
+        self.assertEqual([[c['content'] for c in p['comments_preview']] for p in res.json()['results']],
+                         [['first', 'second'], []])
+        res = await self.async_client.get(f'/api/posts/{self.posts[2].pk}/?include=comments_preview')
+        self.assertEqual(res.json()['comments_preview'][0]['author']['username'], 'alice')
+        res = await self.async_client.get(f'/api/posts/{self.posts[2].pk}/')
+        self.assertNotIn('comments_preview', res.json())
+
+    async def test_feed_requires_token(self):
+        res = await self.async_client.get('/api/feed/')
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+        res = await self.async_client.get('/api/feed/', headers={'Authorization': 'Token nope'})
+        self.assertEqual((res.status_code, res.json()['detail']), (401, 'Invalid token.'))
+
+    async def test_post_detail_is_public_and_delegates_writes(self):
+        post = self.posts[0]
+        res = await self.async_client.get(f'/api/posts/{post.pk}/')
+        self.assertEqual((res.status_code, res.json()['title']), (200, 'T0'))
+        self.assertEqual((await self.async_client.get('/api/posts/999/')).status_code, 404)
+        res = await self.async_client.patch(f'/api/posts/{post.pk}/', {'title': 'New'},
+                                            content_type='application/json', headers=self.auth)
+        self.assertEqual(res.status_code, 403)  # alice doesn't own bob's post
+
+    def test_post_detail_shares_the_response_cache_and_etags(self):
+        url = f'/api/posts/{self.posts[0].pk}/'
+        with override_settings(ROOT_URLCONF='social_media_api.urls'):
+            etag = self.client.get(url)['ETag']
+        res = self.client.get(url)
+        self.assertEqual((res.status_code, res['ETag'], res.json()['title']), (200, etag, 'T0'))
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.assertEqual(self.client.get(url).json()['title'], 'T0')
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        self.posts[0].title = 'New'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].save()  # bumps the content version on commit
+        res = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual((res.status_code, res.json()['title']), (200, 'New'))
+        self.assertNotEqual(res['ETag'], etag)
+
+    async def test_notification_list(self):
+        await sync_to_async(notify)(self.alice.pk, self.bob.pk, 'followed')
+        res = await self.async_client.get('/api/notifications/', headers=self.auth)
+        self.assertEqual([n['verb'] for n in res.json()['results']], ['followed'])
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    async def test_query_budget_counts_async_queries(self):
+        res = await self.async_client.get('/api/notifications/', headers=self.auth)
+        self.assertEqual(res['X-Query-Count'], '2')  # token (cold cache) + page
+
+
+@override_settings(ROOT_URLCONF='social_media_api.asgi_urls', ASYNC_PARALLEL_QUERIES=True)
+class ParallelQueryTests(TransactionTestCase):
+    """
+    The concurrent path, off for the rest of the suite: each query needs a
+    connection that sees committed data rather than the test transaction.
+    """
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.alice.following.add(bob)
+        self.posts = [Post.objects.create(author=bob, title=f'T{i}', content='C') for i in range(3)]
+        Like.objects.create(user=self.alice, post=self.posts[1])
+        self.auth = {'Authorization': f'Token {Token.objects.create(user=self.alice).key}'}
+
+    async def test_feed_runs_queries_concurrently(self):
+        await Comment.objects.acreate(post=self.posts[1], author=self.alice, content='hi')
+        res = await self.async_client.get('/api/feed/?page_size=2&include=comments_preview', headers=self.auth)
+        self.assertEqual([(p['title'], p['liked_by_me'], len(p['comments_preview'])) for p in res.json()['results']],
+                         [('T2', False, 0), ('T1', True, 1)])
+
+    def test_pool_threads_keep_their_connections(self):
+        wrapper = type(connections['default'])
+        with mock.patch.dict(connections['default'].settings_dict, CONN_MAX_AGE=60), \
+                mock.patch.object(wrapper, 'close', autospec=True, side_effect=wrapper.close) as close:
+            counts = async_to_sync(gather_queries)(Post.objects.count, Like.objects.count)
+        self.assertEqual(counts, [3, 1])
+        close.assert_not_called()
@@ -0,0 +1,99 @@
+# posts/tests/test_benchmark.py
+import io
+import json
+import os
+import tempfile
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from accounts.authentication import local_cache
+from accounts.models import User
+from posts.models import FeedEntry, Post
+from social_media_api import benchmark
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        local_cache.clear()
+
+    def test_generated_graph_is_reproducible_and_skewed(self):
+        graph = benchmark.generate_graph(users=60, posts_per_user=2, follows_per_user=6, seed=7)
+        self.assertEqual((len(graph.user_ids), len(graph.post_ids)), (60, 120))
+        counts = sorted(User.objects.filter(pk__in=graph.user_ids).values_list('follower_count', flat=True))
+        self.assertGreater(counts[-1], 5 * max(counts[len(counts) // 2], 1))
+        self.assertTrue(FeedEntry.objects.exists())
+
+        edges = set(User.following.through.objects.values_list('from_user_id', 'to_user_id'))
+        self.assertEqual(benchmark.cleanup(graph.user_ids), 60)
+        self.assertFalse(Post.objects.exists())
+        benchmark.generate_graph(users=60, posts_per_user=2, follows_per_user=6, seed=7)
+        offset = User.objects.order_by('pk').first().pk - graph.user_ids[0]
+        again = {(a - offset, b - offset) for a, b in User.following.through.objects.values_list(
+            'from_user_id', 'to_user_id')}
+        self.assertEqual(again, edges)
+
+    def test_list_scenarios_follow_next_cursors(self):
+        graph = benchmark.generate_graph(users=10, posts_per_user=3, follows_per_user=2)
+        with benchmark.InProcessTarget() as target:
+            benchmark.run_scenario(target, graph, 'post_list', requests=5, warmup=0)
+            pages = graph.pages['post_list']
+            self.assertEqual(len(pages), 3)  # 30 posts, 10 per page
+            self.assertTrue(all('cursor=' in path for path in pages[1:]))
+            token = graph.tokens[graph.user_ids[0]]
+            ids = [post['id'] for path in pages for post in target.get_json(path, token)['results']]
+        self.assertEqual(sorted(ids), sorted(graph.post_ids))
+
+    def test_summarize_percentiles(self):
+        samples = [(ms / 1000, 200, '2') for ms in range(1, 101)] + [(0.5, 500, None)]
+        stats = benchmark.summarize(samples, elapsed=2.0)
+        self.assertEqual((stats['p50_ms'], stats['p99_ms']), (51.0, 100.0))
+        self.assertEqual((stats['errors'], stats['queries_per_request']), (1, 2.0))
+        self.assertEqual(stats['throughput_rps'], 50.5)
+
+    def test_command_writes_comparable_results(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        # Already inside the test database
+        options = dict(users=30, posts_per_user=2, follows_per_user=4, requests=5, warmup=1, live_database=True,
+                       stdout=io.StringIO())
+        call_command('benchmark_api', output=path, **options)
+        with open(path, encoding='utf-8') as f:
+            results = json.load(f)
+        self.assertEqual(set(results['scenarios']), set(benchmark.SCENARIOS))
+        for stats in results['scenarios'].values():
+            self.assertEqual((stats['requests'], stats['errors']), (5, 0))
+            self.assertIsNotNone(stats['queries_per_request'])
+        self.assertFalse(User.objects.filter(username__startswith=benchmark.PREFIX).exists())
+
+        out = io.StringIO()
+        call_command('benchmark_api', compare=path, scenarios='feed', **{**options, 'stdout': out})
+        self.assertIn('feed: p50_ms', out.getvalue())
+
+    def test_live_runs_leave_existing_users_alone(self):
+        real = User.objects.create_user(username=f'{benchmark.PREFIX}fan', password='Pass123!')
+        options = dict(users=5, requests=1, warmup=0, live_database=True, stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, '--keep-data'):
+            call_command('benchmark_api', **options)
+        graph = benchmark.generate_graph(users=5, posts_per_user=1, follows_per_user=1, seed=3)
+        benchmark.cleanup(graph.user_ids)
+        self.assertTrue(User.objects.filter(pk=real.pk).exists())
+
+        with self.assertRaisesMessage(CommandError, '--live-database'):
+            call_command('benchmark_api', url='http://127.0.0.1:9', users=5, stdout=io.StringIO())
+
+    def test_rendering_benchmark_compares_both_paths(self):
+        benchmark.generate_posts(40)
+        results = benchmark.rendering_benchmark(rows=30, repeat=1, expanded=True)
+        self.assertEqual(set(results), {'instances', 'values'})
+        self.assertEqual(results['instances']['rows'], 30)
+        self.assertEqual(results['instances']['bytes'], results['values']['bytes'])
+
+        out = io.StringIO()
+        call_command('benchmark_rendering', rows=50, repeat=1, keep_data=True, live_database=True, stdout=out)
+        self.assertIn('values + fast renderer', out.getvalue())
+        self.assertEqual(Post.objects.filter(author__username=benchmark.RENDER_AUTHOR).count(), 50)
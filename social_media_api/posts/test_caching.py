@@ -0,0 +1,122 @@
+# posts/tests/test_caching.py
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts import likes
+from posts.models import Post, Like
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='patrick', password='SafePass123!')
+        self.post = Post.objects.create(author=self.user, title='T1', content='C1')
+
+    def test_anonymous_list_is_served_from_cache(self):
+        url = reverse('post-list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.data['results'][0]['title'], 'T1')
+
+    def test_query_params_are_normalized(self):
+        self.client.get(reverse('post-list') + '?ordering=title&search=')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('post-list') + '?ordering=title')
+
+    def test_writes_invalidate(self):
+        url = reverse('post-detail', args=[self.post.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.user, post=self.post)
+            Post.objects.create(author=self.user, title='T2', content='C2')
+        self.assertEqual(len(self.client.get(reverse('post-list')).data['results']), 2)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_conditional_requests_get_304(self):
+        url = reverse('post-detail', args=[self.post.id])
+        first = self.client.get(url)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(res.status_code, 304)
+        self.post.title = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual((res.status_code, res.data['title']), (200, 'Edited'))
+
+    def test_only_etags_validate(self):
+        # Last-Modified has one-second resolution; a write within the same
+        # second would leave it unchanged
+        url = reverse('post-detail', args=[self.post.id])
+        first = self.client.get(url)
+        self.assertNotIn('Last-Modified', first)
+        self.post.title = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual((res.status_code, res.data['title']), (200, 'Edited'))
+
+    def test_writes_retire_only_the_responses_they_affect(self):
+        other_author = User.objects.create_user(username='other', password='SafePass123!')
+        other = Post.objects.create(author=other_author, title='T2', content='C2')
+        urls = {name: reverse('post-detail', args=[post.id]) for name, post in (('mine', self.post), ('other', other))}
+        urls['list'] = reverse('post-list')
+        for url in urls.values():
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            likes.like(self.user.pk, self.post.pk)
+        with self.assertNumQueries(0):
+            self.client.get(urls['other'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(urls['mine']).data['likes_count'], 1)
+        with self.assertNumQueries(1):
+            self.client.get(urls['list'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other_author.username = 'renamed'
+            other_author.save()
+        with self.assertNumQueries(0):
+            self.client.get(urls['mine'])
+        self.assertEqual(self.client.get(urls['other']).data['author_username'], 'renamed')
+
+    @override_settings(RESPONSE_CACHE_ALLOW_PER_PROCESS=False)
+    def test_per_process_cache_is_not_used(self):
+        # Other workers would never see a bump made in this one
+        url = reverse('post-detail', args=[self.post.id])
+        self.assertNotIn('ETag', self.client.get(url))
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_version_is_bumped_only_on_commit(self):
+        url = reverse('post-detail', args=[self.post.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+            # Still the committed state: a read here must not see a new version
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).data['title'], 'T1')
+        self.assertEqual(self.client.get(url).data['title'], 'Edited')
+
+    def test_author_changes_invalidate(self):
+        url = reverse('post-detail', args=[self.post.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = 'patrick2'
+            self.user.save()
+        self.assertEqual(self.client.get(url).data['author_username'], 'patrick2')
+        # Saves that leave embedded fields alone keep the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_authenticated_responses_are_not_stored(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('post-list'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('post-list'))
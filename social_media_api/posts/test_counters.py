@@ -0,0 +1,57 @@
+# posts/tests/test_counters.py
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post, Comment, Like
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.client.force_authenticate(self.alice)
+        self.post = Post.objects.create(author=self.bob, title='T', content='C')
+
+    def test_like_and_unlike_update_like_count(self):
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.client.post(reverse('post-unlike', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_update_comment_count(self):
+        res = self.client.post(reverse('comment-list'), {'post': self.post.id, 'content': 'Hi'}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.client.delete(reverse('comment-detail', args=[res.data['id']]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_post_save_does_not_overwrite_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        stale.title = 'Edited'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.like_count), ('Edited', 1))
+
+    def test_list_runs_constant_queries(self):
+        for i in range(5):
+            Post.objects.create(author=self.bob, title=f'P{i}', content='C')
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('post-list'))
+        self.assertEqual(res.data['results'][0]['likes_count'], 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Like.objects.create(user=self.alice, post=self.post)
+        Comment.objects.create(post=self.post, author=self.alice, content='x')
+        out = StringIO()
+        call_command('reconcile_post_counters', batch_size=1, stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+        self.assertIn('Fixed 1', out.getvalue())
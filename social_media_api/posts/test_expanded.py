@@ -0,0 +1,44 @@
+# posts/tests/test_expanded.py
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post, Like
+
+
+class ExpandedPostTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.alice.following.add(self.bob)
+        self.posts = [Post.objects.create(author=self.bob, title=f'T{i}', content='C') for i in range(4)]
+        for post in self.posts[:2]:
+            Like.objects.create(user=self.alice, post=post)
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[:2]]).update(like_count=1)
+        self.client.force_authenticate(self.alice)
+
+    def test_feed_embeds_author_and_like_state_in_fixed_queries(self):
+        with self.assertNumQueries(4):  # following ids + pulled authors + page + likes for the page
+            res = self.client.get(reverse('feed'))
+        with self.assertNumQueries(3):  # following ids are cached now
+            self.client.get(reverse('feed'))
+        liked = {p['title']: (p['liked_by_me'], p['likes_count']) for p in res.data['results']}
+        self.assertEqual(liked, {'T0': (True, 1), 'T1': (True, 1), 'T2': (False, 0), 'T3': (False, 0)})
+        author = res.data['results'][0]['author_summary']
+        self.assertEqual((author['id'], author['username']), (self.bob.id, 'bob'))
+
+    def test_post_list_expands_on_request(self):
+        res = self.client.get(reverse('post-list'))
+        self.assertNotIn('liked_by_me', res.data['results'][0])
+        with self.assertNumQueries(2):
+            res = self.client.get(reverse('post-list') + '?expand=1')
+        self.assertEqual(sum(p['liked_by_me'] for p in res.data['results']), 2)
+
+    def test_retrieve_and_anonymous(self):
+        res = self.client.get(reverse('post-detail', args=[self.posts[0].pk]) + '?expand=1')
+        self.assertTrue(res.data['liked_by_me'])
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('post-list') + '?expand=1')
+        self.assertFalse(any(p['liked_by_me'] for p in res.data['results']))
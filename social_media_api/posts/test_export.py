@@ -0,0 +1,69 @@
+# posts/tests/test_export.py
+import csv
+import io
+import json
+import os
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post, Comment, Like
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='Pass123!', is_staff=True)
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.posts = [Post.objects.create(author=self.alice, title=f'T{i}', content='héllo, "world"') for i in range(3)]
+        Comment.objects.create(post=self.posts[0], author=self.alice, content='hi')
+        Like.objects.create(user=self.admin, post=self.posts[1])
+
+    def fetch(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        self.assertFalse(res.is_async)
+        return b''.join(res.streaming_content).decode()
+
+    def test_ndjson_export_streams_every_row(self):
+        self.client.force_authenticate(self.admin)
+        body = self.fetch(reverse('export', args=['posts']))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['T0', 'T1', 'T2'])
+        self.assertEqual(rows[0]['content'], 'héllo, "world"')
+
+    def test_csv_export(self):
+        self.client.force_authenticate(self.admin)
+        body = self.fetch(reverse('export', args=['likes']) + '?as=csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([(int(r['user_id']), int(r['post_id'])) for r in rows], [(self.admin.id, self.posts[1].id)])
+
+    async def test_asgi_export_streams_asynchronously(self):
+        token = await sync_to_async(Token.objects.create)(user=self.admin)
+        res = await self.async_client.get(reverse('export', args=['posts']) + '?as=csv',
+                                          headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_async)
+        body = b''.join([part async for part in res.streaming_content]).decode()
+        self.assertEqual([row['title'] for row in csv.DictReader(io.StringIO(body))], ['T0', 'T1', 'T2'])
+
+    def test_admin_only_and_validation(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(reverse('export', args=['posts'])).status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(reverse('export', args=['users'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export', args=['posts']) + '?as=xml').status_code, 400)
+
+    def test_management_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'comments.csv')
+            out = io.StringIO()
+            call_command('export_data', 'comments', '--format', 'csv', '--output', path, '--chunk-size', '1', stdout=out)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([r['content'] for r in rows], ['hi'])
+        self.assertIn('Exported 1 comments', out.getvalue())
@@ -0,0 +1,124 @@
+# posts/tests/test_import.py
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from accounts import graph
+from accounts.models import User
+from posts.exporting import export_lines
+from posts.importing import Importer
+from posts.models import Comment, FeedEntry, Post
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.records = [
+            {'type': 'user', 'id': 10, 'username': 'alice'},
+            {'type': 'user', 'id': 11, 'username': 'bob', 'password': make_password('BobPass123!')},
+            {'type': 'follow', 'follower_id': 11, 'followee_id': 10},
+            {'type': 'post', 'id': 20, 'author_id': 10, 'title': 'Imported', 'content': 'bulk',
+             'created_at': '2024-01-02T03:04:05+00:00'},
+            {'type': 'comment', 'id': 30, 'post_id': 20, 'author_id': 11, 'content': 'nice'},
+        ]
+
+    def run_import(self, text, *args):
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        out = io.StringIO()
+        try:
+            call_command('import_data', path, *args, stdout=out)
+        finally:
+            os.remove(path)
+        return out.getvalue()
+
+    def test_imports_records_and_rebuilds_derived_data(self):
+        out = self.run_import(ndjson(*self.records), '--batch-size', '2', '--password', 'Secret123!')
+        self.assertIn('Imported 2 users, 1 follows, 1 posts, 1 comments', out)
+
+        alice, bob = User.objects.get(pk=10), User.objects.get(pk=11)
+        self.assertTrue(alice.check_password('Secret123!'))
+        self.assertEqual((alice.follower_count, bob.following_count), (1, 1))
+        self.assertTrue(bob.check_password('BobPass123!'))
+        self.assertTrue(graph.is_following(bob.pk, alice.pk))
+
+        post = Post.objects.get(pk=20)
+        self.assertEqual(post.created_at.year, 2024)
+        self.assertEqual(post.comment_count, 1)
+        self.assertTrue(FeedEntry.objects.filter(user=bob, post=post).exists())
+
+        # Sequences continue past the imported ids
+        self.assertGreater(Post.objects.create(author=alice, title='New', content='x').pk, 20)
+
+    def test_reimport_skips_existing_rows(self):
+        self.run_import(ndjson(*self.records))
+        self.run_import(ndjson(*self.records))
+        self.assertEqual((User.objects.count(), Post.objects.count(), Comment.objects.count()), (2, 1, 1))
+        self.assertEqual(User.objects.get(pk=10).follower_count, 1)
+
+    def test_counts_only_rows_inserted(self):
+        self.run_import(ndjson(*self.records[:3]))
+        importer = Importer(use_copy=False)
+        importer.add_lines(ndjson(*self.records, self.records[3]).splitlines())
+        self.assertEqual(dict(importer.counts), {'user': 0, 'follow': 0, 'post': 1, 'comment': 1})
+
+    def test_reimport_keeps_live_timestamps(self):
+        self.run_import(ndjson(*self.records))
+        post = Post.objects.get(pk=20)
+        post.title = 'Edited'
+        post.save()
+        self.run_import(ndjson(*self.records))
+        self.assertEqual(Post.objects.values_list('created_at', 'updated_at').get(pk=20),
+                         (post.created_at, post.updated_at))
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_posts_fan_out_against_counts_from_the_same_import(self):
+        records = self.records[:2] + [
+            {'type': 'user', 'id': 12, 'username': 'carol'},
+            {'type': 'follow', 'follower_id': 12, 'followee_id': 10},
+        ] + self.records[2:]
+        self.run_import(ndjson(*records))
+        self.assertEqual(User.objects.get(pk=10).follower_count, 2)
+        self.assertFalse(Post.objects.get(pk=20).fanned_out)
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_reads_export_output_with_type_option(self):
+        self.run_import(ndjson(*self.records[:2]))
+        Post.objects.create(author_id=10, title='Round trip', content='c')
+        exported = ''.join(export_lines('posts'))
+        Post.objects.all().delete()
+        self.run_import(exported, '--type', 'post')
+        self.assertEqual(list(Post.objects.values_list('title', 'like_count')), [('Round trip', 0)])
+
+    def test_round_trip_keeps_timestamps(self):
+        self.run_import(ndjson(*self.records[:2]))
+        post = Post.objects.create(author_id=10, title='Round trip', content='c')
+        # Finer than the milliseconds DjangoJSONEncoder keeps
+        Post.objects.filter(pk=post.pk).update(created_at=datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc))
+        before = list(Post.objects.values_list('id', 'created_at', 'updated_at'))
+        exported = ''.join(export_lines('posts'))
+        Post.objects.all().delete()
+        self.run_import(exported, '--type', 'post')
+        self.assertEqual(list(Post.objects.values_list('id', 'created_at', 'updated_at')), before)
+
+    def test_bad_record_reports_line(self):
+        with self.assertRaisesMessage(CommandError, 'Line 2: post is missing author_id'):
+            self.run_import(ndjson(self.records[0], {'type': 'post', 'id': 1, 'title': 'x'}))
+
+    def test_chunks_are_written_in_dependency_order(self):
+        importer = Importer(batch_size=100)
+        importer.add_lines(reversed(ndjson(*self.records).splitlines()))
+        importer.finish()
+        self.assertEqual(Comment.objects.get().post_id, 20)
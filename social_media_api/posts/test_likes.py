@@ -1,11 +1,15 @@
 # posts/tests/test_likes.py
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from django.urls import reverse
 from accounts.models import User
 from posts.models import Post, Like
 from notifications.models import Notification
+from notifications.dispatch import dispatcher
+from rest_framework.authtoken.models import Token
+from social_media_api.query_budget import QueryBudgetTestMixin
 
-class LikesTests(APITestCase):
+class LikesTests(QueryBudgetTestMixin, APITestCase):
     def setUp(self):
         self.alice = User.objects.create_user(username='alice', password='Pass123!')
         self.bob = User.objects.create_user(username='bob', password='Pass123!')
@@ -25,3 +29,75 @@ class LikesTests(APITestCase):
         res = self.client.post(url)
         self.assertEqual(res.status_code, 200)
         self.assertEqual(Like.objects.count(), 0)
+
+    def test_like_is_idempotent_and_counts_once(self):
+        url = reverse('post-like', args=[self.post.id])
+        self.assertEqual(self.client.post(url).status_code, 201)
+        res = self.client.post(url)
+        self.assertEqual(res.data['detail'], 'Already liked.')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, Like.objects.count()), (1, 1))
+
+    @override_settings(NOTIFICATION_DISPATCH_MODE='manual')
+    def test_like_skips_loading_post_and_author(self):
+        with self.assertNumQueries(2):  # insert + counter bump (one statement on Postgres)
+            res = self.client.post(reverse('post-like', args=[self.post.id]))
+        dispatcher.flush()
+        self.assertEqual(Notification.objects.get().recipient, self.bob)
+        self.assertEqual(res.data['like']['post'], self.post.id)
+        self.assertIsNotNone(res.data['like']['created_at'])
+
+    def test_like_and_unlike_missing_post(self):
+        self.assertEqual(self.client.post(reverse('post-like', args=[999])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('post-unlike', args=[999])).status_code, 404)
+
+    def test_unlike_decrements_counter(self):
+        self.client.post(reverse('post-like', args=[self.post.id]))
+        self.client.post(reverse('post-unlike', args=[self.post.id]))
+        res = self.client.post(reverse('post-unlike', args=[self.post.id]))
+        self.assertEqual(res.status_code, 400)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_batch_applies_final_state_per_post(self):
+        other = Post.objects.create(author=self.bob, title='T2', content='C2')
+        Like.objects.create(user=self.alice, post=other)
+        Post.objects.filter(pk=other.pk).update(like_count=1)
+        actions = [
+            {'post': self.post.id, 'action': 'like'},
+            {'post': self.post.id, 'action': 'unlike'},
+            {'post': self.post.id, 'action': 'like'},
+            {'post': other.id, 'action': 'unlike'},
+            {'post': 999, 'action': 'like'},
+        ]
+        res = self.client.post(reverse('like-batch'), {'actions': actions}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['results'], [
+            {'post': self.post.id, 'liked': True, 'changed': True},
+            {'post': other.id, 'liked': False, 'changed': True},
+        ])
+        self.assertEqual(res.data['missing'], [999])
+        self.assertEqual(list(Like.objects.values_list('post_id', flat=True)), [self.post.id])
+        counts = dict(Post.objects.values_list('id', 'like_count'))
+        self.assertEqual((counts[self.post.id], counts[other.id]), (1, 0))
+        self.assertEqual(Notification.objects.filter(recipient=self.bob, verb='liked').count(), 1)
+
+    def test_batch_validates_actions(self):
+        res = self.client.post(reverse('like-batch'), {'actions': [{'post': 1, 'action': 'love'}]}, format='json')
+        self.assertEqual(res.status_code, 400)
+
+    def test_views_stay_within_budget_with_inline_notifications(self):
+        other = Post.objects.create(author=self.alice, title='T2', content='C2')
+        third = Post.objects.create(author=self.bob, title='T3', content='C3')
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.bob).key}')
+        # View budgets are strict under QueryBudgetTestMixin; the block bounds the whole sequence
+        with self.assertQueryBudget(6 + 3):
+            self.assertEqual(self.client.post(reverse('post-like', args=[other.id])).status_code, 201)
+            self.assertEqual(self.client.post(reverse('post-unlike', args=[other.id])).status_code, 200)
+        carol = User.objects.create_user(username='carol', password='Pass123!')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=carol).key}')
+        actions = [{'post': post_id, 'action': 'like'} for post_id in (other.id, self.post.id, third.id)]
+        res = self.client.post(reverse('like-batch'), {'actions': actions}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(Notification.objects.filter(actor=carol).count(), 3)
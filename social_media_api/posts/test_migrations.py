@@ -0,0 +1,37 @@
+# posts/tests/test_migrations.py
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class FeedBackfillMigrationTests(TransactionTestCase):
+    migrate_from = [('accounts', '0003_profile_picture_variants'), ('posts', '0006_post_fanned_out')]
+    migrate_to = [('accounts', '0003_profile_picture_variants'), ('posts', '0007_backfill_feed_entries')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_posts_are_copied_into_follower_feeds(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('accounts', 'User')
+        Post = apps.get_model('posts', 'Post')
+        alice = User.objects.create(username='alice')
+        bob = User.objects.create(username='bob')
+        carol = User.objects.create(username='carol', follower_count=1)
+        alice.following.add(bob, carol)
+        pushed = Post.objects.create(author=bob, title='T1', content='C')
+        pulled = Post.objects.create(author=carol, title='T2', content='C', fanned_out=False)
+        Post.objects.create(author=alice, title='T3', content='C')
+
+        apps = self.migrate(self.migrate_to)
+        FeedEntry = apps.get_model('posts', 'FeedEntry')
+        entries = list(FeedEntry.objects.values_list('user_id', 'post_id', 'created_at'))
+        self.assertEqual(entries, [(alice.pk, pushed.pk, pushed.created_at)])
+        self.assertFalse(FeedEntry.objects.filter(post_id=pulled.pk).exists())
@@ -0,0 +1,69 @@
+# posts/tests/test_pagination.py
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post
+from social_media_api.pagination import encode_cursor
+from notifications.models import Notification
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='patrick', password='SafePass123!')
+        self.client.force_authenticate(self.user)
+        for i in range(25):
+            Post.objects.create(author=self.user, title=f'T{i:02d}', content='C')
+        # Identical timestamps force the id tie-breaker to do the work
+        Post.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        titles, pages = [], 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertNotIn('count', res.data)
+            titles += [p['title'] for p in res.data['results']]
+            url = res.data['next']
+            pages += 1
+        return titles, pages
+
+    def test_next_links_cover_every_row_once(self):
+        titles, pages = self.walk(reverse('post-list'))
+        self.assertEqual(pages, 3)
+        self.assertEqual(titles, [f'T{i:02d}' for i in reversed(range(25))])
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('post-list'))
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_ordering_param_is_used_as_key(self):
+        titles, _ = self.walk(reverse('post-list') + '?ordering=title&page_size=7')
+        self.assertEqual(titles, sorted(titles))
+        self.assertEqual(len(titles), 25)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(reverse('post-list') + '?cursor=not-a-cursor')
+        self.assertEqual(res.status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        for position in (['garbage', 1], [{'a': 1}, 1], [None, 1], ['2024-01-01T00:00:00+00:00', 'x'],
+                         ['2024-01-01T00:00:00+00:00', [1]]):
+            res = self.client.get(reverse('post-list'), {'cursor': encode_cursor(position)})
+            self.assertEqual(res.status_code, 404, position)
+        res = self.client.get(reverse('post-list'), {'cursor': encode_cursor([1.5, 3]), 'ordering': 'title'})
+        self.assertEqual(res.status_code, 200)  # titles are strings; 1.5 is just a title
+        res = self.client.get(reverse('post-list'), {'cursor': encode_cursor(['nope', 1]), 'search': 'T01'})
+        self.assertEqual(res.status_code, 404)  # search_rank is a float annotation
+
+    def test_notifications_keyed_on_timestamp(self):
+        for _ in range(12):
+            Notification.objects.create(recipient=self.user, verb='followed')
+        res = self.client.get(reverse('notifications'))
+        ids = [n['id'] for n in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [n['id'] for n in res.data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 12)
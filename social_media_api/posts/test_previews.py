@@ -0,0 +1,54 @@
+# posts/tests/test_previews.py
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Comment, Post
+from social_media_api.query_budget import QueryBudgetTestMixin
+
+
+@override_settings(COMMENT_PREVIEW_SIZE=2)
+class CommentPreviewTests(QueryBudgetTestMixin, APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.alice.following.add(self.bob)
+        self.posts = [Post.objects.create(author=self.bob, title=f'T{i}', content='C') for i in range(3)]
+        for i in range(4):
+            Comment.objects.create(post=self.posts[0], author=self.alice if i % 2 else self.bob, content=f'c{i}')
+        Comment.objects.create(post=self.posts[1], author=self.alice, content='only')
+        self.client.force_authenticate(self.alice)
+
+    def previews(self, res):
+        return {p['title']: [c['content'] for c in p['comments_preview']] for p in res.data['results']}
+
+    def test_list_embeds_latest_comments_with_authors(self):
+        res = self.client.get(reverse('post-list'), {'include': 'comments_preview'})
+        self.assertEqual(self.previews(res), {'T0': ['c2', 'c3'], 'T1': ['only'], 'T2': []})
+        first = res.data['results'][-1]['comments_preview'][1]
+        self.assertEqual((first['author']['id'], first['author']['username']), (self.alice.id, 'alice'))
+
+    def test_not_included_by_default(self):
+        res = self.client.get(reverse('post-list'))
+        self.assertNotIn('comments_preview', res.data['results'][0])
+
+    def test_queries_per_page_do_not_grow_with_comments(self):
+        url = reverse('post-list')
+        with self.assertNumQueries(2):  # page + previews
+            self.client.get(url, {'include': 'comments_preview'})
+        for post in self.posts:
+            for i in range(5):
+                Comment.objects.create(post=post, author=self.bob, content=f'more {i}')
+        with self.assertNumQueries(3):  # page + likes + previews
+            res = self.client.get(url, {'include': 'comments_preview', 'expand': '1'})
+        self.assertEqual(self.previews(res)['T2'], ['more 3', 'more 4'])
+        self.assertIn('liked_by_me', res.data['results'][0])
+
+    def test_retrieve_and_feed(self):
+        res = self.client.get(reverse('post-detail', args=[self.posts[1].pk]), {'include': 'comments_preview'})
+        self.assertEqual([c['content'] for c in res.data['comments_preview']], ['only'])
+        with self.assertNumQueries(5):  # following ids + pulled authors + page + likes + previews
+            res = self.client.get(reverse('feed'), {'include': 'comments_preview'})
+        self.assertEqual(self.previews(res)['T0'], ['c2', 'c3'])
@@ -0,0 +1,65 @@
+# posts/tests/test_query_budget.py
+from unittest import mock
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from accounts.models import User
+from posts.models import Post, Comment
+from posts.views import PostViewSet
+from social_media_api.query_budget import QueryBudgetExceeded, QueryBudgetTestMixin, QueryRecorder
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.client.force_authenticate(self.alice)
+        self.alice.following.add(self.bob)
+        for i in range(5):
+            post = Post.objects.create(author=self.bob, title=f'T{i}', content='C')
+            Comment.objects.create(post=post, author=self.alice, content='hi')
+
+    def test_list_endpoints_stay_within_budget_without_duplicates(self):
+        budgets = {'post-list': 3, 'comment-list': 3, 'feed': 4, 'notifications': 3}
+        for name, budget in budgets.items():
+            with self.subTest(name), self.assertQueryBudget(budget, max_duplicates=0):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_summary_headers(self):
+        res = self.client.get(reverse('post-list'))
+        self.assertEqual(res['X-Query-Count'], '1')
+        self.assertEqual(res['X-Query-Budget'], '2')
+        self.assertEqual(res['X-Query-Duplicates'], '0')
+        self.assertIn('X-Query-Time-Ms', res)
+
+    def test_exceeding_budget_fails(self):
+        with mock.patch.object(PostViewSet, 'query_budget', {'list': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('post-list'))
+
+
+class TransactionControlTests(QueryBudgetTestMixin, TransactionTestCase):
+    # No wrapping test transaction: atomic() blocks issue their own BEGIN, as in production
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.post = Post.objects.create(author=self.bob, title='T', content='C')
+        self.client.force_authenticate(self.alice)
+
+    def test_like_and_unlike_stay_within_budget(self):
+        for name, expected in (('post-like', 201), ('post-unlike', 200)):
+            with self.subTest(name):
+                self.assertEqual(self.client.post(reverse(name, args=[self.post.pk])).status_code, expected)
+
+    def test_transaction_control_is_not_counted(self):
+        recorder = QueryRecorder()
+        with recorder.capture(), transaction.atomic():
+            with transaction.atomic():
+                list(Post.objects.all())
+        self.assertEqual(recorder.count, 1)
@@ -0,0 +1,118 @@
+# posts/tests/test_replicas.py
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache, caches
+from django.db import DatabaseError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from accounts.authentication import local_cache
+from accounts.models import User
+from notifications.views import NotificationListView
+from posts.models import Post
+from social_media_api import db_router
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        local_cache.clear()
+        db_router.reset_health()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.post = Post.objects.create(author=self.alice, title='T', content='C')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.alice).key}')
+
+    def queries_by_alias(self, method, url, **kwargs):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_safe_reads_go_to_replica(self):
+        res, primary, replica = self.queries_by_alias('get', reverse('notifications'))
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(replica, 0)
+        # Only the token lookup stays on the primary
+        self.assertEqual(primary, 1)
+
+    def test_writes_pin_client_to_primary(self):
+        self.client.post(reverse('post-like', args=[self.post.pk]))
+        _, _, replica = self.queries_by_alias('get', reverse('notifications'))
+        self.assertEqual(replica, 0)
+
+        # Other clients still read from the replica
+        other = User.objects.create_user(username='bob', password='Pass123!')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=other).key}')
+        _, _, replica = self.queries_by_alias('get', reverse('notifications'))
+        self.assertGreater(replica, 0)
+
+    def test_cached_post_reads_stay_on_primary(self):
+        # A lagging replica would fill the response cache with pre-write data under the new version
+        self.client.credentials()
+        for url in (reverse('post-list'), reverse('post-detail', args=[self.post.pk]), reverse('post-trending')):
+            res, _, replica = self.queries_by_alias('get', url)
+            self.assertEqual((res.status_code, replica), (200, 0))
+
+    def test_registration_pins_the_issued_token(self):
+        self.client.credentials()
+        res = self.client.post(reverse('register'), {
+            'username': 'carol', 'email': 'carol@example.com', 'password': 'S3cure-pass!', 'password2': 'S3cure-pass!',
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {res.data['token']}")
+        carol = res.data['user']['id']
+        for url in (reverse('profile'), reverse('user-followers', args=[carol])):
+            res, _, replica = self.queries_by_alias('get', url)
+            self.assertEqual((res.status_code, replica), (200, 0))
+
+    def test_profile_reads_stay_on_primary(self):
+        cache.clear()
+        res, _, replica = self.queries_by_alias('get', reverse('profile'))
+        self.assertEqual((res.status_code, replica), (200, 0))
+
+    @override_settings(REPLICA_STICKY_SECONDS=5, REPLICA_MAX_LAG_SECONDS=10, REPLICA_HEALTH_CHECK_INTERVAL=5)
+    def test_pins_outlast_the_replica_lag_bound(self):
+        self.assertEqual(db_router.sticky_seconds(), 15)
+
+    def test_views_can_opt_out(self):
+        with mock.patch.object(NotificationListView, 'use_replica', False, create=True):
+            _, _, replica = self.queries_by_alias('get', reverse('notifications'))
+        self.assertEqual(replica, 0)
+
+    def test_lagging_or_broken_replica_falls_back_to_primary(self):
+        url = reverse('notifications')
+        with mock.patch('social_media_api.db_router.replica_lag', return_value=60):
+            _, _, replica = self.queries_by_alias('get', url)
+        self.assertEqual(replica, 0)
+
+        db_router.reset_health()
+        with mock.patch('social_media_api.db_router.replica_lag', side_effect=DatabaseError):
+            res, _, replica = self.queries_by_alias('get', url)
+        self.assertEqual((res.status_code, replica), (200, 0))
+
+    def test_code_outside_requests_uses_primary(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            list(Post.objects.all())
+        self.assertEqual(len(replica), 0)
+
+    @override_settings(ROOT_URLCONF='social_media_api.asgi_urls')
+    def test_async_views_read_from_replica(self):
+        # async_to_sync hands the ORM calls back to this thread, whose connections are captured
+        get = async_to_sync(self.async_client.get)
+        auth = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        with CaptureQueriesContext(connections['replica']) as replica:
+            res = get(reverse('notifications'), headers=auth)
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(len(replica), 0)
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            res = get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual((res.status_code, len(replica)), (200, 0))
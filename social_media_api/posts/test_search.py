@@ -0,0 +1,69 @@
+# posts/tests/test_search.py
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post, Comment
+from posts.search import PostgresSearch
+
+
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='patrick', password='SafePass123!')
+        self.client.force_authenticate(self.user)
+        self.python = Post.objects.create(author=self.user, title='Python tips', content='Decorators and generators')
+        self.django = Post.objects.create(author=self.user, title='Django', content='Python web framework for python people')
+        Post.objects.create(author=self.user, title='Cooking', content='Pasta recipes')
+
+    def search(self, name, query):
+        res = self.client.get(reverse(name) + '?search=' + query)
+        self.assertEqual(res.status_code, 200)
+        return res.data['results']
+
+    def test_matches_stemmed_terms(self):
+        titles = {p['title'] for p in self.search('post-list', 'generator')}
+        self.assertEqual(titles, {'Python tips'})
+
+    def test_results_are_ranked(self):
+        Post.objects.create(author=self.user, title='Misc', content='One mention of python among many other words here')
+        titles = [p['title'] for p in self.search('post-list', 'python')]
+        self.assertEqual(titles[-1], 'Misc')
+        self.assertEqual(set(titles[:2]), {'Django', 'Python tips'})
+
+    def test_ranked_results_page_by_cursor(self):
+        url, titles = reverse('post-list') + '?search=python&page_size=1', []
+        while url:
+            res = self.client.get(url)
+            titles += [p['title'] for p in res.data['results']]
+            url = res.data['next']
+        self.assertEqual(sorted(titles), ['Django', 'Python tips'])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.python.content = 'Async iterators'
+        self.python.save()
+        self.assertEqual(self.search('post-list', 'generators'), [])
+        self.assertEqual(len(self.search('post-list', 'iterators')), 1)
+        self.python.delete()
+        self.assertEqual(self.search('post-list', 'iterators'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('post-list', '"NEAR(python'), [])
+
+    def test_explicit_ordering_wins_over_rank(self):
+        res = self.client.get(reverse('post-list') + '?search=python&ordering=title')
+        self.assertEqual([p['title'] for p in res.data['results']], ['Django', 'Python tips'])
+
+    def test_comments_match_content_or_author(self):
+        other = User.objects.create_user(username='amaka', password='SafePass123!')
+        Comment.objects.create(post=self.python, author=self.user, content='Great generators')
+        Comment.objects.create(post=self.python, author=other, content='Thanks')
+        self.assertEqual(len(self.search('comment-list', 'generators')), 1)
+        self.assertEqual([c['content'] for c in self.search('comment-list', 'amaka')], ['Thanks'])
+
+
+class PostgresRankTests(SimpleTestCase):
+    def test_rank_is_double_precision(self):
+        # Ranks become cursor values, which are read back as float8
+        self.assertTrue(PostgresSearch().rank(Post, 'python').sql.endswith('::float8'))
@@ -0,0 +1,83 @@
+# posts/tests/test_sparse_fields.py
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from notifications.utils import create_notification
+from posts.models import Comment, Post
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!', bio='long bio')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.alice.following.add(self.bob)
+        self.posts = [Post.objects.create(author=self.bob, title=f'T{i}', content='body ' * 50) for i in range(3)]
+        self.client.force_authenticate(self.alice)
+
+    def page_sql(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200, res.data)
+        return res, [q['sql'] for q in queries.captured_queries if 'posts_post' in q['sql']]
+
+    def test_fields_trim_payload_and_columns(self):
+        res, sql = self.page_sql(reverse('post-list'), {'fields': 'id,title'})
+        self.assertEqual(set(res.data['results'][0]), {'id', 'title'})
+        self.assertNotIn('"posts_post"."content"', sql[0])
+        self.assertNotIn('accounts_user', sql[0])
+
+    def test_omit(self):
+        res, sql = self.page_sql(reverse('post-list'), {'omit': 'content,author_username'})
+        self.assertNotIn('content', res.data['results'][0])
+        self.assertIn('likes_count', res.data['results'][0])
+        self.assertNotIn('"posts_post"."content"', sql[0])
+
+    def test_related_source_keeps_join(self):
+        res, sql = self.page_sql(reverse('post-list'), {'fields': 'id,author_username'})
+        self.assertEqual(res.data['results'][0]['author_username'], 'bob')
+        self.assertIn('"accounts_user"."username"', sql[0])
+        self.assertNotIn('"accounts_user"."bio"', sql[0])
+
+    def test_unknown_field_is_rejected(self):
+        res = self.client.get(reverse('post-list'), {'fields': 'id,secret'})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('secret', str(res.data))
+
+    def test_paging_through_a_trimmed_list(self):
+        res = self.client.get(reverse('post-list'), {'fields': 'title', 'page_size': 2})
+        with self.assertNumQueries(1):
+            res = self.client.get(res.data['next'])
+        self.assertEqual([p['title'] for p in res.data['results']], ['T0'])
+
+    def test_expanded_feed(self):
+        res, sql = self.page_sql(reverse('feed'), {'fields': 'id,liked_by_me,author_summary'})
+        self.assertEqual(set(res.data['results'][0]), {'id', 'liked_by_me', 'author_summary'})
+        self.assertEqual(res.data['results'][0]['author_summary']['username'], 'bob')
+        self.assertNotIn('"posts_post"."content"', sql[0])
+
+    def test_retrieve_and_writes_ignore_fields(self):
+        url = reverse('post-detail', args=[self.posts[0].pk])
+        self.assertEqual(set(self.client.get(url, {'fields': 'title'}).data), {'title'})
+        self.client.force_authenticate(self.bob)
+        res = self.client.patch(url + '?fields=title', {'content': 'edited'})
+        self.assertEqual(res.data['content'], 'edited')
+
+    def test_comments_profile_and_notifications(self):
+        Comment.objects.create(post=self.posts[0], author=self.alice, content='hi')
+        res = self.client.get(reverse('comment-list'), {'fields': 'id,content'})
+        self.assertEqual(res.data['results'][0], {'id': res.data['results'][0]['id'], 'content': 'hi'})
+
+        res = self.client.get(reverse('profile'), {'omit': 'bio,email,profile_picture_urls'})
+        self.assertEqual(set(res.data), {'id', 'username', 'profile_picture', 'profile_picture_processing',
+                                         'follower_count', 'following_count'})
+
+        create_notification(self.alice, self.bob, 'liked', target=self.posts[0])
+        with self.assertNumQueries(1):  # no target lookups without `target`
+            res = self.client.get(reverse('notifications'), {'fields': 'verb,actor_username'})
+        self.assertEqual(res.data['results'][0], {'verb': 'liked', 'actor_username': 'bob'})
+        res = self.client.get(reverse('notifications'), {'fields': 'target'})
+        self.assertEqual(res.data['results'][0]['target']['title'], 'T0')
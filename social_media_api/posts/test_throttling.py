@@ -0,0 +1,95 @@
+# posts/tests/test_throttling.py
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts.models import Post
+from social_media_api import throttling
+from social_media_api.throttling import CacheStorage, TokenBucketThrottle, get_storage, parse_rate
+
+
+class ThrottledTestMixin:
+    def setUp(self):
+        super().setUp()
+        get_storage().clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(side_effect=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(THROTTLE_RATES={'like': '3/min', 'follow': '10/min', 'comment': '10/min', 'writes': '5/min'})
+class WriteThrottlingTests(ThrottledTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.post = Post.objects.create(author=self.bob, title='T', content='C')
+        self.client.force_authenticate(self.alice)
+
+    def toggle(self, i):
+        return self.client.post(reverse('post-like' if i % 2 == 0 else 'post-unlike', args=[self.post.pk]))
+
+    def test_like_toggles_run_out_and_refill(self):
+        self.assertEqual([self.toggle(i).status_code for i in range(3)], [201, 200, 201])
+        res = self.toggle(3)
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(res['Retry-After'], '20')  # one token per 20 seconds
+        self.now += 20
+        self.assertEqual(self.toggle(3).status_code, 200)
+        self.assertEqual(self.toggle(4).status_code, 429)
+
+    def test_buckets_are_per_user(self):
+        for i in range(3):
+            self.toggle(i)
+        self.assertEqual(self.toggle(3).status_code, 429)
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.toggle(0).status_code, 201)
+
+    def test_shared_writes_bucket(self):
+        carol = User.objects.create_user(username='carol', password='Pass123!')
+        for i in range(3):
+            self.toggle(i)
+        self.assertEqual(self.client.post(reverse('follow-user', args=[self.bob.pk])).status_code, 200)
+        comment = {'post': self.post.pk, 'content': 'hi'}
+        self.assertEqual(self.client.post(reverse('comment-list'), comment).status_code, 201)
+        # Five writes used up `writes`; a refused request takes no token from `follow`
+        res = self.client.post(reverse('unfollow-user', args=[self.bob.pk]))
+        self.assertEqual((res.status_code, res['Retry-After']), (429, '12'))
+        self.now += 12
+        self.assertEqual(self.client.post(reverse('follow-user', args=[carol.pk])).status_code, 200)
+
+    def test_reads_are_not_throttled(self):
+        for _ in range(12):
+            self.assertEqual(self.client.get(reverse('comment-list')).status_code, 200)
+        self.assertEqual(self.client.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'x'}).status_code,
+                         201)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/min'), (30, 0.5))
+        self.assertEqual(parse_rate('5/10s'), (5, 0.5))
+        self.assertEqual(parse_rate('1000/day'), (1000, 1000 / 86400))
+        with self.assertRaises(ValueError):
+            parse_rate('ten/min')
+
+    def test_memory_storage_prunes_full_buckets(self):
+        storage = throttling.MemoryStorage(max_entries=2)
+        bucket = [('a', 2, 1.0)]
+        self.assertEqual((storage.take(bucket, 0), storage.take(bucket, 0)), (0.0, 0.0))
+        self.assertEqual(storage.take(bucket, 0.5), 0.5)
+        storage.take([('b', 2, 1.0)], 10)
+        storage.take([('c', 2, 1.0)], 10)
+        self.assertEqual(set(storage.states), {'b', 'c'})
+
+    def test_cache_storage(self):
+        cache.clear()
+        storage = CacheStorage()
+        buckets = [('u:like', 2, 0.1), ('u:writes', 5, 1.0)]
+        self.assertEqual([storage.take(buckets, 100.0) for _ in range(3)], [0.0, 0.0, 10.0])
+        self.assertEqual(storage.take(buckets, 110.0), 0.0)
+        self.assertEqual(cache.get('throttle:u:writes')[0], 4.0)
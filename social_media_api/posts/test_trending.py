@@ -0,0 +1,87 @@
+# posts/tests/test_trending.py
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from posts import trending
+from posts.models import Comment, Like, Post
+
+
+class TrendingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!')
+        self.carol = User.objects.create_user(username='carol', password='Pass123!')
+        self.quiet = Post.objects.create(author=self.bob, title='Quiet', content='C')
+        self.busy = Post.objects.create(author=self.bob, title='Busy', content='C')
+
+    def like(self, user, post):
+        self.client.force_authenticate(user)
+        self.client.post(reverse('post-like', args=[post.pk]))
+
+    def score(self, post):
+        post.refresh_from_db()
+        return trending.current_score(post.trending_score)
+
+    def test_likes_and_comments_bump_scores(self):
+        self.like(self.alice, self.busy)
+        self.like(self.carol, self.busy)
+        self.assertAlmostEqual(self.score(self.busy), 2.0, places=3)
+        self.client.post(reverse('comment-list'), {'post': self.busy.pk, 'content': 'Hi'}, format='json')
+        self.assertAlmostEqual(self.score(self.busy), 2.0 + trending.COMMENT_WEIGHT, places=3)
+        self.assertIsNone(Post.objects.get(pk=self.quiet.pk).trending_score)
+
+    def test_unlike_never_raises_a_score(self):
+        self.like(self.alice, self.busy)
+        self.like(self.carol, self.busy)
+        for _ in range(3):
+            self.client.post(reverse('post-unlike', args=[self.busy.pk]))
+            self.client.post(reverse('post-like', args=[self.busy.pk]))
+        self.assertLessEqual(self.score(self.busy), 2.0 + 1e-6)
+        self.client.post(reverse('post-unlike', args=[self.busy.pk]))
+        self.client.force_authenticate(self.alice)
+        self.client.post(reverse('post-unlike', args=[self.busy.pk]))
+        self.assertEqual(self.score(self.busy), 0.0)
+
+    def test_older_activity_counts_less(self):
+        later = timezone.now() + datetime.timedelta(hours=24)
+        self.like(self.alice, self.quiet)
+        self.like(self.carol, self.quiet)
+        with mock.patch('posts.trending.timezone.now', return_value=later):
+            self.like(self.alice, self.busy)
+            # Two day-old likes weigh one fresh like
+            self.assertAlmostEqual(self.score(self.quiet), 1.0, places=3)
+            self.assertAlmostEqual(self.score(self.busy), 1.0, places=3)
+
+    def test_trending_endpoint_orders_by_score(self):
+        self.like(self.alice, self.quiet)
+        self.like(self.alice, self.busy)
+        self.like(self.carol, self.busy)
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('post-trending'))
+        self.assertEqual([p['title'] for p in res.data], ['Busy', 'Quiet'])
+        self.assertAlmostEqual(res.data[0]['trending_score'], 2.0, places=3)
+        res = self.client.get(reverse('post-trending'), {'limit': 1})
+        self.assertEqual(len(res.data), 1)
+
+    @override_settings(TRENDING_WINDOW_HOURS=1)
+    def test_refresh_recomputes_and_clears_stale_scores(self):
+        Like.objects.create(user=self.alice, post=self.busy)
+        old = Comment.objects.create(post=self.quiet, author=self.alice, content='old')
+        Comment.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(hours=2))
+        Post.objects.filter(pk=self.quiet.pk).update(trending_score=1000.0)
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+        self.assertIn('Scored 1 post', out.getvalue())
+        self.assertAlmostEqual(self.score(self.busy), 1.0, places=3)
+        self.assertIsNone(Post.objects.get(pk=self.quiet.pk).trending_score)
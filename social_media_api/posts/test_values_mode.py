@@ -0,0 +1,96 @@
+# posts/tests/test_values_mode.py
+import datetime
+import decimal
+import json
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from accounts.models import User
+from notifications.serializers import NotificationSerializer
+from posts.models import Comment, Like, Post
+from posts.serializers import ExpandedPostSerializer, PostSerializer
+from social_media_api import renderers
+from social_media_api.values_mode import ValuesPlan
+
+
+class ValuesModeTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.alice = User.objects.create_user(username='alice', password='Pass123!')
+        self.bob = User.objects.create_user(username='bob', password='Pass123!', profile_picture='avatars/bob.png')
+        self.alice.following.add(self.bob)
+        self.posts = [Post.objects.create(author=self.bob, title=f'T{i}', content='C ') for i in range(5)]
+        Like.objects.create(user=self.alice, post=self.posts[1])
+        Comment.objects.create(post=self.posts[0], author=self.alice, content='hi')
+        self.client.force_authenticate(self.alice)
+
+    def both_paths(self, url, params=None):
+        with override_settings(SERIALIZER_VALUES_MODE=False):
+            expected = self.client.get(url, params)
+        caches['responses'].clear()
+        actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, 200)
+        self.assertEqual(actual.content, expected.content)
+        return actual
+
+    def test_lists_match_the_instance_path(self):
+        self.both_paths(reverse('post-list'))
+        self.both_paths(reverse('post-list'), {'expand': '1', 'ordering': 'title'})
+        self.both_paths(reverse('post-list'), {'fields': 'id,author_username,likes_count'})
+        self.both_paths(reverse('comment-list'))
+        res = self.both_paths(reverse('feed'), {'page_size': 2})
+        self.assertEqual(res.json()['results'][0]['author_summary']['profile_picture'],
+                         'http://testserver/media/avatars/bob.png')
+        # Cursors built from the rows page through the rest
+        self.both_paths(res.json()['next'])
+
+    def test_list_reads_rows_not_instances(self):
+        with mock.patch.object(Post, 'from_db', side_effect=AssertionError('instantiated')):
+            with self.assertNumQueries(4):  # following ids + pulled authors + page + viewer's likes
+                res = self.client.get(reverse('feed'))
+        self.assertEqual([p['liked_by_me'] for p in res.data['results']], [False, False, False, True, False])
+
+    def test_plan_support(self):
+        plan = ValuesPlan.for_serializer(ExpandedPostSerializer())
+        self.assertIn('author__username', plan.paths)
+        self.assertIn('author__profile_picture', plan.paths)
+        self.assertNotIn('author__bio', plan.paths)
+        # get_target() needs the resolved object
+        self.assertIsNone(ValuesPlan.for_serializer(NotificationSerializer()))
+        self.assertIsNotNone(ValuesPlan.for_serializer(NotificationSerializer(context={'sparse_fields': {'verb'}})))
+
+    def test_previews_fall_back_to_instances(self):
+        res = self.client.get(reverse('post-list'), {'include': 'comments_preview'})
+        self.assertEqual(res.data['results'][-1]['comments_preview'][0]['content'], 'hi')
+        plan = ValuesPlan.for_serializer(PostSerializer(context={'comment_previews': {}}))
+        self.assertEqual(plan.represent(plan.rows(Post.objects.all()))[0]['comments_preview'], [])
+
+
+class FastJSONRendererTests(APITestCase):
+    def test_same_bytes_as_json_renderer(self):
+        data = {
+            'text': 'caf\u00e9 \u2028 "quoted"',
+            'when': datetime.datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2026, 1, 2),
+            'amount': decimal.Decimal('1.50'),
+            'nested': [{'n': 1, 'none': None, 'flag': True}],
+            1: 'int key',
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(json.loads(renderers.dumps(data))['when'], '2026-01-02T03:04:05.678901Z')
+
+    def test_indented_and_missing_orjson_fall_back(self):
+        data = {'now': timezone.now(), 'items': [1, 2]}
+        media_type = 'application/json; indent=4'
+        self.assertEqual(renderers.FastJSONRenderer().render(data, media_type),
+                         JSONRenderer().render(data, media_type))
+        orjson, renderers.orjson = renderers.orjson, None
+        try:
+            self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        finally:
+            renderers.orjson = orjson
@@ -0,0 +1,129 @@
+# posts/trending.py
+"""
+Time-decayed trending scores.
+
+A post's score is the sum of its likes and comments, each weighted by
+2^(-age / TRENDING_HALF_LIFE_HOURS). Every term decays at the same rate, so
+the ranking only changes when new activity arrives. That means the score
+can be kept as one number per post and bumped in place:
+
+    Post.trending_score = ln(sum(weight * e^(rate * (t - EPOCH))))
+
+This is stored in log space relative to a fixed EPOCH so the values never
+overflow and never need rescaling. A like or comment log-adds its term in
+the same UPDATE that moves the counters (see posts/likes.py and
+CommentViewSet). Reading the top K is then a scan of the partial
+(-trending_score, -id) index.
+
+Unlikes and comment deletions subtract one term at the current time. That is
+at least what the removed activity added, so toggling a like can never raise
+a score. refresh_scores() (the `refresh_trending` command, run periodically)
+recomputes scores from the last TRENDING_WINDOW_HOURS of activity and clears
+posts with none. This repairs the approximations and keeps the index small.
+Changing the half-life also needs a refresh.
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import Comment, Like, Post
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 3.0
+
+
+def decay_rate():
+    """
+    Per-second decay constant for TRENDING_HALF_LIFE_HOURS.
+    """
+    return math.log(2) / (getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 3600)
+
+
+def log_term(weight, when=None):
+    """
+    ln(weight * e^(rate * (when - EPOCH))): one event's term in stored units.
+    """
+    when = when or timezone.now()
+    return math.log(weight) + decay_rate() * (when - EPOCH).total_seconds()
+
+
+def score_sql(weight, sign=1, column='trending_score'):
+    """
+    SQL (and params) for the column's new value after adding (sign=1) or
+    removing (sign=-1) one event of `weight` happening now.
+    """
+    term = log_term(weight)
+    if sign > 0:
+        greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+        sql = (
+            f'CASE WHEN {column} IS NULL THEN %s '
+            f'ELSE {greatest}({column}, %s) + LN(1 + EXP(-ABS({column} - %s))) END'
+        )
+        return sql, [term, term, term]
+    # Removing at least everything there was leaves no score
+    return f'CASE WHEN {column} > %s THEN {column} + LN(1 - EXP(%s - {column})) END', [term + 1e-9, term]
+
+
+def score_change(weight, sign=1):
+    """
+    score_sql() as an expression for QuerySet.update().
+    """
+    return RawSQL(*score_sql(weight, sign))
+
+
+def current_score(stored, now=None):
+    """
+    A stored score as the decayed weight sum as of now (e.g. 3.0 = three fresh likes).
+    """
+    if stored is None:
+        return 0.0
+    now = now or timezone.now()
+    return math.exp(stored - decay_rate() * (now - EPOCH).total_seconds())
+
+
+def trending_size():
+    return getattr(settings, 'TRENDING_SIZE', 50)
+
+
+def top_posts(limit=None):
+    """
+    The highest-scoring posts, best first.
+    """
+    return (
+        Post.objects.filter(trending_score__isnull=False)
+        .select_related('author')
+        .order_by('-trending_score', '-id')[:limit or trending_size()]
+    )
+
+
+@transaction.atomic
+def refresh_scores(batch_size=1000):
+    """
+    Recompute every score from the likes and comments of the last
+    TRENDING_WINDOW_HOURS, clearing posts without any. Returns the number of
+    posts scored.
+    """
+    now = timezone.now()
+    since = now - datetime.timedelta(hours=getattr(settings, 'TRENDING_WINDOW_HOURS', 72))
+    rate = decay_rate()
+    totals = defaultdict(float)
+    for model, weight in ((Like, LIKE_WEIGHT), (Comment, COMMENT_WEIGHT)):
+        rows = model.objects.filter(created_at__gte=since).values_list('post_id', 'created_at')
+        for post_id, created_at in rows.iterator(chunk_size=batch_size):
+            # Relative to now rather than EPOCH so the sum can't overflow
+            totals[post_id] += weight * math.exp(rate * (created_at - now).total_seconds())
+
+    offset = rate * (now - EPOCH).total_seconds()
+    Post.objects.filter(trending_score__isnull=False).update(trending_score=None)
+    Post.objects.bulk_update(
+        [Post(pk=post_id, trending_score=offset + math.log(total)) for post_id, total in totals.items()],
+        ['trending_score'],
+        batch_size=batch_size,
+    )
+    return len(totals)
@@ -2,7 +2,7 @@
 # posts/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView
+from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView, LikeBatchView, ExportView
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -13,4 +13,6 @@ urlpatterns = [
     path('feed/', FeedView.as_view(), name='feed'),
     path('posts/<int:pk>/like/', LikePostView.as_view(), name='post-like'),
     path('posts/<int:pk>/unlike/', UnlikePostView.as_view(), name='post-unlike'),
+    path('likes/batch/', LikeBatchView.as_view(), name='like-batch'),
+    path('export/<str:name>/', ExportView.as_view(), name='export'),
 ]
@@ -0,0 +1,18 @@
+# social_media_api/asgi_urls.py
+"""
+URLconf for ASGI mode (DJANGO_ASGI=1): the async read views shadow their DRF
+counterparts at the same paths; everything else is routed as in urls.py.
+"""
+from django.urls import path
+
+from notifications.async_views import notification_list, notification_stream
+from posts.async_views import feed, post_detail
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/feed/', feed),
+    path('api/posts/<int:pk>/', post_detail),
+    path('api/notifications/', notification_list),
+    # Server-sent events; only served in ASGI mode
+    path('api/notifications/stream/', notification_stream, name='notifications-stream'),
+] + sync_urlpatterns
@@ -0,0 +1,113 @@
+# social_media_api/async_api.py
+"""
+Helpers for the async read endpoints served in ASGI mode.
+
+DRF views are synchronous, so under ASGI each request would hold a worker
+thread for its whole life, including the time spent writing to a slow client.
+The hot read paths (feed, post detail, notification list) therefore also
+exist as plain async Django views (posts/async_views.py,
+notifications/async_views.py). social_media_api/asgi_urls.py routes them
+ahead of the DRF views when DJANGO_ASGI=1 (set by asgi.py).
+
+They reuse the DRF pieces that don't touch the database: serializers,
+KeysetPagination and CachedTokenAuthentication.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from accounts.authentication import CachedTokenAuthentication
+from .renderers import dumps
+
+
+def error_response(exc):
+    response = JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+    return response
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    # The same bytes as the DRF views' FastJSONRenderer
+    return HttpResponse(dumps(data), status=status, headers=headers, content_type='application/json')
+
+
+def async_api_view(view=None, *, authenticated=True, fallback=None):
+    """
+    Wrap an async GET view: token authentication (request.user / request.auth)
+    and DRF-style error bodies. Other methods go to the sync `fallback` view
+    if one is given (e.g. the viewset's update/destroy), else get a 405.
+
+        @async_api_view
+        async def feed(request): ...
+    """
+    if view is None:
+        return functools.partial(async_api_view, authenticated=authenticated, fallback=fallback)
+
+    @csrf_exempt
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            if fallback is not None:
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            return error_response(exceptions.MethodNotAllowed(request.method))
+        request.auth = None
+        try:
+            credentials = await CachedTokenAuthentication().aauthenticate(request)
+            if credentials is not None:
+                request.user, request.auth = credentials
+            elif authenticated:
+                raise exceptions.NotAuthenticated()
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+    return wrapper
+
+
+def _close_idle_connections():
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+async def release_connections():
+    """
+    Close the request's database connections ahead of a long-lived response
+    (a stream) so it doesn't pin one for its whole life.
+    """
+    await sync_to_async(_close_idle_connections)()
+
+
+def _own_connection(func):
+    def run():
+        # The request cycle never sees pool threads, so apply its connection
+        # hygiene here: each thread keeps its own connection open for
+        # CONN_MAX_AGE and only drops it once unusable or expired
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*funcs):
+    """
+    Run independent blocking ORM callables at the same time, each on its own
+    connection, and return their results in order. They run on the event
+    loop's default executor, so there are at most as many of these
+    persistent connections as executor threads.
+
+    With ASYNC_PARALLEL_QUERIES off (the test suite, where every connection
+    must share the test transaction) they run one after another on the
+    request's connection instead.
+    """
+    if not getattr(settings, 'ASYNC_PARALLEL_QUERIES', True):
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(sync_to_async(_own_connection(func), thread_sensitive=False)() for func in funcs))
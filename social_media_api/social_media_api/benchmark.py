@@ -0,0 +1,509 @@
+# social_media_api/benchmark.py
+"""
+Reproducible load benchmarks for the API endpoints.
+
+generate_graph() writes a synthetic social graph: users whose follower
+counts follow a power law (a few very popular accounts, a long tail),
+posts, comments, likes and the matching notifications, plus a token per user. Every
+generated username starts with PREFIX. The commands run inside
+isolated_database(), a throwaway test database, unless told to use the
+configured one (--live-database); cleanup() then deletes the generated users by
+primary key, never by name.
+
+run_scenario() drives one endpoint either in-process through the Django test
+client or against a running server (base_url), and reports latency
+percentiles, queries per request (from QueryBudgetMiddleware's X-Query-Count
+header, so a remote server needs DEBUG or QUERY_BUDGET_HEADERS on) and
+throughput. The `benchmark_api` command writes the results to JSON so runs on
+different commits can be compared with compare_results().
+
+rendering_benchmark() is a micro-benchmark of one large list payload: the
+instance path (model instances through the serializer) against values mode
+(social_media_api/values_mode.py), each rendered by JSONRenderer and
+FastJSONRenderer. The `benchmark_rendering` command runs it.
+"""
+import itertools
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from accounts import graph as follow_graph
+from notifications.models import Notification
+from posts.caching import bump_version
+from posts.counters import reconcile_counters
+from posts.feed import fan_out_posts
+from posts.importing import recount_follows
+from posts.models import Comment, Like, Post
+from posts.serializers import ExpandedPostSerializer, PostSerializer
+from . import renderers
+from .values_mode import ValuesPlan
+
+PREFIX = 'bench-'
+RENDER_AUTHOR = f'{PREFIX}render'
+BATCH_SIZE = 1000
+
+
+class Graph:
+    """
+    Ids of a generated data set, and the mutable like state the like scenario toggles.
+    """
+
+    def __init__(self, user_ids, post_ids, tokens, likes):
+        self.user_ids = user_ids
+        self.post_ids = post_ids
+        self.tokens = tokens
+        self.likes = likes
+        self.lock = threading.Lock()
+        # Scenario name -> page paths reached through `next` links (see walk_pages())
+        self.pages = {}
+
+    @classmethod
+    def load(cls):
+        """
+        The previously generated data set still in the database (--keep-data runs).
+        """
+        users = get_user_model().objects.filter(username__startswith=PREFIX)
+        user_ids = list(users.order_by('pk').values_list('pk', flat=True))
+        post_ids = list(Post.objects.filter(author__in=users).order_by('pk').values_list('pk', flat=True))
+        tokens = dict(Token.objects.filter(user__in=users).values_list('user_id', 'key'))
+        likes = set(Like.objects.filter(user__in=users).values_list('user_id', 'post_id'))
+        return cls(user_ids, post_ids, tokens, likes)
+
+
+def power_law_weights(size, exponent):
+    """
+    Cumulative Zipf weights for ranks 1..size, for random.choices(cum_weights=...).
+    """
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def generate_graph(users=500, posts_per_user=5, follows_per_user=20, likes_per_post=3, comments_per_post=2,
+                   exponent=1.1, seed=1):
+    """
+    Write a synthetic data set and return its Graph. The same arguments
+    always produce the same graph.
+    """
+    User = get_user_model()
+    Follow = User.following.through
+    rng = random.Random(seed)
+
+    created = User.objects.bulk_create(
+        [User(username=f'{PREFIX}{i}', password='!') for i in range(users)], batch_size=BATCH_SIZE,
+    )
+    user_ids = [user.pk for user in created]
+
+    # Popularity rank decides who gets followed and liked
+    popularity = user_ids[:]
+    rng.shuffle(popularity)
+    cum_weights = power_law_weights(len(popularity), exponent)
+
+    edges = set()
+    for user_id in user_ids:
+        # Pareto(2) has mean 2, so out-degrees average follows_per_user with a long tail
+        degree = min(len(user_ids) - 1, int(follows_per_user * rng.paretovariate(2) / 2))
+        for followee_id in rng.choices(popularity, cum_weights=cum_weights, k=degree):
+            if followee_id != user_id:
+                edges.add((user_id, followee_id))
+    Follow.objects.bulk_create(
+        [Follow(from_user_id=follower, to_user_id=followee) for follower, followee in sorted(edges)],
+        batch_size=BATCH_SIZE,
+    )
+
+    posts = Post.objects.bulk_create(
+        [
+            Post(author_id=rng.choice(user_ids), title=f'Benchmark post {i}', content='lorem ipsum ' * 20)
+            for i in range(users * posts_per_user)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    authors = {post.pk: post.author_id for post in posts}
+    post_ids = list(authors)
+
+    likes = set()
+    for post_id in post_ids:
+        for user_id in rng.choices(popularity, cum_weights=cum_weights, k=rng.randint(0, 2 * likes_per_post)):
+            likes.add((user_id, post_id))
+    Like.objects.bulk_create([Like(user_id=u, post_id=p) for u, p in sorted(likes)], batch_size=BATCH_SIZE)
+
+    Comment.objects.bulk_create(
+        [
+            Comment(post_id=post_id, author_id=rng.choices(popularity, cum_weights=cum_weights)[0], content='nice')
+            for post_id in post_ids
+            for _ in range(rng.randint(0, 2 * comments_per_post))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    post_type = ContentType.objects.get_for_model(Post)
+    Notification.objects.bulk_create(
+        [
+            Notification(recipient_id=authors[post_id], actor_id=user_id, verb='liked',
+                         target_content_type=post_type, target_object_id=post_id)
+            for user_id, post_id in sorted(likes) if authors[post_id] != user_id
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    tokens = {user_id: Token.generate_key() for user_id in user_ids}
+    Token.objects.bulk_create(
+        [Token(user_id=user_id, key=key) for user_id, key in tokens.items()],
+        batch_size=BATCH_SIZE,
+    )
+
+    recount_follows(user_ids)
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        fan_out_posts(post_ids[start:start + BATCH_SIZE])
+    for _ in reconcile_counters():
+        pass
+    bump_version()
+    return Graph(user_ids, post_ids, tokens, likes)
+
+
+@contextmanager
+def isolated_database(keep=False):
+    """
+    Point every connection at a freshly migrated test database for the block,
+    as the test runner does, and destroy it afterwards unless `keep` (which
+    also reuses one left by an earlier kept run). Cache keys get their own
+    prefix so a shared cache server is neither read nor polluted.
+    """
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keep, serialized_aliases=set())
+    try:
+        with override_settings(CACHES={
+            alias: {**config, 'KEY_PREFIX': f'benchmark:{config.get("KEY_PREFIX", "")}'}
+            for alias, config in settings.CACHES.items()
+        }):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keep)
+
+
+def cleanup(user_ids):
+    """
+    Delete the given generated users and, by cascade, their data.
+    """
+    User = get_user_model()
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        User.objects.filter(pk__in=user_ids[start:start + BATCH_SIZE]).delete()
+    follow_graph.invalidate(following_of=user_ids, followers_of=user_ids)
+    bump_version()
+    return len(user_ids)
+
+
+# Scenario name -> function(graph, rng) returning (method, path, user_id)
+
+def feed_request(graph, rng):
+    return 'get', reverse('feed'), rng.choice(graph.user_ids)
+
+
+def post_list_request(graph, rng):
+    return 'get', rng.choice(graph.pages['post_list']), rng.choice(graph.user_ids)
+
+
+def post_list_previews_request(graph, rng):
+    return 'get', rng.choice(graph.pages['post_list_previews']), rng.choice(graph.user_ids)
+
+
+def post_detail_request(graph, rng):
+    return 'get', reverse('post-detail', args=[rng.choice(graph.post_ids)]), rng.choice(graph.user_ids)
+
+
+def like_request(graph, rng):
+    user_id, post_id = rng.choice(graph.user_ids), rng.choice(graph.post_ids)
+    with graph.lock:
+        # Alternate so repeated runs keep roughly the same number of likes
+        if (user_id, post_id) in graph.likes:
+            graph.likes.discard((user_id, post_id))
+            name = 'post-unlike'
+        else:
+            graph.likes.add((user_id, post_id))
+            name = 'post-like'
+    return 'post', reverse(name, args=[post_id]), user_id
+
+
+def notifications_request(graph, rng):
+    return 'get', reverse('notifications'), rng.choice(graph.user_ids)
+
+
+# Scenario name -> (URL name, query) of a keyset-paginated list whose first
+# LIST_PAGES pages the scenario spreads its requests over
+PAGED_SCENARIOS = {
+    'post_list': ('post-list', ''),
+    'post_list_previews': ('post-list', 'include=comments_preview'),
+}
+LIST_PAGES = 5
+
+SCENARIOS = {
+    'feed': feed_request,
+    'post_list': post_list_request,
+    'post_list_previews': post_list_previews_request,
+    'post_detail': post_detail_request,
+    'like': like_request,
+    'notifications': notifications_request,
+}
+
+
+class InProcessTarget:
+    """
+    Sends requests through the test client, one client per thread.
+    """
+    name = 'in-process'
+
+    def __init__(self):
+        self._local = threading.local()
+        self._settings = override_settings(
+            QUERY_BUDGET_HEADERS=True,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        )
+
+    def __enter__(self):
+        self._settings.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._settings.disable()
+
+    def send(self, method, path, token):
+        if not hasattr(self._local, 'client'):
+            self._local.client = Client()
+        response = getattr(self._local.client, method)(path, HTTP_AUTHORIZATION=f'Token {token}')
+        return response.status_code, response.headers.get('X-Query-Count')
+
+    def get_json(self, path, token):
+        return Client().get(path, HTTP_AUTHORIZATION=f'Token {token}').json()
+
+
+class HTTPTarget:
+    """
+    Sends requests to a running server, e.g. http://127.0.0.1:8000.
+    """
+
+    def __init__(self, base_url):
+        self.name = base_url
+        self.base_url = base_url.rstrip('/')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def send(self, method, path, token):
+        request = urllib.request.Request(
+            self.base_url + path, method=method.upper(), headers={'Authorization': f'Token {token}'},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('X-Query-Count')
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers.get('X-Query-Count')
+
+    def get_json(self, path, token):
+        request = urllib.request.Request(self.base_url + path, headers={'Authorization': f'Token {token}'})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+
+def walk_pages(target, path, token, pages=LIST_PAGES):
+    """
+    Paths of the first `pages` pages of a keyset-paginated list. Cursors are
+    opaque, so each page is reached through the previous response's `next` link.
+    """
+    paths = [path]
+    while len(paths) < pages:
+        next_url = target.get_json(paths[-1], token).get('next')
+        if not next_url:
+            break
+        parts = urllib.parse.urlsplit(next_url)
+        paths.append(f'{parts.path}?{parts.query}')
+    return paths
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """
+    Stats for a list of (seconds, status, queries) samples taken over `elapsed` seconds.
+    """
+    latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+    queries = [int(count) for _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status >= 400),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+    }
+
+
+def run_scenario(target, graph, name, requests=200, concurrency=1, warmup=10, seed=1):
+    """
+    Time `requests` requests of one scenario after `warmup` untimed ones.
+    Paged scenarios first walk their list's cursors, untimed.
+    """
+    make_request = SCENARIOS[name]
+    rng = random.Random(f'{seed}-{name}')
+    if name in PAGED_SCENARIOS and name not in graph.pages:
+        url_name, query = PAGED_SCENARIOS[name]
+        path = f'{reverse(url_name)}?{query}' if query else reverse(url_name)
+        graph.pages[name] = walk_pages(target, path, graph.tokens[graph.user_ids[0]])
+    plan = [make_request(graph, rng) for _ in range(warmup + requests)]
+
+    def send(item):
+        method, path, user_id = item
+        start = time.perf_counter()
+        status, queries = target.send(method, path, graph.tokens[user_id])
+        return time.perf_counter() - start, status, queries
+
+    def worker(items):
+        try:
+            return [send(item) for item in items]
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+
+    for item in plan[:warmup]:
+        send(item)
+    timed = plan[warmup:]
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            shares = pool.map(worker, [timed[i::concurrency] for i in range(concurrency)])
+            samples = [sample for share in shares for sample in share]
+    else:
+        samples = worker(timed)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def generate_posts(count, seed=1):
+    """
+    `count` more posts by one generated author, for rendering_benchmark().
+    """
+    rng = random.Random(seed)
+    author, _ = get_user_model().objects.get_or_create(username=RENDER_AUTHOR, defaults={'password': '!'})
+    Post.objects.bulk_create(
+        [
+            Post(author=author, title=f'Benchmark post {i}', content='lorem ipsum ' * rng.randint(5, 40),
+                 like_count=rng.randint(0, 50), comment_count=rng.randint(0, 10))
+            for i in range(count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return author
+
+
+def best_of(repeat, func):
+    """
+    Fastest of `repeat` calls in milliseconds, and the last result.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3), result
+
+
+def rendering_benchmark(rows=10000, repeat=3, expanded=False):
+    """
+    Time building the data for `rows` generated posts (query included) on the
+    instance and values paths, and rendering it with each renderer.
+    """
+    serializer_class = ExpandedPostSerializer if expanded else PostSerializer
+    context = {'liked_post_ids': set()}
+    queryset = (
+        Post.objects.filter(author__username=RENDER_AUTHOR)
+        .select_related('author').order_by('-created_at', '-id')[:rows]
+    )
+    plan = ValuesPlan.for_serializer(serializer_class(context=context))
+    paths = {
+        # .all(): a fresh queryset each run, not the previous run's result cache
+        'instances': lambda: serializer_class(list(queryset.all()), many=True, context=context).data,
+        'values': lambda: plan.represent(list(plan.rows(queryset))),
+    }
+    results = {}
+    for name, build in paths.items():
+        build_ms, data = best_of(repeat, build)
+        json_ms, body = best_of(repeat, lambda: JSONRenderer().render(data))
+        fast_ms, _ = best_of(repeat, lambda: renderers.FastJSONRenderer().render(data))
+        results[name] = {
+            'rows': len(data),
+            'bytes': len(body),
+            'build_ms': build_ms,
+            'json_render_ms': json_ms,
+            'fast_render_ms': fast_ms,
+            'total_ms': round(build_ms + fast_ms, 3),
+        }
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_document(target, options, scenarios):
+    return {
+        'commit': current_commit(),
+        'timestamp': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'target': target.name,
+        'options': options,
+        'scenarios': scenarios,
+    }
+
+
+def compare_results(baseline, current):
+    """
+    Lines describing how each scenario's latency and query count moved.
+    """
+    lines = []
+    for name, stats in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'throughput_rps'):
+            if before.get(key) and stats.get(key) is not None:
+                changes.append(f'{key} {before[key]} -> {stats[key]} ({(stats[key] / before[key] - 1) * 100:+.1f}%)')
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,249 @@
+# social_media_api/db_router.py
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware decides per request whether reads may go to a
+replica. That is allowed only for GET/HEAD/OPTIONS requests from clients who
+haven't written recently, to views that haven't opted out. ReplicaRouter then
+sends that request's ORM reads to one healthy replica, chosen at the first
+read, and everything else to `default`:
+
+    REPLICA_DATABASES = ['replica1']          # aliases in DATABASES
+
+    class BillingView(APIView):
+        use_replica = False                   # always read from the primary
+
+and function views use the @primary_only decorator.
+
+Read-your-writes: a successful POST/PUT/PATCH/DELETE pins its client, keyed
+by Authorization header or session cookie, to the primary for
+REPLICA_STICKY_SECONDS. Login and registration pin the token they issue, as
+the request carried none. The window never ends before a replica that passed
+its last lag check could have caught up: it is at least REPLICA_MAX_LAG_SECONDS
+plus REPLICA_HEALTH_CHECK_INTERVAL. Pins live in the default cache, so
+several workers need a shared cache. (Router.db_for_write can't detect
+writes: Django also calls it when related objects are assigned.)
+
+Each replica's lag is checked at most every REPLICA_HEALTH_CHECK_INTERVAL
+seconds per process. Replicas that are unreachable or more than
+REPLICA_MAX_LAG_SECONDS behind are skipped until the next check. With none
+left, reads fall back to the primary. Tokens are always read from the
+primary so a just-issued token works on the very next request.
+
+Code outside a request (commands, signals run from commands) always uses the
+primary.
+"""
+import hashlib
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Models whose reads must see writes from the previous request
+PRIMARY_ONLY_MODELS = {'authtoken.token'}
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+class RoutingState:
+    """
+    Whether the current request may read from a replica, and which one once chosen.
+    """
+
+    def __init__(self, allowed):
+        self.allowed = allowed
+        self.replica = None
+
+    def read_alias(self):
+        if self.allowed and self.replica is None:
+            self.replica = choose_replica()
+            # No healthy replica: stay on the primary for the rest of the request
+            self.allowed = self.replica is not None
+        return self.replica if self.allowed else DEFAULT_DB_ALIAS
+
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def primary_only(view_func):
+    """
+    Keep a function view's reads on the primary.
+    """
+    view_func.use_replica = False
+    return view_func
+
+
+def view_uses_replica(view_func):
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return getattr(view_class or view_func, 'use_replica', True)
+
+
+def replica_lag(alias):
+    """
+    Seconds `alias` is behind its primary; 0 for databases that can't tell.
+    """
+    with connections[alias].cursor() as cursor:
+        if connections[alias].vendor == 'postgresql':
+            cursor.execute("""
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery() THEN 0
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END
+            """)
+        else:
+            cursor.execute('SELECT 0')
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    """
+    Whether `alias` answered its last lag check within REPLICA_MAX_LAG_SECONDS.
+    """
+    now = time.monotonic()
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 5)
+    with _health_lock:
+        checked_at, healthy = _health.get(alias, (None, None))
+        if checked_at is not None and now - checked_at < interval:
+            return healthy
+        # Claim the check so concurrent requests keep using the previous verdict
+        _health[alias] = (now, healthy if healthy is not None else True)
+    try:
+        healthy = replica_lag(alias) <= getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10)
+    except DatabaseError:
+        healthy = False
+        connections[alias].close()
+    with _health_lock:
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+def reset_health():
+    with _health_lock:
+        _health.clear()
+
+
+def choose_replica():
+    healthy = [alias for alias in replica_aliases() if is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def sticky_seconds():
+    """
+    How long a write pins its client to the primary. A replica is trusted for
+    up to REPLICA_HEALTH_CHECK_INTERVAL after a check that found it at most
+    REPLICA_MAX_LAG_SECONDS behind, so a shorter pin could expose stale reads.
+    """
+    lag_bound = (
+        getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10) + getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 5)
+    )
+    return max(getattr(settings, 'REPLICA_STICKY_SECONDS', lag_bound), lag_bound)
+
+
+def _credential_key(credential):
+    return 'replica:pin:' + hashlib.sha256(credential.encode()).hexdigest()[:32]
+
+
+def _pin_key(request):
+    credential = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return _credential_key(credential)
+
+
+def is_pinned(request):
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def pin(request):
+    key = _pin_key(request)
+    if key is not None:
+        cache.set(key, 1, sticky_seconds())
+
+
+def pin_token(key):
+    """
+    Pin the client that will authenticate with the token `key`, for views that
+    issue one: its first request may read rows the primary has just written.
+    """
+    if replica_aliases():
+        cache.set(_credential_key(f'Token {key}'), 1, sticky_seconds())
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        token = _state.set(RoutingState(self.may_use_replica(request)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        # The ORM's worker threads copy this context, so they see the same state
+        allowed = await sync_to_async(self.may_use_replica)(request)
+        token = _state.set(RoutingState(allowed))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        await sync_to_async(self.finish)(request, response)
+        return response
+
+    def may_use_replica(self, request):
+        return request.method in SAFE_METHODS and not is_pinned(request)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None and not view_uses_replica(view_func):
+            state.allowed = False
@@ -0,0 +1,285 @@
+# social_media_api/pagination.py
+"""
+Keyset (cursor) pagination shared by every list endpoint.
+
+Pages are selected with `WHERE (created_at, id) < (last_created_at, last_id)`
+instead of OFFSET, and no COUNT(*) is run, so page N costs the same as page 1.
+Cursors are opaque base64 tokens holding the ordering values of the row at the
+edge of the page.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _cursor_value(value):
+    # Full-precision values: the cursor must match the row exactly
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(position, reverse=False):
+    payload = json.dumps({'p': [_cursor_value(v) for v in position], 'r': int(reverse)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(token):
+    """
+    Return (position, reverse) for a cursor token; raise ValueError if malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        position, reverse = payload['p'], bool(payload['r'])
+    except (TypeError, KeyError, UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if not isinstance(position, list):
+        raise ValueError('Invalid cursor')
+    return position, reverse
+
+
+def ordering_field(queryset, name):
+    """
+    The model field or annotation output field behind an ordering name such as
+    'created_at', 'author__username' or 'search_rank'; None if unresolvable.
+    """
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    opts = queryset.model._meta
+    try:
+        *relations, last = name.split(LOOKUP_SEP)
+        for relation in relations:
+            opts = opts.get_field(relation).related_model._meta
+        return opts.get_field(last)
+    except (AttributeError, FieldDoesNotExist):
+        return None
+
+
+def coerce_position(queryset, ordering, position):
+    """
+    Convert decoded cursor values to the Python types of their ordering
+    fields; raise ValueError for values the fields can't hold, so a tampered
+    cursor never reaches the query.
+    """
+    values = []
+    for field_name, value in zip(ordering, position):
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError('Invalid cursor')
+        field = ordering_field(queryset, field_name.lstrip('-'))
+        if field is not None:
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError) as exc:
+                raise ValueError('Invalid cursor') from exc
+            if value is None:
+                raise ValueError('Invalid cursor')
+        values.append(value)
+    return values
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def keyset_filter(ordering, position):
+    """
+    Build the row-value comparison "rows strictly after `position`" for
+    `ordering`, expanded as (a < x) OR (a = x AND b < y) OR ...
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def row_position(row, ordering):
+    """
+    Ordering values of a row, which may be a model instance or a .values() dict.
+    """
+    fields = [field.lstrip('-') for field in ordering]
+    if isinstance(row, dict):
+        return [row[field] for field in fields]
+    return [getattr(row, field) for field in fields]
+
+
+def resolve_ordering(queryset, default=('-created_at', '-id')):
+    """
+    The ordering a queryset will actually be read in, with the primary key
+    appended as a tie-breaker so every position is unique.
+    """
+    query = queryset.query
+    if query.order_by:
+        ordering = list(query.order_by)
+    elif query.default_ordering and queryset.model._meta.ordering:
+        ordering = list(queryset.model._meta.ordering)
+    else:
+        ordering = list(default)
+    if not all(isinstance(field, str) for field in ordering):
+        # Expression orderings can't be encoded into a cursor
+        ordering = list(default)
+    pk_name = queryset.model._meta.pk.name
+    ordering = [field.replace('pk', pk_name) if field.lstrip('-') == 'pk' else field for field in ordering]
+    if pk_name not in (field.lstrip('-') for field in ordering):
+        descending = ordering[-1].startswith('-')
+        ordering.append(f'-{pk_name}' if descending else pk_name)
+    return tuple(ordering)
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate for a queryset (Postgres only), or None.
+    Reads EXPLAIN output, so it costs a plan, not a scan.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the queryset ordering plus the primary key,
+    e.g. (created_at, id) for posts and (timestamp, id) for notifications.
+
+    The ordering comes from the queryset (so OrderingFilter and explicit
+    order_by() calls are honoured), then the model's Meta.ordering, then
+    `default_ordering`.
+
+    Pass `?approximate_count=1` to get an X-Approximate-Count header taken
+    from planner statistics instead of a COUNT(*).
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    approximate_count_query_param = 'approximate_count'
+    approximate_count_header = 'X-Approximate-Count'
+    default_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+    approximate_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate_count = None
+        if self.wants_approximate_count(request):
+            self.approximate_count = estimate_count(queryset)
+        return self.take_page(list(self.page_queryset(queryset, request)))
+
+    def wants_approximate_count(self, request):
+        return request.GET.get(self.approximate_count_query_param) in ('1', 'true', 'True')
+
+    def page_queryset(self, queryset, request):
+        """
+        The sliced queryset for the requested page (one row extra, to detect a
+        next page). Runs no queries, so async views can evaluate it themselves
+        and hand the rows to take_page().
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = resolve_ordering(queryset, self.default_ordering)
+
+        token = request.GET.get(self.cursor_query_param)
+        position, self.reverse = None, False
+        if token:
+            try:
+                position, self.reverse = decode_cursor(token)
+                if len(position) != len(self.ordering):
+                    raise ValueError('Invalid cursor')
+                position = coerce_position(queryset, self.ordering, position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+        self.position = position
+
+        ordering = reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+        return queryset[:self.page_size + 1]
+
+    def take_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        # Walking backwards we came from a page after this one, and vice versa
+        self.has_next = True if self.reverse else has_more
+        self.has_previous = has_more if self.reverse else self.position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.GET[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = encode_cursor(row_position(self.page[-1], self.ordering))
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        cursor = encode_cursor(row_position(self.page[0], self.ordering), reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_headers(self):
+        if self.approximate_count is None:
+            return {}
+        return {self.approximate_count_header: str(self.approximate_count)}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data), headers=self.get_paginated_headers())
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,211 @@
+# social_media_api/query_budget.py
+"""
+Per-request SQL accounting and query budgets.
+
+QueryBudgetMiddleware records every statement a request runs: count, total
+time and duplicate fingerprints (the same SQL template run more than once,
+which is what an N+1 looks like). Transaction control (BEGIN, SAVEPOINT,
+...) is not counted: whether a backend sends it through a cursor, and
+whether a test's wrapping transaction suppresses it, would otherwise make
+the same view cost more outside tests. Views declare a budget:
+
+    class PostViewSet(viewsets.ModelViewSet):
+        query_budget = {'list': 2, 'retrieve': 2}
+
+    class FeedView(generics.ListAPIView):
+        query_budget = 3
+
+and function views use the @query_budget(n) decorator. When a request goes
+over budget the middleware raises QueryBudgetExceeded if QUERY_BUDGET_STRICT
+is on (QueryBudgetTestMixin turns it on for tests) and logs a warning
+otherwise. With DEBUG or QUERY_BUDGET_HEADERS on, the per-request summary is
+returned in X-Query-* response headers.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.test import override_settings
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_TRANSACTION_CONTROL = re.compile(r'\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|END)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Normalize a statement so repeats with different parameters compare equal.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _LITERALS.sub('?', sql)
+
+
+class QueryRecorder:
+    """
+    Collects statements run on every database connection while capturing.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if _TRANSACTION_CONTROL.match(sql):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        """
+        {fingerprint: times run} for statements run more than once.
+        """
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(n - 1 for n in self.duplicates.values())
+
+
+def query_budget(limit):
+    """
+    Declare a query budget on a function-based view.
+    """
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def extend_budget(request, queries):
+    """
+    Raise this request's budget, for opt-in work such as ?include= expansions.
+    """
+    request = getattr(request, '_request', request)
+    if getattr(request, 'query_budget', None) is not None:
+        request.query_budget += queries
+
+
+def get_view_budget(view_func, method):
+    """
+    The budget declared for a resolved view, or None.
+    Handles function views, Django CBVs, DRF views and per-action viewset budgets.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_class or view_func, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view_func, 'actions', None) or {}
+        return budget.get(actions.get(method.lower(), method.lower()))
+    return budget
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.query_budget = None
+        recorder = QueryRecorder()
+        with recorder.capture():
+            response = self.get_response(request)
+        return self.check_budget(request, response, recorder)
+
+    async def __acall__(self, request):
+        request.query_budget = None
+        recorder = QueryRecorder()
+        # Async ORM calls run on the request's thread-sensitive sync thread,
+        # so hook the connections of that thread rather than the event loop's
+        capture = ExitStack()
+        await sync_to_async(capture.enter_context)(recorder.capture())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(capture.close)()
+        return self.check_budget(request, response, recorder)
+
+    def check_budget(self, request, response, recorder):
+        budget = request.query_budget
+        if getattr(settings, 'DEBUG', False) or getattr(settings, 'QUERY_BUDGET_HEADERS', False):
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+            response['X-Query-Duplicates'] = str(recorder.duplicate_count)
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+
+        if budget is not None and recorder.count > budget:
+            message = (
+                f'{request.method} {request.path} ran {recorder.count} queries '
+                f'(budget {budget}, {recorder.duplicate_count} duplicate). '
+                f'Repeated: {list(recorder.duplicates)}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_view_budget(view_func, request.method)
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin: view budgets become test failures, and
+    assertQueryBudget() checks an arbitrary block.
+
+        with self.assertQueryBudget(2, max_duplicates=0):
+            self.client.get(url)
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        strict = override_settings(QUERY_BUDGET_STRICT=True)
+        strict.enable()
+        cls.addClassCleanup(strict.disable)
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_duplicates=None):
+        recorder = QueryRecorder()
+        with recorder.capture():
+            yield recorder
+        self.assertLessEqual(
+            recorder.count, max_queries,
+            f'{recorder.count} queries run, budget is {max_queries}: {dict(recorder.fingerprints)}'
+        )
+        if max_duplicates is not None:
+            self.assertLessEqual(
+                recorder.duplicate_count, max_duplicates,
+                f'Duplicate queries: {recorder.duplicates}'
+            )
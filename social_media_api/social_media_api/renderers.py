@@ -0,0 +1,44 @@
+# social_media_api/renderers.py
+"""
+JSON rendering through orjson when it is installed (`pip install orjson`).
+
+FastJSONRenderer writes the same bytes as DRF's JSONRenderer for the API's
+compact UTF-8 output: datetimes, Decimals, lazy strings and the like go
+through DRF's encoder, and U+2028/U+2029 are escaped. Indented output (the
+browsable API, `Accept: application/json; indent=4`), COMPACT_JSON or
+UNICODE_JSON turned off and a missing orjson all fall back to the stock
+renderer. Unlike STRICT_JSON, NaN and infinities render as null instead of
+raising.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default = encoders.JSONEncoder().default
+
+
+def dumps(data):
+    """
+    `data` as compact UTF-8 JSON bytes, the way JSONRenderer would write it.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+    # Datetimes through DRF's encoder: '...Z' rather than '...+00:00'
+    ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or not (self.compact and api_settings.UNICODE_JSON) \
+                or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
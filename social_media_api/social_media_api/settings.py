@@ -80,14 +80,23 @@ SECURE_HSTS_PRELOAD = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',  # Per brief
+        'accounts.authentication.CachedTokenAuthentication',  # TokenAuthentication + cache
         # If you prefer JWT:
         # 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetPagination',
+    # orjson when installed (social_media_api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'social_media_api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Only views declaring a throttle_scope are throttled (social_media_api/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'social_media_api.throttling.TokenBucketThrottle',
+    ],
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
@@ -95,8 +104,114 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Build read-only list pages from .values() rows instead of model instances
+# (social_media_api/values_mode.py)
+SERIALIZER_VALUES_MODE = True
+
+# Feeds: authors above this follower count are merged in at read time
+# instead of being fanned out into every follower's materialized feed.
+FEED_FANOUT_MAX_FOLLOWERS = int(os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', '10000'))
+# Number of an author's latest posts copied into a feed on follow
+FEED_BACKFILL_SIZE = 100
+# 'thread' writes a new post's feed entries from a background worker after
+# commit; 'inline' writes them during the request (see posts/feed.py)
+FEED_FANOUT_MODE = os.environ.get('FEED_FANOUT_MODE', 'thread')
+# Seconds a user's cached follower/following id arrays live (accounts/graph.py)
+GRAPH_CACHE_TIMEOUT = 600
+
+# Trending (posts/trending.py): half-life of a like/comment's weight, how far
+# back `manage.py refresh_trending` recomputes from, and the list length
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_HOURS = 72
+TRENDING_SIZE = 50
+
+# Comments embedded per post with ?include=comments_preview (posts/previews.py)
+COMMENT_PREVIEW_SIZE = 3
+
+# The default cache backs unread counts, the follow graph and (through
+# AUTH_TOKEN_CACHE_ALIAS) token lookups, and must be shared by every worker
+# once there is more than one: set CACHE_BACKEND/CACHE_LOCATION to a cache server.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Post read responses (posts/caching.py). Every worker must share it: the
+    # content versions live here too, so response caching and ETags are off
+    # while this is a per-process LocMemCache. Point RESPONSE_CACHE_BACKEND at
+    # a shared cache server, or at
+    # django.core.cache.backends.filebased.FileBasedCache (with a directory as
+    # RESPONSE_CACHE_LOCATION) for workers on one host.
+    'responses': {
+        'BACKEND': os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+# Cache responses in a LocMemCache anyway; only safe with a single process
+RESPONSE_CACHE_ALLOW_PER_PROCESS = False
+
+# Token -> user resolution cache (see accounts/authentication.py). The shared
+# tier is skipped while the alias is a LocMemCache. Either way a revoked token
+# outlives its logout in other workers for at most AUTH_TOKEN_LOCAL_TTL seconds.
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_LOCAL_TTL = 30
+AUTH_TOKEN_LOCAL_SIZE = 10000
+# Reject tokens older than this many seconds (None: tokens never expire)
+AUTH_TOKEN_TTL = int(os.environ['AUTH_TOKEN_TTL']) if os.environ.get('AUTH_TOKEN_TTL') else None
+
+# Notifications are buffered and written in batches (see notifications/dispatch.py).
+# 'thread' flushes from a background worker; 'inline' writes during the request.
+NOTIFICATION_DISPATCH_MODE = os.environ.get('NOTIFICATION_DISPATCH_MODE', 'thread')
+NOTIFICATION_FLUSH_INTERVAL = 0.5  # seconds between background flushes
+NOTIFICATION_BATCH_SIZE = 500
+# Repeated events for the same recipient/target fold into one unread row
+NOTIFICATION_COALESCE_VERBS = ['liked', 'followed']
+# Seconds the unread badge count is cached; writes invalidate it sooner, in
+# every process only if the default cache is shared (Redis, Memcached)
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 300
+# Pub/sub behind the SSE stream (notifications/broker.py); LocalBroker is per process
+NOTIFICATION_BROKER = 'notifications.broker.LocalBroker'
+NOTIFICATION_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+NOTIFICATION_STREAM_QUEUE_SIZE = 100  # undelivered events per client before it must resync
+
+# Async views run independent queries concurrently, each on its own connection
+# (see social_media_api/async_api.py)
+ASYNC_PARALLEL_QUERIES = True
+
+# Write throttling (social_media_api/throttling.py): token buckets per client
+# and scope, 'N/period' meaning bursts of N refilled at N per period. `writes`
+# is shared by every throttled view.
+THROTTLE_RATES = {
+    'writes': '120/min',
+    'like': '60/min',
+    'follow': '30/min',
+    'comment': '20/min',
+}
+THROTTLE_STORAGE = 'social_media_api.throttling.CacheStorage'
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Profile pictures (accounts/images.py): uploads stream to a temporary file,
+# are staged on local disk and resized in the background into square
+# variants of these sizes (pixels) before reaching the media storage
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+PROFILE_PICTURE_STAGING_DIR = os.environ.get('PROFILE_PICTURE_STAGING_DIR', os.path.join(BASE_DIR, 'media-staging'))
+PROFILE_PICTURE_SIZES = {'small': 64, 'medium': 192, 'large': 512}
+PROFILE_PICTURE_FORMAT = 'WEBP'
+PROFILE_PICTURE_QUALITY = 80
+PROFILE_PICTURE_PROCESSING_MODE = os.environ.get('PROFILE_PICTURE_PROCESSING_MODE', 'thread')
+
+# Query budgets (see social_media_api/query_budget.py): raise instead of
+# logging when a view goes over its declared budget. Budget tests turn this on.
+QUERY_BUDGET_STRICT = False
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'social_media_api.query_budget.QueryBudgetMiddleware',
+    'social_media_api.db_router.ReplicaRoutingMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -108,6 +223,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'social_media_api.urls'
 
+# ASGI mode (set by asgi.py): async read views shadow their DRF counterparts,
+# and the request path must be free of sync-only middleware. WhiteNoise is
+# WSGI-only, so static files come from the ASGI server or a CDN there.
+if os.environ.get('DJANGO_ASGI') == '1':
+    ROOT_URLCONF = 'social_media_api.asgi_urls'
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -124,6 +246,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'social_media_api.wsgi.application'
+ASGI_APPLICATION = 'social_media_api.asgi.application'
 
 
 # Database
@@ -150,6 +273,25 @@ if os.environ.get('DATABASE_URL'):
         ssl_require=True   # only works for Postgres/MySQL, not SQLite
     )
 
+# Read replicas (see social_media_api/db_router.py): DATABASE_REPLICA_URLS is a
+# comma-separated list of database URLs, each added as a `replicaN` alias.
+# Safe-method requests read from a healthy replica unless the client wrote
+# within REPLICA_STICKY_SECONDS; replicas more than REPLICA_MAX_LAG_SECONDS
+# behind are skipped, re-checked every REPLICA_HEALTH_CHECK_INTERVAL seconds.
+REPLICA_DATABASES = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=600),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['social_media_api.db_router.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = 10
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+# Must cover the worst lag of a replica still passing its health check;
+# db_router.sticky_seconds() never goes below that
+REPLICA_STICKY_SECONDS = REPLICA_MAX_LAG_SECONDS + REPLICA_HEALTH_CHECK_INTERVAL
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -0,0 +1,180 @@
+# social_media_api/sparse_fields.py
+"""
+Sparse fieldsets: `?fields=id,title,created_at` renders only those fields,
+`?omit=content` renders all but those. Unknown names are a 400.
+
+The pruning reaches the database too. SparseFieldsMixin maps the kept
+fields' sources onto model paths and loads them with .only(), dropping
+select_related() joins nothing reads any more, so both the payload and the
+row width shrink. Sources that can't be mapped (properties, source='*') turn
+the row pruning off for that request, never the field pruning.
+SerializerMethodFields are assumed to need the primary key only; ones that
+read more list their paths in Meta.field_sources:
+
+    class Meta:
+        field_sources = {'target': ['target_content_type', 'target_object_id']}
+
+Serializers opt in with SparseFieldsSerializerMixin. Only the top-level
+serializer (or the child of a top-level many=True) is pruned; nested ones
+render in full. GET requests only.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .pagination import resolve_ordering
+
+
+def parse_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def readable_fields(serializer_class):
+    return {name: field for name, field in serializer_class().fields.items() if not field.write_only}
+
+
+def selected_fields(serializer_class, params):
+    """
+    The set of field names a request asked for, or None for all of them.
+    """
+    fields, omit = parse_names(params.get('fields', '')), parse_names(params.get('omit', ''))
+    if not fields and not omit:
+        return None
+    available = readable_fields(serializer_class)
+    unknown = sorted(set(fields + omit) - set(available))
+    if unknown:
+        raise ValidationError({'fields': f'Unknown field(s): {", ".join(unknown)}.'})
+    return set(fields or available) - set(omit)
+
+
+def resolve_source(model, source):
+    """
+    `author.username` -> (`author__username`, the username field), or None if
+    the source isn't a chain of to-one model fields.
+    """
+    parts = source.split('.')
+    field = None
+    for part in parts:
+        if field is not None:
+            if not field.is_relation or field.many_to_many or field.one_to_many:
+                return None
+            model = field.related_model
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+    return '__'.join(parts), field
+
+
+def _field_paths(serializer, model, names, prefix=''):
+    paths = set() if prefix else {'pk'}
+    declared = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+    for name, field in serializer.fields.items():
+        if name not in names:
+            continue
+        if name in declared:
+            paths.update(prefix + path for path in declared[name])
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            continue
+        resolved = resolve_source(model, field.source) if field.source != '*' else None
+        if resolved is None or isinstance(field, serializers.ListSerializer):
+            return None
+        path, model_field = resolved
+        if not isinstance(field, serializers.BaseSerializer):
+            paths.add(prefix + path)
+            continue
+        # A nested serializer reads its related row in full
+        if not model_field.is_relation:
+            return None
+        nested = _field_paths(field, model_field.related_model, set(field.fields), f'{prefix}{path}__')
+        if nested is None:
+            return None
+        paths.add(f'{prefix}{path}')
+        paths.update(nested)
+    return paths
+
+
+def queryset_fields(serializer_class, names):
+    """
+    Model paths (for .only()) that rendering `names` reads, or None if unknown.
+    """
+    serializer = serializer_class()
+    return _field_paths(serializer, serializer.Meta.model, names)
+
+
+def prune_queryset(queryset, paths):
+    """
+    Load only `paths`, joining just the relations they go through.
+    """
+    relations = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*paths)
+
+
+def shape_queryset(queryset, serializer_class, names):
+    """
+    `queryset` narrowed to what rendering `names` reads, plus its ordering
+    columns (cursors are built from them).
+    """
+    if names is None:
+        return queryset
+    paths = queryset_fields(serializer_class, names)
+    if paths is None:
+        return queryset
+    for field in resolve_ordering(queryset):
+        resolved = resolve_source(queryset.model, field.lstrip('-').replace('__', '.'))
+        if resolved is not None:
+            paths.add(resolved[0])
+    return prune_queryset(queryset, paths)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer mixin rendering only context['sparse_fields'] when it is set.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get('sparse_fields')
+        if names is None or not self.is_top_level():
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class SparseFieldsMixin:
+    """
+    View mixin applying ?fields= / ?omit= to the serializer and, through
+    filter_queryset(), to the queryset. Views that build their queryset some
+    other way call sparse_queryset() themselves.
+    """
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            if self.request.method == 'GET':
+                self._sparse_fields = selected_fields(self.get_serializer_class(), self.request.query_params)
+        return self._sparse_fields
+
+    def wants_field(self, name):
+        names = self.get_sparse_fields()
+        return names is None or name in names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        return self.sparse_queryset(super().filter_queryset(queryset))
+
+    def sparse_queryset(self, queryset):
+        return shape_queryset(queryset, self.get_serializer_class(), self.get_sparse_fields())
@@ -0,0 +1,29 @@
+# social_media_api/test_settings.py
+"""
+Settings for the test suite. `manage.py test` picks this module by default;
+other runners should set DJANGO_SETTINGS_MODULE to it.
+
+Background work runs inline so it happens inside each test's transaction,
+and throttling is off. Tests covering those paths turn them back on with
+override_settings.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, REPLICA_DATABASES
+
+NOTIFICATION_DISPATCH_MODE = 'inline'
+FEED_FANOUT_MODE = 'inline'
+# One process: the LocMemCache response cache is shared by every request
+RESPONSE_CACHE_ALLOW_PER_PROCESS = True
+PROFILE_PICTURE_PROCESSING_MODE = 'inline'
+
+# Throttling tests set their own rates
+THROTTLE_RATES = {}
+THROTTLE_STORAGE = 'social_media_api.throttling.MemoryStorage'
+
+# Every query must see the test case's transaction
+ASYNC_PARALLEL_QUERIES = False
+
+if not REPLICA_DATABASES:
+    # A mirror of the test database for the routing tests, which turn
+    # REPLICA_DATABASES on themselves; other tests read from `default`
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
@@ -0,0 +1,177 @@
+# social_media_api/throttling.py
+"""
+Token-bucket throttling for write endpoints.
+
+Views name a scope, per action like query budgets:
+
+    class CommentViewSet(viewsets.ModelViewSet):
+        throttle_scope = {'create': 'comment'}
+
+    class LikePostView(APIView):
+        throttle_scope = 'like'
+
+and each client (the user, or the address for anonymous requests) gets one
+bucket per scope plus one `writes` bucket shared by every throttled view.
+THROTTLE_RATES gives each scope's 'N/period': the bucket holds N tokens and
+refills at N per period ('30/min', '5/10s', '1000/day'), so bursts up to N
+are allowed but the steady rate is capped. A request takes a token from both
+of its buckets, or from neither. When either is empty it gets a 429 whose
+Retry-After says when the next token arrives. Scopes without a rate are not
+throttled.
+
+Buckets live in THROTTLE_STORAGE:
+
+    CacheStorage    the THROTTLE_CACHE_ALIAS cache; shared when that cache
+                    is, at one get_many/set_many per request. Concurrent
+                    requests of one client may both take the last token.
+    MemoryStorage   a dict in this process: exact, and what tests use.
+
+A check costs microseconds with MemoryStorage and one cache round trip with
+CacheStorage.
+"""
+import functools
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+SHARED_SCOPE = 'writes'
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+RATE_PATTERN = re.compile(r'^(\d+)/(\d*)([a-z]+)$')
+
+
+@functools.lru_cache(maxsize=128)
+def parse_rate(rate):
+    """
+    '30/min' -> (capacity 30, refill 0.5 tokens per second).
+    """
+    match = RATE_PATTERN.match(rate.replace(' ', ''))
+    if not match or match.group(3) not in PERIODS or int(match.group(1)) < 1:
+        raise ValueError(f'Invalid throttle rate: {rate!r}')
+    capacity = int(match.group(1))
+    period = int(match.group(2) or 1) * PERIODS[match.group(3)]
+    return capacity, capacity / period
+
+
+def refill(state, capacity, rate, now):
+    """
+    Tokens in a bucket stored as (tokens, updated_at, ...) after refilling until now.
+    """
+    if state is None:
+        return capacity
+    return min(capacity, state[0] + max(0.0, now - state[1]) * rate)
+
+
+def take_all(states, buckets, now):
+    """
+    Each bucket's tokens after taking one, or None and the seconds until
+    every bucket has a token. `buckets` are (key, capacity, rate) tuples.
+    """
+    levels = [refill(states.get(key), capacity, rate, now) for key, capacity, rate in buckets]
+    wait = max((1 - level) / rate for level, (_, _, rate) in zip(levels, buckets))
+    if wait > 0:
+        return None, wait
+    return [level - 1 for level in levels], 0.0
+
+
+class MemoryStorage:
+    """
+    Buckets in a process-local dict, as (tokens, updated_at, full_at). Full
+    buckets are dropped once it holds more than `max_entries`.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def take(self, buckets, now):
+        with self.lock:
+            levels, wait = take_all(self.states, buckets, now)
+            if levels is not None:
+                for level, (key, capacity, rate) in zip(levels, buckets):
+                    self.states[key] = (level, now, now + (capacity - level) / rate)
+                if len(self.states) > self.max_entries:
+                    self.prune(now)
+            return wait
+
+    def prune(self, now):
+        # A missing bucket reads as full
+        self.states = {key: state for key, state in self.states.items() if state[2] > now}
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+
+class CacheStorage:
+    """
+    Buckets in a Django cache, each expiring once it would be full again.
+    """
+
+    def take(self, buckets, now):
+        cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+        keys = {f'throttle:{key}': (key, capacity, rate) for key, capacity, rate in buckets}
+        stored = cache.get_many(list(keys))
+        levels, wait = take_all({keys[name][0]: state for name, state in stored.items()}, buckets, now)
+        if levels is not None:
+            refilled_in = max((capacity - level) / rate for level, (_, capacity, rate) in zip(levels, buckets))
+            cache.set_many({name: (level, now) for name, level in zip(keys, levels)}, timeout=int(refilled_in) + 1)
+        return wait
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage():
+    path = getattr(settings, 'THROTTLE_STORAGE', 'social_media_api.throttling.CacheStorage')
+    storage = _storages.get(path)
+    if storage is None:
+        with _storages_lock:
+            storage = _storages.setdefault(path, import_string(path)())
+    return storage
+
+
+def view_scope(view):
+    """
+    The throttle scope a view declares for the current action or method, if any.
+    """
+    scope = getattr(view, 'throttle_scope', None)
+    if isinstance(scope, dict):
+        action = getattr(view, 'action', None) or view.request.method.lower()
+        return scope.get(action)
+    return scope
+
+
+class TokenBucketThrottle(BaseThrottle):
+    timer = time.time
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_buckets(self, request, scope):
+        rates = getattr(settings, 'THROTTLE_RATES', {})
+        if scope not in rates:
+            return []
+        ident = f'user:{request.user.pk}' if request.user.is_authenticated else f'ip:{self.get_ident(request)}'
+        buckets = []
+        for name in (scope, SHARED_SCOPE):
+            if name in rates:
+                buckets.append((f'{ident}:{name}', *parse_rate(rates[name])))
+        return buckets
+
+    def allow_request(self, request, view):
+        scope = view_scope(view)
+        buckets = self.get_buckets(request, scope) if scope else []
+        if not buckets:
+            return True
+        self.wait_seconds = get_storage().take(buckets, self.timer())
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,169 @@
+# social_media_api/values_mode.py
+"""
+Values mode: read-only lists rendered straight from .values() rows.
+
+Serializing a page the usual way builds a model instance for every row (and
+every select_related row), then walks each field's get_attribute(). A
+ValuesPlan compiles a serializer's fields once into (name, ORM path,
+to_representation) steps, fetches exactly those columns with .values() and
+builds the output dicts from the row dicts:
+
+    plan = ValuesPlan.for_serializer(serializer)   # None when unsupported
+    data = plan.represent(plan.rows(queryset))
+
+Supported are model fields, including those across to-one relations,
+ForeignKeys rendered as primary keys, file fields, and nested serializers
+over to-one relations. A SerializerMethodField is supported when its
+serializer defines `values_<name>(row)`. A serializer that overrides
+to_representation() must define `finish_values(row, data)` too. Serializers
+may define `prepare_values(rows)` to look at the whole page first. Anything
+else gets no plan, and the caller serializes instances as usual. Row keys are
+the ORM paths, with `pk` (or `<relation>__pk`) always present.
+
+ValuesListMixin uses a plan for a view's list() when one can be built and
+SERIALIZER_VALUES_MODE is on.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .pagination import resolve_ordering
+from .sparse_fields import resolve_source
+
+
+def _identity(value):
+    return value
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation() for aware values and ISO 8601 output,
+    with the timezone looked up once per plan instead of once per value.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None or output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _converter(field, model_field):
+    """
+    What turns a .values() value into the field's representation, or None if it can't.
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field is not None else _identity
+    if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) or model_field.is_relation:
+        return None
+    if isinstance(model_field, models.FileField):
+        return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if type(field) is serializers.ReadOnlyField:
+        return _identity
+    return field.to_representation
+
+
+class ValuesPlan:
+    def __init__(self, serializer, steps, paths):
+        self.serializer = serializer
+        self.steps = steps
+        self.paths = paths
+        self.finish = getattr(serializer, 'finish_values', None)
+
+    @classmethod
+    def for_serializer(cls, serializer, model=None, prefix=''):
+        """
+        The plan for rendering `serializer`'s fields, or None if it can't be done from rows.
+        """
+        if type(serializer).to_representation is not serializers.Serializer.to_representation \
+                and not hasattr(serializer, 'finish_values'):
+            return None
+        model = model or serializer.Meta.model
+        steps, paths = [], [prefix + 'pk']
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                hook = getattr(serializer, f'values_{name}', None)
+                if hook is None:
+                    return None
+                paths.extend(prefix + path for path in getattr(serializer.Meta, 'field_sources', {}).get(name, []))
+                steps.append((name, None, hook))
+                continue
+            resolved = resolve_source(model, field.source) if field.source != '*' else None
+            if resolved is None or resolved[1].many_to_many or resolved[1].one_to_many \
+                    or isinstance(field, serializers.ListSerializer):
+                return None
+            path, model_field = resolved
+            if isinstance(field, serializers.BaseSerializer):
+                if not model_field.is_relation:
+                    return None
+                nested = cls.for_serializer(field, model_field.related_model, f'{prefix}{path}__')
+                if nested is None:
+                    return None
+                paths.extend(nested.paths)
+                steps.append((name, f'{prefix}{path}__pk', nested))
+                continue
+            convert = _converter(field, model_field)
+            if convert is None:
+                return None
+            paths.append(prefix + path)
+            steps.append((name, prefix + path, convert))
+        return cls(serializer, steps, list(dict.fromkeys(paths)))
+
+    def rows(self, queryset):
+        """
+        `queryset` as .values() rows, ordering columns included (cursors are built from them).
+        """
+        ordering = [field.lstrip('-') for field in resolve_ordering(queryset)]
+        return queryset.values(*dict.fromkeys(self.paths + ordering))
+
+    def represent(self, rows):
+        prepare = getattr(self.serializer, 'prepare_values', None)
+        if prepare is not None:
+            prepare(rows)
+        return [self.represent_row(row) for row in rows]
+
+    def represent_row(self, row):
+        data = {}
+        for name, key, step in self.steps:
+            if key is None:
+                data[name] = step(row)
+            elif isinstance(step, ValuesPlan):
+                # A NULL relation renders as None, like a nested serializer over None
+                data[name] = None if row[key] is None else step.represent_row(row)
+            else:
+                value = row[key]
+                data[name] = None if value is None else step(value)
+        return data if self.finish is None else self.finish(row, data)
+
+
+class ValuesListMixin:
+    """
+    View mixin serving list() from .values() rows when the serializer allows it.
+    """
+
+    def get_values_plan(self):
+        if self.request.method != 'GET' or not getattr(settings, 'SERIALIZER_VALUES_MODE', True):
+            return None
+        return ValuesPlan.for_serializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_values_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        rows = plan.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.represent(page))
+        return Response(plan.represent(list(rows)))